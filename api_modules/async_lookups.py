@@ -0,0 +1,227 @@
+import asyncio
+import logging
+import requests
+from urllib.parse import quote
+from api_modules.ip_lookup import IPLookup
+from api_modules.email_lookup import EmailLookup
+from api_modules.phone_lookup import PhoneLookup
+from api_modules.whois_lookup import WhoisLookup
+from api_modules.social_lookup import SocialLookup, ProfileScan, PROFILE_HEADERS
+from api_modules.async_upstream import async_upstream
+from api_modules.provider_stats import provider_stats
+from api_modules.quota_manager import quota_manager
+
+logger = logging.getLogger(__name__)
+
+# The async lookups subclass the sync ones: validation, link building and
+# response parsing are shared, only the provider calls are coroutines. The
+# independent calls of one search run concurrently, and results come back in
+# the same order and shape as the sync lookups produce.
+
+class AsyncIPLookup(IPLookup):
+    """IPLookup with the IP-API and IPWhois calls made concurrently"""
+
+    async def search(self, ip_address, parsed=None):
+        results = []
+
+        try:
+            results.append(self._validate_ip(ip_address, parsed))
+        except Exception as e:
+            logger.error(f"IP validation error: {str(e)}")
+
+        lookups = await asyncio.gather(self._ip_api_lookup(ip_address), self._ipwhois_lookup(ip_address))
+        results.extend(result for result in lookups if result)
+
+        for analysis in (self._security_analysis, self._network_analysis):
+            result = analysis(ip_address)
+            if result:
+                results.append(result)
+
+        return results
+
+    async def _ip_api_lookup(self, ip_address):
+        try:
+            if not await quota_manager.acquire_async('ip-api'):
+                return self._quota_exceeded('IP-API Geolocation')
+
+            response = await async_upstream.get('ip-api', f"{self.ip_api_url}/{ip_address}")
+            return self._parse_ip_api(ip_address, response)
+
+        except Exception as e:
+            logger.error(f"IP-API request error: {str(e)}")
+            return None
+
+    async def _ipwhois_lookup(self, ip_address):
+        try:
+            if not await quota_manager.acquire_async('ipwhois'):
+                return self._quota_exceeded('IPWhois Registry')
+
+            response = await async_upstream.get('ipwhois', f"{self.ipwhois_url}/{ip_address}")
+            return self._parse_ipwhois(ip_address, response)
+
+        except Exception as e:
+            logger.error(f"IPWhois request error: {str(e)}")
+            return None
+
+class AsyncEmailLookup(EmailLookup):
+    """EmailLookup with the breach check and MX query made concurrently"""
+
+    async def search(self, email, parsed=None):
+        results = []
+
+        try:
+            results.append(self._validate_email(email, parsed))
+        except Exception as e:
+            logger.error(f"Email validation error: {str(e)}")
+
+        if self.hibp_api_key:
+            hibp_result, domain_result = await asyncio.gather(self._hibp_lookup(email), self._analyze_domain(email))
+            if hibp_result:
+                results.append(hibp_result)
+        else:
+            results.append(self._hibp_key_required())
+            domain_result = await self._analyze_domain(email)
+
+        if domain_result:
+            results.append(domain_result)
+
+        return results
+
+    async def _hibp_lookup(self, email):
+        try:
+            if not await quota_manager.acquire_async('hibp', key=self.hibp_api_key):
+                return self._hibp_quota_exceeded()
+
+            breach_url = f"{self.hibp_api_url}/breachedaccount/{quote(email)}"
+            response = await async_upstream.get('hibp', breach_url, headers=self._hibp_headers())
+            return self._parse_hibp(email, response)
+
+        except Exception as e:
+            logger.error(f"HIBP request error: {str(e)}")
+            return None
+
+    async def _analyze_domain(self, email):
+        domain = email.split('@')[1] if '@' in email else ''
+        if not domain:
+            return None
+
+        try:
+            mx_exists = len(await async_upstream.resolve(domain, 'MX')) > 0
+        except Exception:
+            mx_exists = False
+
+        return self._domain_result(domain, mx_exists)
+
+class AsyncPhoneLookup(PhoneLookup):
+    """PhoneLookup with the NumVerify call made without blocking"""
+
+    async def search(self, phone_number, parsed=None):
+        return await self.lookup(phone_number, parsed)
+
+    async def lookup(self, phone_number, parsed=None):
+        results = []
+
+        basic_result = self._parse_phone_basic(phone_number, parsed)
+        if basic_result:
+            results.append(basic_result)
+
+        if self.numverify_api_key:
+            numverify_result = await self._numverify_lookup(phone_number)
+            if numverify_result:
+                results.append(numverify_result)
+
+        return results if results else [{'platform': 'Phone Number Parser', 'status': 'not_found', 'details': {}}]
+
+    async def _numverify_lookup(self, phone_number):
+        try:
+            if not await quota_manager.acquire_async('numverify', key=self.numverify_api_key):
+                return self._numverify_quota_exceeded()
+
+            response = await async_upstream.get('numverify', self.numverify_url, params=self._numverify_params(phone_number))
+            return self._parse_numverify(phone_number, response)
+
+        except Exception as e:
+            logger.error(f"NumVerify request error: {str(e)}")
+            return None
+
+class AsyncWhoisLookup(WhoisLookup):
+    """WhoisLookup with the WHOIS query and the A, MX and NS queries made concurrently"""
+
+    async def search(self, domain, parsed=None):
+        results = []
+
+        try:
+            domain = parsed.domain if parsed is not None else self._normalize_domain(domain)
+            whois_data, dns_info = await asyncio.gather(async_upstream.whois(domain), self._get_dns_info(domain))
+
+            if whois_data:
+                results.append(self._whois_result(domain, whois_data))
+            if dns_info:
+                results.append(self._dns_result(dns_info))
+
+        except Exception as e:
+            logger.error(f"WHOIS lookup error for {domain}: {str(e)}")
+            results.append(self._whois_error(e))
+
+        return results
+
+    async def _get_dns_info(self, domain):
+        record_types = ('A', 'MX', 'NS')
+        answers = await asyncio.gather(
+            *(async_upstream.resolve(domain, record_type) for record_type in record_types),
+            return_exceptions=True
+        )
+        return {
+            f"{record_type} Records": 'N/A' if isinstance(answer, BaseException) else ', '.join(answer)
+            for record_type, answer in zip(record_types, answers)
+        }
+
+class AsyncSocialLookup(SocialLookup):
+    """SocialLookup probing every platform concurrently on the event loop
+
+    Each platform's rate limit and concurrency limit apply as in the sync
+    lookup; a probe waiting on either does not block the loop.
+    """
+
+    async def search_by_username(self, username):
+        username = username.strip().replace('@', '')
+
+        ordered = provider_stats.order(self.platforms.values(), key=lambda rule: rule.provider)
+        outcomes = await asyncio.gather(
+            *(self._probe_platform(rule, username) for rule in ordered),
+            return_exceptions=True
+        )
+
+        results = []
+        for rule, outcome in zip(ordered, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error checking {rule.name} for {username}: {str(outcome)}")
+            elif outcome:
+                results.append(outcome)
+
+        return self._add_summary(username, results)
+
+    async def search_by_name(self, full_name):
+        return super().search_by_name(full_name)
+
+    async def _probe_platform(self, rule, username):
+        if not await quota_manager.acquire_async(rule.provider):
+            return self._platform_quota_exceeded(rule.name, username, rule.profile_url.format(username))
+
+        async with rule.async_limit():
+            return await self._check_platform(rule, username)
+
+    async def _check_platform(self, rule, username):
+        url = rule.url.format(username)
+        scan = ProfileScan(username, rule)
+        try:
+            response = await async_upstream.probe(
+                rule.provider, url, method=rule.method, until=scan.feed, max_bytes=rule.max_bytes,
+                headers=PROFILE_HEADERS, allow_redirects=True
+            )
+            return self._platform_result(
+                rule.name, username, rule.profile_url.format(username), response, scan.status(response.status_code)
+            )
+
+        except requests.exceptions.RequestException as e:
+            return self._platform_error(rule.name, username, e)
@@ -0,0 +1,216 @@
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+from api_modules.input_validator import InputValidator
+from api_modules.lazy import lazy_instance
+from api_modules.security import rate_limiter, SECURITY_HEADERS
+from api_modules.search_store import search_store
+from api_modules.async_upstream import async_upstream
+from api_modules import metrics
+from api_modules import tracing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+def _dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload, default=str)
+    return json.dumps(payload, default=str).encode('utf-8')
+
+class AsyncSearchApp:
+    """ASGI app serving the search API on a single event loop
+
+    POST `path` takes the same body and returns the same response as
+    /api/search, but the lookups are coroutines sharing one pooled aiohttp
+    client: a request waiting on providers holds no thread, and the
+    provider calls within a search run concurrently. Every other request
+    goes to `fallback` (the Flask app behind an ASGI adapter).
+    """
+
+    ENDPOINT = 'search_async'
+
+    def __init__(self, fallback, path='/api/search/async', cors_origins=(),
+                 max_requests=30, window_seconds=60, max_body=1024 * 1024):
+        self.fallback = fallback
+        self.path = path
+        self.cors_origins = set(cors_origins)
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.max_body = max_body
+
+        self.email_lookup = lazy_instance('api_modules.async_lookups', 'AsyncEmailLookup')
+        self.phone_lookup = lazy_instance('api_modules.async_lookups', 'AsyncPhoneLookup')
+        self.ip_lookup = lazy_instance('api_modules.async_lookups', 'AsyncIPLookup')
+        self.whois_lookup = lazy_instance('api_modules.async_lookups', 'AsyncWhoisLookup')
+        self.social_lookup = lazy_instance('api_modules.async_lookups', 'AsyncSocialLookup')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http' and scope['path'] == self.path:
+            await self._handle(scope, receive, send)
+        else:
+            await self.fallback(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_upstream.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _handle(self, scope, receive, send):
+        method = scope['method']
+        headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        cors = self._cors_headers(headers.get('origin'))
+
+        if method == 'OPTIONS':
+            await self._send(send, 200, b'', cors + [
+                ('Access-Control-Allow-Methods', 'POST, OPTIONS'),
+                ('Access-Control-Allow-Headers', headers.get('access-control-request-headers', 'Content-Type'))
+            ])
+            return
+        if method != 'POST':
+            await self._send_json(send, 405, {"error": "Method not allowed"}, cors + [('Allow', 'POST, OPTIONS')])
+            return
+
+        state = {'search_type': ''}
+        start = time.perf_counter()
+        metrics.http_requests_in_flight.labels(self.path).inc()
+        root, token = tracing.begin_trace(self.path, method=method)
+        error = None
+        try:
+            status, payload = await self._search(scope, headers, receive, root, state)
+        except Exception as e:
+            logger.error(f"Search error: {str(e)}")
+            error = e
+            status, payload = 500, {"error": "Internal server error"}
+        finally:
+            metrics.http_requests_in_flight.labels(self.path).dec()
+            metrics.http_requests.labels(self.path, method, state['search_type'], str(status)).inc()
+            metrics.http_request_duration.labels(self.path, state['search_type']).observe(time.perf_counter() - start)
+            tracing.end_trace(root, token, error)
+
+        await self._send_json(send, status, payload, cors + [('X-Trace-Id', root.trace_id)])
+
+    async def _search(self, scope, headers, receive, root, state):
+        """Same contract as the /api/search view; returns (status, payload)"""
+        client = scope.get('client')
+        identifier = client[0] if client else 'unknown'
+        allowed = await asyncio.to_thread(rate_limiter.is_allowed, identifier, self.max_requests, self.window_seconds)
+        if not allowed:
+            metrics.rate_limit_rejections.labels(self.ENDPOINT).inc()
+            return 429, {
+                "error": "Rate limit exceeded. Please try again later.",
+                "retry_after": self.window_seconds
+            }
+
+        mimetype = headers.get('content-type', '').split(';')[0].strip().lower()
+        if not (mimetype == 'application/json' or (mimetype.startswith('application/') and mimetype.endswith('+json'))):
+            return 400, {"error": "Request must be JSON"}
+
+        body = await self._read_body(receive)
+        if body is None:
+            return 413, {"error": "Request body too large"}
+        try:
+            data = orjson.loads(body) if orjson is not None else json.loads(body)
+        except ValueError:
+            return 400, {"error": "Invalid JSON"}
+        if data is None:
+            return 400, {"error": "Invalid JSON"}
+        if not isinstance(data, dict):
+            return 400, {"error": "JSON body must be an object"}
+
+        search_type = data.get('type')
+        search_query = data.get('query')
+
+        # Validate input (type 'auto' detects the type from the query)
+        parsed, error = InputValidator.parse_search_input(search_type, search_query)
+        if error:
+            return 400, {"error": error}
+
+        search_type = parsed.search_type
+        state['search_type'] = search_type
+        root.set('search_type', search_type)
+
+        # Use sanitized query
+        search_query = parsed.value
+
+        logger.info(f"Async search request: type={search_type}, query={search_query}")
+
+        if search_type == 'email':
+            results = await self.email_lookup.search(search_query, parsed)
+        elif search_type == 'phone':
+            results = await self.phone_lookup.search(search_query, parsed)
+        elif search_type == 'ip':
+            results = await self.ip_lookup.search(search_query, parsed)
+        elif search_type == 'domain':
+            results = await self.whois_lookup.search(search_query, parsed)
+        elif search_type == 'name':
+            results = await self.social_lookup.search_by_name(search_query)
+        elif search_type == 'username':
+            results = await self.social_lookup.search_by_username(search_query)
+        else:
+            return 400, {"error": "Invalid search type"}
+
+        # Keep the results server-side so exports can refer to them by ID
+        try:
+            search_id = await asyncio.to_thread(search_store.save, search_type, search_query, results)
+        except Exception as e:
+            logger.error(f"Search store error: {str(e)}")
+            search_id = None
+
+        response = {
+            "status": "success",
+            "search_id": search_id,
+            "search_type": search_type,
+            "query": search_query,
+            "results": results,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        # Debug requests get the span tree of this search
+        if data.get('debug'):
+            response["trace"] = root.to_dict()
+
+        return 200, response
+
+    async def _read_body(self, receive):
+        """The request body, or None once it grows past max_body"""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                break
+            body += message.get('body', b'')
+            if len(body) > self.max_body:
+                return None
+            if not message.get('more_body'):
+                break
+        return bytes(body)
+
+    def _cors_headers(self, origin):
+        if origin and origin in self.cors_origins:
+            return [('Access-Control-Allow-Origin', origin), ('Vary', 'Origin')]
+        return []
+
+    async def _send_json(self, send, status, payload, headers):
+        await self._send(send, status, _dumps(payload), headers + [('Content-Type', 'application/json')])
+
+    async def _send(self, send, status, body, headers):
+        headers = headers + list(SECURITY_HEADERS.items()) + [('Content-Length', str(len(body)))]
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        })
+        await send({'type': 'http.response.body', 'body': body})
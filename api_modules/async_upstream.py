@@ -0,0 +1,193 @@
+import os
+import time
+import json
+import asyncio
+import logging
+import weakref
+import requests
+from api_modules.provider_stats import provider_stats
+from api_modules.upstream import upstream, rewrite_url, override_resolver, read_prefix, split_chunks
+from api_modules.cassette import request_key, encode_response, decode_response
+from api_modules import tracing
+
+logger = logging.getLogger(__name__)
+
+class UpstreamRequestError(requests.exceptions.RequestException):
+    """An async provider call failed before a response arrived
+
+    Subclasses the requests exception so lookups handle failures of the
+    sync and async clients with the same except clauses.
+    """
+
+class AsyncResponse:
+    """Fully read provider response with the parts of requests.Response the lookups use"""
+
+    __slots__ = ('status_code', 'content', 'encoding', 'url')
+
+    def __init__(self, status_code, content, encoding, url):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+class AsyncUpstreamClient:
+    """asyncio counterpart of UpstreamClient, built on aiohttp
+
+    Each event loop gets its own session whose connector pools keep-alive
+    connections (up to `pool_size` open at once), so a single process can
+    keep thousands of provider calls in flight. Calls record the same
+    provider stats and trace spans as the sync client and take the same
+    adaptive timeouts, and go through the sync client's cassette when one
+    is set. DNS queries use dnspython's async resolver; WHOIS has no async
+    client and runs in a worker thread.
+    """
+
+    def __init__(self, default_timeout=10, pool_size=100, override_url=None):
+        self.default_timeout = default_timeout
+        self.pool_size = pool_size
+        self.override_url = override_url.rstrip('/') if override_url else None
+        self.sessions = weakref.WeakKeyDictionary()
+        self.resolver = None
+
+    def _session(self):
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        session = self.sessions.get(loop)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300)
+            session = aiohttp.ClientSession(connector=connector)
+            self.sessions[loop] = session
+        return session
+
+    def timeout_for(self, provider):
+        return provider_stats.timeout_for(provider, self.default_timeout)
+
+    async def request(self, provider, method, url, params=None, headers=None, allow_redirects=True, timeout=None):
+        """Send a request on behalf of a provider and record how it went"""
+        send = lambda url, timeout: self._send(method, url, params, headers, allow_redirects, timeout)
+        return await self._call(provider, method, url, params, timeout, send)
+
+    async def probe(self, provider, url, method='GET', until=None, max_bytes=None, chunk_size=16384,
+                    params=None, headers=None, allow_redirects=True, timeout=None):
+        """UpstreamClient.probe() for coroutines: reads no more of the body than a check needs"""
+        async def send(url, timeout):
+            import aiohttp
+
+            try:
+                async with self._session().request(
+                    method, url, params=params, headers=headers, allow_redirects=allow_redirects,
+                    timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as response:
+                    read = []
+                    if method == 'GET' and 200 <= response.status < 300:
+                        size = 0
+                        async for chunk in response.content.iter_chunked(chunk_size):
+                            read.append(chunk)
+                            size += len(chunk)
+                            if (until is not None and until(chunk)) or (max_bytes is not None and size >= max_bytes):
+                                break
+                    return AsyncResponse(response.status, b''.join(read), response.charset, str(response.url))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                raise UpstreamRequestError(f"{type(e).__name__}: {e}") from e
+
+        response = await self._call(provider, method, url, params, timeout, send)
+        if until is not None and upstream.cassette is not None and upstream.cassette.mode == 'replay':
+            # A replayed body was read when it was recorded; show it to the check now
+            read_prefix(split_chunks(response.content, chunk_size), until)
+        return response
+
+    async def _call(self, provider, method, url, params, timeout, send):
+        """send(url, timeout) with the provider's stats, trace span, timeout and cassette applied"""
+        timeout = timeout or self.timeout_for(provider)
+        # Recordings are keyed by the real provider URL, whatever serves it
+        key = request_key(method, url, params)
+        if self.override_url:
+            url = rewrite_url(self.override_url, url)
+
+        with tracing.span(f"provider:{provider}", method=method, url=url, timeout=timeout) as span:
+            start = time.perf_counter()
+            try:
+                if upstream.cassette is not None:
+                    result = await upstream.cassette.play_async(
+                        'http', key, lambda: send(url, timeout), encode_response, decode_response
+                    )
+                else:
+                    result = await send(url, timeout)
+            except requests.exceptions.RequestException:
+                provider_stats.record(provider, time.perf_counter() - start, error=True)
+                raise
+
+            # Rate limiting and server errors count against the provider
+            error = result.status_code == 429 or result.status_code >= 500
+            provider_stats.record(provider, time.perf_counter() - start, error=error)
+
+            if span is not None:
+                span.set('status_code', result.status_code)
+                span.set('bytes', len(result.content))
+            return result
+
+    async def _send(self, method, url, params, headers, allow_redirects, timeout):
+        import aiohttp
+
+        try:
+            async with self._session().request(
+                method, url, params=params, headers=headers, allow_redirects=allow_redirects,
+                timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                content = await response.read()
+                return AsyncResponse(response.status, content, response.charset, str(response.url))
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise UpstreamRequestError(f"{type(e).__name__}: {e}") from e
+
+    async def get(self, provider, url, **kwargs):
+        return await self.request(provider, 'GET', url, **kwargs)
+
+    async def resolve(self, name, record_type):
+        """DNS query returning the answer records as strings"""
+        with tracing.span('dns', query=name, record_type=record_type) as span:
+            with provider_stats.track('dns'):
+                if upstream.cassette is not None:
+                    records = await upstream.cassette.play_async(
+                        'dns', f"{name} {record_type}", lambda: self._resolve(name, record_type)
+                    )
+                else:
+                    records = await self._resolve(name, record_type)
+
+            if span is not None:
+                span.set('records', len(records))
+            return records
+
+    async def _resolve(self, name, record_type):
+        import dns.asyncresolver
+
+        if upstream.dns_override:
+            if self.resolver is None:
+                self.resolver = override_resolver(dns.asyncresolver.Resolver, upstream.dns_override)
+            answer = await self.resolver.resolve(name, record_type)
+        else:
+            answer = await dns.asyncresolver.resolve(name, record_type)
+        return [str(record) for record in answer]
+
+    async def whois(self, domain):
+        """WHOIS query in a worker thread; python-whois only has a blocking client"""
+        return await asyncio.to_thread(upstream.whois, domain)
+
+    async def close(self):
+        """Close the session of the running event loop"""
+        session = self.sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+# Global async upstream client instance
+async_upstream = AsyncUpstreamClient(
+    pool_size=int(os.environ.get('ASYNC_POOL_SIZE', 100)),
+    override_url=os.environ.get('UPSTREAM_OVERRIDE')
+)
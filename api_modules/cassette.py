@@ -0,0 +1,180 @@
+import os
+import gzip
+import json
+import time
+import base64
+import asyncio
+import logging
+import importlib
+import threading
+import requests
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# Query parameters whose values are credentials and never written to disk
+REDACTED_PARAMS = {'access_key', 'api_key', 'apikey', 'key', 'token'}
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Replay found no recorded response for a request"""
+
+class RecordedResponse:
+    """Replayed HTTP response with the parts of requests.Response the lookups use"""
+
+    __slots__ = ('status_code', 'content', 'encoding', 'url')
+
+    def __init__(self, status_code, content, encoding, url):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.url = url
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    def json(self):
+        return json.loads(self.content)
+
+def request_key(method, url, params=None):
+    """Canonical form of a request: method plus URL with sorted, redacted query"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query += [(name, str(value)) for name, value in params.items()]
+    query = sorted((name, '***' if name.lower() in REDACTED_PARAMS else value) for name, value in query)
+    return f"{method.upper()} {urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))}"
+
+def encode_response(response):
+    entry = {'status': response.status_code, 'encoding': response.encoding}
+    try:
+        entry['body'] = response.content.decode('utf-8')
+    except UnicodeDecodeError:
+        entry['body_b64'] = base64.b64encode(response.content).decode('ascii')
+    return entry
+
+def decode_response(value, key):
+    content = base64.b64decode(value['body_b64']) if 'body_b64' in value else value['body'].encode('utf-8')
+    return RecordedResponse(value['status'], content, value.get('encoding'), key.split(' ', 1)[1])
+
+def _error_from(recorded):
+    """Rebuild a recorded exception as its original type where possible"""
+    module_name, _, class_name = recorded['type'].rpartition('.')
+    try:
+        error_class = getattr(importlib.import_module(module_name), class_name)
+        if isinstance(error_class, type) and issubclass(error_class, Exception):
+            return error_class(recorded['message'])
+    except Exception:
+        pass
+    return RuntimeError(recorded['message'])
+
+class Cassette:
+    """Recorded upstream traffic for deterministic benchmarks
+
+    In record mode every HTTP, DNS and WHOIS call the upstream clients make
+    is performed for real and written, with how long it took, to a gzipped
+    JSON-lines file. In replay mode nothing leaves the process: each call
+    gets the next recorded answer for the same request (cycling when the
+    recording runs out) after sleeping the recorded time multiplied by
+    `latency_scale` (0 replays instantly). Recorded errors are raised again
+    with their original type. Credentials in query strings are redacted and
+    request headers are not stored.
+    """
+
+    def __init__(self, path, mode='replay', latency_scale=1.0):
+        if mode not in ('record', 'replay'):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.entries = {}
+        self.positions = {}
+        self.lock = threading.Lock()
+
+        if mode == 'replay':
+            self._load()
+        else:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+
+    def _load(self):
+        count = 0
+        with gzip.open(self.path, 'rt', encoding='utf-8') as handle:
+            for line in handle:
+                entry = json.loads(line)
+                self.entries.setdefault((entry['kind'], entry['key']), []).append(entry)
+                count += 1
+        logger.info(f"Loaded {count} recorded upstream calls from {self.path}")
+
+    def _append(self, entry):
+        line = (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8')
+        with self.lock:
+            # Appended gzip members read back as one stream
+            with gzip.open(self.path, 'ab') as handle:
+                handle.write(line)
+
+    def _next(self, kind, key):
+        with self.lock:
+            recorded = self.entries.get((kind, key))
+            if not recorded:
+                raise CassetteMiss(f"No recorded {kind} call for {key}")
+            position = self.positions.get((kind, key), 0)
+            self.positions[(kind, key)] = position + 1
+            return recorded[position % len(recorded)]
+
+    def _result(self, entry, decode):
+        if 'error' in entry:
+            raise _error_from(entry['error'])
+        return decode(entry['value'], entry['key']) if decode else entry['value']
+
+    def _record(self, kind, key, elapsed, value=None, error=None, encode=None):
+        entry = {'kind': kind, 'key': key, 'elapsed': round(elapsed, 6)}
+        if error is not None:
+            entry['error'] = {'type': f"{type(error).__module__}.{type(error).__qualname__}", 'message': str(error)}
+        else:
+            entry['value'] = encode(value) if encode else value
+        self._append(entry)
+
+    def play(self, kind, key, perform, encode=None, decode=None):
+        """Result of perform(), recorded in record mode, or the recorded result in replay mode"""
+        if self.mode == 'replay':
+            entry = self._next(kind, key)
+            if self.latency_scale:
+                time.sleep(entry['elapsed'] * self.latency_scale)
+            return self._result(entry, decode)
+
+        start = time.perf_counter()
+        try:
+            value = perform()
+        except Exception as e:
+            self._record(kind, key, time.perf_counter() - start, error=e)
+            raise
+        self._record(kind, key, time.perf_counter() - start, value=value, encode=encode)
+        return value
+
+    async def play_async(self, kind, key, perform, encode=None, decode=None):
+        """play() for coroutines; perform returns an awaitable"""
+        if self.mode == 'replay':
+            entry = self._next(kind, key)
+            if self.latency_scale:
+                await asyncio.sleep(entry['elapsed'] * self.latency_scale)
+            return self._result(entry, decode)
+
+        start = time.perf_counter()
+        try:
+            value = await perform()
+        except Exception as e:
+            self._record(kind, key, time.perf_counter() - start, error=e)
+            raise
+        self._record(kind, key, time.perf_counter() - start, value=value, encode=encode)
+        return value
+
+def cassette_from_env():
+    path = os.environ.get('UPSTREAM_CASSETTE')
+    if not path:
+        return None
+    return Cassette(
+        path,
+        mode=os.environ.get('UPSTREAM_CASSETTE_MODE', 'replay'),
+        latency_scale=float(os.environ.get('UPSTREAM_CASSETTE_LATENCY', 1.0))
+    )
@@ -0,0 +1,155 @@
+import zlib
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Content types worth compressing; PDF, zip, Parquet and Arrow exports are
+# already compressed and pass through untouched
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml'
+)
+
+class CompressionMiddleware:
+    """WSGI middleware compressing responses with brotli or gzip
+
+    The encoding is negotiated from Accept-Encoding, preferring brotli when
+    the `brotli` package is installed. Responses with a known length are
+    compressed in one go once they reach `min_size` bytes. Streamed
+    responses (no Content-Length), and files too big to buffer, are
+    compressed chunk by chunk and each chunk is flushed straight away, so
+    streaming exports still reach the client as they are produced.
+    """
+
+    # Larger bodies are compressed as a stream rather than read into memory
+    BUFFER_LIMIT = 1024 * 1024
+
+    def __init__(self, app, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+    def negotiate(self, accept_encoding):
+        """Pick the best encoding the client accepts, or None"""
+        if not accept_encoding:
+            return None
+        accept = parse_accept_header(accept_encoding)
+        for encoding in self.encodings:
+            if accept.quality(encoding) > 0:
+                return encoding
+        return None
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD':
+            return self.app(environ, start_response)
+
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            if exc_info is not None:
+                # Headers may already be out; let the server deal with it untouched
+                captured['passthrough'] = True
+                return start_response(status, headers, exc_info)
+            captured['status'] = status
+            captured['headers'] = headers
+            return self._unsupported_write
+
+        body = self.app(environ, capture_start_response)
+        if captured.get('passthrough'):
+            return body
+
+        status, headers = captured['status'], captured['headers']
+        if not self._compressible(status, headers):
+            start_response(status, headers)
+            return body
+
+        length = self._header(headers, 'Content-Length')
+        if length is not None and int(length) < self.min_size:
+            start_response(status, headers)
+            return body
+
+        if length is not None and int(length) <= self.BUFFER_LIMIT:
+            try:
+                data = b''.join(body)
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+            compressed = self._compress(encoding, data)
+            start_response(status, self._encoded_headers(headers, encoding, len(compressed)))
+            return [compressed]
+
+        start_response(status, self._encoded_headers(headers, encoding, None))
+        return self._compress_stream(encoding, body)
+
+    def _unsupported_write(self, data):
+        raise RuntimeError("write() is not supported behind CompressionMiddleware")
+
+    def _header(self, headers, name):
+        name = name.lower()
+        for key, value in headers:
+            if key.lower() == name:
+                return value
+        return None
+
+    def _compressible(self, status, headers):
+        if not status.startswith('200'):
+            return False
+        if self._header(headers, 'Content-Encoding'):
+            return False
+        if 'no-transform' in (self._header(headers, 'Cache-Control') or ''):
+            return False
+        content_type = (self._header(headers, 'Content-Type') or '').lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    def _encoded_headers(self, headers, encoding, length):
+        result = []
+        vary = None
+        for key, value in headers:
+            lower = key.lower()
+            if lower == 'content-length':
+                continue
+            if lower == 'etag' and not value.startswith('W/'):
+                # The encoded body differs byte for byte from the original
+                value = f"W/{value}"
+            if lower == 'vary':
+                vary = value
+                continue
+            result.append((key, value))
+
+        result.append(('Content-Encoding', encoding))
+        result.append(('Vary', f"{vary}, Accept-Encoding" if vary else 'Accept-Encoding'))
+        if length is not None:
+            result.append(('Content-Length', str(length)))
+        return result
+
+    def _compressor(self, encoding):
+        if encoding == 'br':
+            compressor = brotli.Compressor(quality=self.brotli_quality)
+            return compressor.process, compressor.flush, compressor.finish
+        compressor = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+    def _compress(self, encoding, data):
+        compress, _, finish = self._compressor(encoding)
+        return compress(data) + finish()
+
+    def _compress_stream(self, encoding, body):
+        compress, flush, finish = self._compressor(encoding)
+        try:
+            for chunk in body:
+                if chunk:
+                    yield compress(chunk) + flush()
+            yield finish()
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
@@ -1,7 +1,8 @@
-import requests
 import logging
-import re
 from urllib.parse import quote
+from api_modules.quota_manager import quota_manager
+from api_modules.upstream import upstream
+from api_modules.input_validator import EMAIL_PATTERN
 
 logger = logging.getLogger(__name__)
 
@@ -13,13 +14,13 @@ class EmailLookup:
         self.hibp_api_url = "https://haveibeenpwned.com/api/v3"
         self.hibp_api_key = None  # Add your HIBP API key here
         
-    def search(self, email):
-        """Perform email address lookup"""
+    def search(self, email, parsed=None):
+        """Perform email address lookup; `parsed` is the validated SearchQuery, when there is one"""
         results = []
         
         # Basic email validation
         try:
-            validation_result = self._validate_email(email)
+            validation_result = self._validate_email(email, parsed)
             results.append(validation_result)
         except Exception as e:
             logger.error(f"Email validation error: {str(e)}")
@@ -34,14 +35,7 @@ class EmailLookup:
                 logger.error(f"HIBP lookup error: {str(e)}")
         else:
             # Add a note about HIBP API requirement
-            results.append({
-                'platform': 'Have I Been Pwned',
-                'status': 'api_key_required',
-                'details': {
-                    'Note': 'HIBP API key required for breach checking',
-                    'Info': 'Sign up at https://haveibeenpwned.com/API/Key'
-                }
-            })
+            results.append(self._hibp_key_required())
         
         # Domain analysis
         try:
@@ -53,14 +47,16 @@ class EmailLookup:
         
         return results
     
-    def _validate_email(self, email):
-        """Basic email validation"""
-        email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        
-        is_valid = bool(re.match(email_regex, email))
-        
-        # Extract domain
-        domain = email.split('@')[1] if '@' in email else ''
+    def _validate_email(self, email, parsed=None):
+        """Basic email validation, skipped when InputValidator already parsed the address"""
+        if parsed is not None:
+            is_valid = True
+            domain = parsed.domain
+        else:
+            is_valid = bool(EMAIL_PATTERN.match(email))
+            
+            # Extract domain
+            domain = email.split('@')[1] if '@' in email else ''
         
         # Common email providers
         common_providers = {
@@ -95,55 +91,79 @@ class EmailLookup:
             return None
         
         try:
-            headers = {
-                'hibp-api-key': self.hibp_api_key,
-                'User-Agent': 'OSINT-Framework-Portal'
-            }
+            if not quota_manager.acquire('hibp', key=self.hibp_api_key):
+                return self._hibp_quota_exceeded()
             
             # Check for breaches
             breach_url = f"{self.hibp_api_url}/breachedaccount/{quote(email)}"
-            response = requests.get(breach_url, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                breaches = response.json()
-                
-                breach_info = {
-                    'Email Address': email,
-                    'Breaches Found': str(len(breaches)),
-                    'Status': 'Compromised' if breaches else 'Clean'
-                }
-                
-                if breaches:
-                    # Get latest breach
-                    latest_breach = max(breaches, key=lambda x: x.get('BreachDate', ''))
-                    breach_info['Latest Breach'] = latest_breach.get('Name', 'Unknown')
-                    breach_info['Breach Date'] = latest_breach.get('BreachDate', 'Unknown')
-                    breach_info['Compromised Data'] = ', '.join(latest_breach.get('DataClasses', []))
-                    
-                    # List all breaches
-                    all_breaches = [breach.get('Name', 'Unknown') for breach in breaches]
-                    breach_info['All Breaches'] = ', '.join(all_breaches[:5])  # Limit to first 5
-                
-                return {
-                    'platform': 'Have I Been Pwned',
-                    'status': 'compromised' if breaches else 'clean',
-                    'details': breach_info
-                }
-            
-            elif response.status_code == 404:
-                return {
-                    'platform': 'Have I Been Pwned',
-                    'status': 'clean',
-                    'details': {
-                        'Email Address': email,
-                        'Status': 'No breaches found',
-                        'Breaches Found': '0'
-                    }
-                }
+            response = upstream.get('hibp', breach_url, headers=self._hibp_headers())
+            return self._parse_hibp(email, response)
             
         except Exception as e:
             logger.error(f"HIBP request error: {str(e)}")
             return None
+    
+    def _hibp_headers(self):
+        return {
+            'hibp-api-key': self.hibp_api_key,
+            'User-Agent': 'OSINT-Framework-Portal'
+        }
+    
+    def _hibp_key_required(self):
+        return {
+            'platform': 'Have I Been Pwned',
+            'status': 'api_key_required',
+            'details': {
+                'Note': 'HIBP API key required for breach checking',
+                'Info': 'Sign up at https://haveibeenpwned.com/API/Key'
+            }
+        }
+    
+    def _hibp_quota_exceeded(self):
+        return {
+            'platform': 'Have I Been Pwned',
+            'status': 'quota_exceeded',
+            'details': {'Error': 'Provider request quota reached, try again later'}
+        }
+    
+    def _parse_hibp(self, email, response):
+        """Turn a breachedaccount response into a result"""
+        if response.status_code == 200:
+            breaches = response.json()
+            
+            breach_info = {
+                'Email Address': email,
+                'Breaches Found': str(len(breaches)),
+                'Status': 'Compromised' if breaches else 'Clean'
+            }
+            
+            if breaches:
+                # Get latest breach
+                latest_breach = max(breaches, key=lambda x: x.get('BreachDate', ''))
+                breach_info['Latest Breach'] = latest_breach.get('Name', 'Unknown')
+                breach_info['Breach Date'] = latest_breach.get('BreachDate', 'Unknown')
+                breach_info['Compromised Data'] = ', '.join(latest_breach.get('DataClasses', []))
+                
+                # List all breaches
+                all_breaches = [breach.get('Name', 'Unknown') for breach in breaches]
+                breach_info['All Breaches'] = ', '.join(all_breaches[:5])  # Limit to first 5
+            
+            return {
+                'platform': 'Have I Been Pwned',
+                'status': 'compromised' if breaches else 'clean',
+                'details': breach_info
+            }
+        
+        elif response.status_code == 404:
+            return {
+                'platform': 'Have I Been Pwned',
+                'status': 'clean',
+                'details': {
+                    'Email Address': email,
+                    'Status': 'No breaches found',
+                    'Breaches Found': '0'
+                }
+            }
         
         return None
     
@@ -157,24 +177,26 @@ class EmailLookup:
             
             # Try to get MX records to verify domain
             try:
-                import dns.resolver
-                mx_records = dns.resolver.resolve(domain, 'MX')
+                mx_records = upstream.resolve(domain, 'MX')
                 mx_exists = len(mx_records) > 0
             except:
                 mx_exists = False
             
-            domain_info = {
-                'Domain': domain,
-                'MX Records': 'Found' if mx_exists else 'Not Found',
-                'Mail Server Status': 'Active' if mx_exists else 'Inactive/Unknown'
-            }
-            
-            return {
-                'platform': 'Domain Analysis',
-                'status': 'found',
-                'details': domain_info
-            }
+            return self._domain_result(domain, mx_exists)
             
         except Exception as e:
             logger.error(f"Domain analysis error: {str(e)}")
-            return None
\ No newline at end of file
+            return None
+    
+    def _domain_result(self, domain, mx_exists):
+        domain_info = {
+            'Domain': domain,
+            'MX Records': 'Found' if mx_exists else 'Not Found',
+            'Mail Server Status': 'Active' if mx_exists else 'Inactive/Unknown'
+        }
+        
+        return {
+            'platform': 'Domain Analysis',
+            'status': 'found',
+            'details': domain_info
+        }
\ No newline at end of file
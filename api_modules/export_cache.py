@@ -0,0 +1,158 @@
+import os
+import json
+import uuid
+import hashlib
+import logging
+import threading
+from api_modules import tracing
+from api_modules.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# Bump when a renderer change should invalidate previously cached exports
+CACHE_VERSION = 1
+
+class ExportCache:
+    """Disk cache of rendered exports, keyed by a hash of what was exported
+
+    The key is a SHA-256 of the format plus the canonical JSON of the query
+    and results, so exporting the same result set again (from the posted
+    results or from a stored search) finds the earlier file and skips
+    rendering. Files live in one directory shared by every worker on the
+    host. A hit refreshes the file's mtime, and once the directory grows
+    past `max_bytes` the least recently used files are deleted. A
+    `max_bytes` of 0 disables the cache.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def key(self, fmt, results, query=""):
+        """Content hash identifying an export; also used as its ETag"""
+        canonical = json.dumps(
+            {'version': CACHE_VERSION, 'format': fmt, 'query': query or '', 'results': results},
+            sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def _path(self, key, fmt):
+        return os.path.join(self.directory, f"{key}.{fmt}")
+
+    def get(self, key, fmt):
+        """Path of the cached export, or None"""
+        if not self.enabled:
+            return None
+
+        path = self._path(key, fmt)
+        with tracing.span('cache:export', format=fmt) as span:
+            try:
+                # Touch on use so eviction drops the least recently used files
+                os.utime(path)
+                hit = True
+            except OSError:
+                hit = False
+
+            record_cache('export', hit)
+            if span is not None:
+                span.set('hit', hit)
+
+        return path if hit else None
+
+    def put_file(self, key, fmt, source_path):
+        """Copy a finished export into the cache; returns the path to serve"""
+        if not self.enabled:
+            return source_path
+
+        path = self._path(key, fmt)
+        tmp_path = self._tmp_path(path)
+        try:
+            with open(source_path, 'rb') as source, open(tmp_path, 'wb') as target:
+                while True:
+                    chunk = source.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    target.write(chunk)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Export cache write error: {str(e)}")
+            self._discard(tmp_path)
+            return source_path
+
+        self.evict()
+        return path
+
+    def tee(self, key, fmt, chunks):
+        """Pass streamed chunks through while writing them to the cache
+
+        The file only enters the cache once the stream has been produced in
+        full; a failed or abandoned stream leaves nothing behind.
+        """
+        if not self.enabled:
+            yield from chunks
+            return
+
+        path = self._path(key, fmt)
+        tmp_path = self._tmp_path(path)
+        try:
+            handle = open(tmp_path, 'wb')
+        except OSError as e:
+            logger.error(f"Export cache write error: {str(e)}")
+            yield from chunks
+            return
+
+        complete = False
+        try:
+            for chunk in chunks:
+                handle.write(chunk)
+                yield chunk
+            complete = True
+        finally:
+            handle.close()
+            if complete:
+                os.replace(tmp_path, path)
+            else:
+                self._discard(tmp_path)
+
+        self.evict()
+
+    def _tmp_path(self, path):
+        os.makedirs(self.directory, exist_ok=True)
+        return f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+
+    def _discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Delete least recently used files until the cache fits in max_bytes"""
+        with self.lock:
+            try:
+                entries = []
+                for entry in os.scandir(self.directory):
+                    if entry.is_file() and not entry.name.endswith('.tmp'):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+            except OSError as e:
+                logger.error(f"Export cache scan error: {str(e)}")
+                return
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._discard(path)
+                total -= size
+
+# Global export cache instance
+export_cache = ExportCache(
+    os.environ.get('EXPORT_CACHE_DIR', os.path.join('exports', 'cache')),
+    max_bytes=int(float(os.environ.get('EXPORT_CACHE_MAX_MB', 256)) * 1024 * 1024)
+)
@@ -1,199 +1,387 @@
 import io
 import csv
+import json
 import logging
+import zipfile
 from datetime import datetime
+from functools import lru_cache
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from api_modules import tracing
 
 logger = logging.getLogger(__name__)
 
-class ExportHandler:
-    """Handle PDF and CSV export functionality"""
+# Page template shared by every PDF report
+PAGE_TEMPLATE = {
+    'pagesize': A4,
+    'rightMargin': 72,
+    'leftMargin': 72,
+    'topMargin': 72,
+    'bottomMargin': 18
+}
+
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    """Paragraph and table styles, built once per process on first use"""
+    styles = getSampleStyleSheet()
     
-    def __init__(self):
-        self.name = "Export Handler"
+    return {
+        'sheet': styles,
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#2c3e50')
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=12,
+            textColor=colors.HexColor('#34495e')
+        ),
+        'info_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ecf0f1')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        'detail_table': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#bdc3c7')),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]),
+        'flat_table': TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#bdc3c7')),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 8),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+            ('TOPPADDING', (0, 0), (-1, -1), 3),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey)
+        ])
+    }
+
+@lru_cache(maxsize=4096)
+def _char_width(char):
+    """Width of one character in the flat table font"""
+    return stringWidth(char, 'Helvetica', 8)
+
+# No glyph is wider than the font size, so strings this short never need wrapping
+_MAX_CHAR_WIDTH = 8
+
+class PDFReportRenderer:
+    """Lay out search results as a PDF report
     
-    def generate_pdf(self, results_data, query=""):
-        """Generate PDF report from search results"""
-        try:
-            buffer = io.BytesIO()
-            
-            # Create the PDF document
-            doc = SimpleDocTemplate(
-                buffer,
-                pagesize=A4,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=18
-            )
-            
-            # Get styles
-            styles = getSampleStyleSheet()
-            
-            # Custom styles
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                textColor=colors.HexColor('#2c3e50')
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=14,
-                spaceAfter=12,
-                textColor=colors.HexColor('#34495e')
-            )
-            
-            # Build the document content
-            story = []
-            
-            # Title
-            story.append(Paragraph("OSINT Framework Portal Report", title_style))
+    Small reports keep the sectioned layout (a heading and a details table
+    per result). Above `flat_threshold` results everything goes into one
+    table with a repeating header row; a single flowable splits across pages
+    far faster than thousands of small tables do.
+    """
+    
+    FLAT_HEADER = ['#', 'Platform', 'Status', 'Field', 'Value']
+    FLAT_COLUMN_WIDTHS = [0.4*inch, 1.2*inch, 0.8*inch, 1.3*inch, 2.5*inch]
+    # Usable width of the Value column once cell padding is taken off
+    FLAT_VALUE_WIDTH = 2.5*inch - 12
+    FLAT_ROWS_PER_TABLE = 50
+    
+    def __init__(self, flat_threshold=200):
+        self.flat_threshold = flat_threshold
+    
+    def render(self, results_data, query="", buffer=None, layout='auto'):
+        """Render a report into buffer (a new BytesIO by default) and return it"""
+        buffer = buffer if buffer is not None else io.BytesIO()
+        styles = _pdf_styles()
+        
+        doc = SimpleDocTemplate(buffer, **PAGE_TEMPLATE)
+        
+        story = self._header(styles, results_data, query)
+        
+        if layout == 'auto':
+            layout = self._layout_for(results_data)
+        story.extend(self._results(styles, results_data, layout))
+        
+        self._footer(styles, story)
+        
+        # Build PDF
+        with tracing.span('pdf:build', flowables=len(story), layout=layout):
+            doc.build(story)
+        
+        buffer.seek(0)
+        return buffer
+    
+    def render_combined(self, searches, buffer=None, layout='auto'):
+        """Render several stored searches into one report
+        
+        Each search is a dict with search_type, query and results (as kept
+        by the search store). A summary table lists them all, then every
+        search starts on a new page with its own info table and results.
+        """
+        buffer = buffer if buffer is not None else io.BytesIO()
+        styles = _pdf_styles()
+        
+        doc = SimpleDocTemplate(buffer, **PAGE_TEMPLATE)
+        
+        story = [
+            Paragraph("OSINT Framework Portal Combined Report", styles['title']),
+            Spacer(1, 12)
+        ]
+        
+        summary = [['#', 'Type', 'Query', 'Results']]
+        for i, search in enumerate(searches, 1):
+            summary.append([
+                str(i),
+                str(search.get('search_type', '')),
+                self._wrap(str(search.get('query', ''))),
+                str(len(search.get('results', [])))
+            ])
+        summary_table = Table(summary, colWidths=self.FLAT_COLUMN_WIDTHS[:2] + [3.8*inch, 0.8*inch], repeatRows=1)
+        summary_table.setStyle(styles['flat_table'])
+        story.append(Paragraph(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['sheet']['Normal']))
+        story.append(Spacer(1, 12))
+        story.append(summary_table)
+        
+        for i, search in enumerate(searches, 1):
+            results_data = search.get('results', [])
+            story.append(PageBreak())
+            story.append(Paragraph(f"Search {i}: {search.get('search_type', '')}", styles['heading']))
+            story.append(Spacer(1, 6))
+            story.extend(self._header(styles, results_data, search.get('query', ''), title=None))
+            story.extend(self._results(
+                styles, results_data,
+                self._layout_for(results_data) if layout == 'auto' else layout
+            ))
+        
+        self._footer(styles, story)
+        
+        with tracing.span('pdf:build', flowables=len(story), searches=len(searches)):
+            doc.build(story)
+        
+        buffer.seek(0)
+        return buffer
+    
+    def _layout_for(self, results_data):
+        return 'flat' if len(results_data) > self.flat_threshold else 'sectioned'
+    
+    def _results(self, styles, results_data, layout):
+        if layout == 'flat':
+            return self._flat_table(styles, results_data)
+        return self._sections(styles, results_data)
+    
+    def _footer(self, styles, story):
+        story.append(Spacer(1, 30))
+        footer_text = "Generated by OSINT Framework Portal - For authorized use only"
+        story.append(Paragraph(footer_text, styles['sheet']['Normal']))
+    
+    def _header(self, styles, results_data, query, title="OSINT Framework Portal Report"):
+        story = []
+        
+        # Title
+        if title:
+            story.append(Paragraph(title, styles['title']))
             story.append(Spacer(1, 12))
+        
+        # Report info
+        report_info = [
+            ["Report Generated:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+            ["Search Query:", query or "N/A"],
+            ["Total Results:", str(len(results_data))]
+        ]
+        
+        info_table = Table(report_info, colWidths=[2*inch, 4*inch])
+        info_table.setStyle(styles['info_table'])
+        
+        story.append(info_table)
+        story.append(Spacer(1, 20))
+        
+        # Results
+        story.append(Paragraph("Search Results", styles['heading']))
+        story.append(Spacer(1, 12))
+        
+        return story
+    
+    def _sections(self, styles, results_data):
+        """One heading and details table per result"""
+        story = []
+        
+        for i, result in enumerate(results_data, 1):
+            # Result header
+            platform = result.get('platform', 'Unknown')
+            status = result.get('status', 'unknown')
             
-            # Report info
-            report_info = [
-                ["Report Generated:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-                ["Search Query:", query or "N/A"],
-                ["Total Results:", str(len(results_data))]
-            ]
-            
-            info_table = Table(report_info, colWidths=[2*inch, 4*inch])
-            info_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#ecf0f1')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            
-            story.append(info_table)
-            story.append(Spacer(1, 20))
-            
-            # Results
-            story.append(Paragraph("Search Results", heading_style))
-            story.append(Spacer(1, 12))
+            result_title = f"{i}. {platform} - {status.title()}"
+            story.append(Paragraph(result_title, styles['sheet']['Heading3']))
+            story.append(Spacer(1, 6))
             
-            for i, result in enumerate(results_data, 1):
-                # Result header
-                platform = result.get('platform', 'Unknown')
-                status = result.get('status', 'unknown')
-                
-                result_title = f"{i}. {platform} - {status.title()}"
-                story.append(Paragraph(result_title, styles['Heading3']))
-                story.append(Spacer(1, 6))
-                
-                # Result details
-                details = result.get('details', {})
-                if details:
-                    detail_data = []
-                    for key, value in details.items():
-                        detail_data.append([str(key), str(value)])
-                    
-                    if detail_data:
-                        detail_table = Table(detail_data, colWidths=[2*inch, 4*inch])
-                        detail_table.setStyle(TableStyle([
-                            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#bdc3c7')),
-                            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                            ('FONTSIZE', (0, 0), (-1, -1), 9),
-                            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-                        ]))
-                        
-                        story.append(detail_table)
+            # Result details
+            details = result.get('details', {})
+            if details:
+                detail_data = [[str(key), str(value)] for key, value in details.items()]
                 
-                story.append(Spacer(1, 15))
+                detail_table = Table(detail_data, colWidths=[2*inch, 4*inch])
+                detail_table.setStyle(styles['detail_table'])
+                story.append(detail_table)
             
-            # Footer
-            story.append(Spacer(1, 30))
-            footer_text = "Generated by OSINT Framework Portal - For authorized use only"
-            story.append(Paragraph(footer_text, styles['Normal']))
-            
-            # Build PDF
-            doc.build(story)
+            story.append(Spacer(1, 15))
+        
+        return story
+    
+    def _flat_table(self, styles, results_data):
+        """Every result field as a row of one logical table
+        
+        The rows are emitted as consecutive tables of FLAT_ROWS_PER_TABLE
+        rows sharing one style, because ReportLab re-measures all remaining
+        rows each time a table splits across a page.
+        """
+        rows = []
+        
+        for i, result in enumerate(results_data, 1):
+            platform = str(result.get('platform', 'Unknown'))
+            status = str(result.get('status', 'unknown'))
+            details = result.get('details', {}) or {'Status': status}
             
-            buffer.seek(0)
-            return buffer
+            first = True
+            for key, value in details.items():
+                value = self._wrap(str(value))
+                
+                # Only the first row of each result repeats its number, platform and status
+                if first:
+                    rows.append([str(i), platform, status, str(key), value])
+                    first = False
+                else:
+                    rows.append(['', '', '', str(key), value])
+        
+        tables = []
+        for start in range(0, max(len(rows), 1), self.FLAT_ROWS_PER_TABLE):
+            chunk = [self.FLAT_HEADER] + rows[start:start + self.FLAT_ROWS_PER_TABLE]
+            table = Table(chunk, colWidths=self.FLAT_COLUMN_WIDTHS, repeatRows=1)
+            table.setStyle(styles['flat_table'])
+            tables.append(table)
+        return tables
+    
+    def _wrap(self, value):
+        """Hard-wrap a value to the Value column using font metrics
+        
+        Plain multi-line strings are much cheaper for ReportLab to lay out
+        than Paragraph cells, and URLs need breaking mid-word anyway.
+        """
+        width = self.FLAT_VALUE_WIDTH
+        if len(value) * _MAX_CHAR_WIDTH <= width:
+            return value
+        
+        lines = []
+        start = 0
+        line_width = 0.0
+        for index, char in enumerate(value):
+            char_width = _char_width(char)
+            if line_width + char_width > width and index > start:
+                lines.append(value[start:index])
+                start = index
+                line_width = 0.0
+            line_width += char_width
+        lines.append(value[start:])
+        return '\n'.join(lines)
+
+class ExportHandler:
+    """Handle PDF and CSV export functionality"""
+    
+    def __init__(self):
+        self.name = "Export Handler"
+        self.pdf_renderer = PDFReportRenderer()
+    
+    @tracing.traced('export:pdf')
+    def generate_pdf(self, results_data, query="", layout='auto'):
+        """Generate PDF report from search results"""
+        try:
+            return self.pdf_renderer.render(results_data, query, layout=layout)
             
         except Exception as e:
             logger.error(f"PDF generation error: {str(e)}")
             raise
     
-    def generate_csv(self, results_data, query=""):
-        """Generate CSV export from search results"""
+    @tracing.traced('export:combined_pdf')
+    def generate_combined_pdf(self, searches, layout='auto'):
+        """Generate one PDF report covering several stored searches"""
         try:
+            return self.pdf_renderer.render_combined(searches, layout=layout)
+            
+        except Exception as e:
+            logger.error(f"Combined PDF generation error: {str(e)}")
+            raise
+    
+    CSV_HEADERS = ['Platform', 'Status', 'Field', 'Value', 'Query', 'Timestamp']
+    
+    def iter_csv_rows(self, results_data, query=""):
+        """Yield CSV rows (header first) one result field at a time"""
+        yield self.CSV_HEADERS
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        for result in results_data:
+            platform = result.get('platform', 'Unknown')
+            status = result.get('status', 'unknown')
+            details = result.get('details', {})
+            
+            if details:
+                for key, value in details.items():
+                    yield [platform, status, str(key), str(value), query, timestamp]
+            else:
+                # Write row even if no details
+                yield [platform, status, 'Status', status, query, timestamp]
+    
+    def iter_csv(self, results_data, query="", chunk_size=16384):
+        """Stream a CSV export as UTF-8 chunks of roughly chunk_size bytes
+        
+        Rows are written into a small reusable buffer that is encoded and
+        emptied whenever it fills, so memory stays flat however many results
+        there are and the first bytes can go out immediately.
+        """
+        with tracing.span('export:csv'):
             buffer = io.StringIO()
             writer = csv.writer(buffer)
             
-            # Write headers
-            writer.writerow([
-                'Platform',
-                'Status',
-                'Field',
-                'Value',
-                'Query',
-                'Timestamp'
-            ])
+            for row in self.iter_csv_rows(results_data, query):
+                writer.writerow(row)
+                
+                if buffer.tell() >= chunk_size:
+                    yield buffer.getvalue().encode('utf-8')
+                    buffer.seek(0)
+                    buffer.truncate()
             
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            if buffer.tell():
+                yield buffer.getvalue().encode('utf-8')
+    
+    def generate_csv(self, results_data, query=""):
+        """Generate CSV export from search results"""
+        try:
+            bytes_buffer = io.BytesIO()
+            for chunk in self.iter_csv(results_data, query):
+                bytes_buffer.write(chunk)
             
-            # Write data
-            for result in results_data:
-                platform = result.get('platform', 'Unknown')
-                status = result.get('status', 'unknown')
-                details = result.get('details', {})
-                
-                if details:
-                    for key, value in details.items():
-                        writer.writerow([
-                            platform,
-                            status,
-                            str(key),
-                            str(value),
-                            query,
-                            timestamp
-                        ])
-                else:
-                    # Write row even if no details
-                    writer.writerow([
-                        platform,
-                        status,
-                        'Status',
-                        status,
-                        query,
-                        timestamp
-                    ])
-            
-            # Convert to bytes buffer
-            csv_content = buffer.getvalue()
-            buffer.close()
-            
-            bytes_buffer = io.BytesIO(csv_content.encode('utf-8'))
             bytes_buffer.seek(0)
-            
             return bytes_buffer
             
         except Exception as e:
             logger.error(f"CSV generation error: {str(e)}")
             raise
     
-    def flatten_results_for_export(self, results_data):
-        """Flatten nested results data for easier export"""
-        flattened = []
-        
+    def iter_export_records(self, results_data):
+        """Yield one flat record per result (platform, status, detail_* fields)"""
         for result in results_data:
             platform = result.get('platform', 'Unknown')
             status = result.get('status', 'unknown')
@@ -208,6 +396,185 @@ class ExportHandler:
             for key, value in details.items():
                 base_row[f"detail_{key.lower().replace(' ', '_')}"] = str(value)
             
-            flattened.append(base_row)
+            yield base_row
+    
+    def flatten_results_for_export(self, results_data):
+        """Flatten nested results data for easier export"""
+        return list(self.iter_export_records(results_data))
+    
+    def iter_ndjson(self, results_data, query="", chunk_size=16384):
+        """Stream one JSON object per result, newline-delimited, as UTF-8 chunks"""
+        with tracing.span('export:ndjson'):
+            lines = []
+            size = 0
+            
+            for index, record in enumerate(self.iter_export_records(results_data), 1):
+                line = json.dumps({'index': index, 'query': query, **record}, ensure_ascii=False) + '\n'
+                lines.append(line)
+                size += len(line)
+                
+                if size >= chunk_size:
+                    yield ''.join(lines).encode('utf-8')
+                    lines = []
+                    size = 0
+            
+            if lines:
+                yield ''.join(lines).encode('utf-8')
+    
+    COLUMNAR_FORMATS = ('parquet', 'arrow')
+    COLUMNAR_BATCH_ROWS = 50000
+    
+    def iter_columnar(self, results_data, query="", fmt='parquet'):
+        """Stream results as Parquet or an Arrow IPC stream
+        
+        One row per result field with typed columns. The platform, status
+        and field columns are dictionary-encoded, and the query and
+        generation time are stored once in the schema metadata instead of on
+        every row. Rows are written in batches of COLUMNAR_BATCH_ROWS, and
+        each batch's bytes are yielded as soon as they are encoded.
+        Requires pyarrow.
+        """
+        pa, pq = _load_pyarrow()
         
-        return flattened
\ No newline at end of file
+        with tracing.span(f"export:{fmt}"):
+            schema = pa.schema(
+                [
+                    ('result_index', pa.int32()),
+                    ('platform', pa.dictionary(pa.int32(), pa.string())),
+                    ('status', pa.dictionary(pa.int32(), pa.string())),
+                    ('field', pa.dictionary(pa.int32(), pa.string())),
+                    ('value', pa.string())
+                ],
+                metadata={
+                    'query': query or '',
+                    'generated_at': datetime.now().isoformat(),
+                    'source': 'OSINT Framework Portal'
+                }
+            )
+            
+            sink = _StreamSink()
+            if fmt == 'parquet':
+                writer = pq.ParquetWriter(sink, schema, compression='zstd')
+            else:
+                writer = pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression='zstd'))
+            
+            columns = ([], [], [], [], [])
+            
+            def flush():
+                arrays = [
+                    pa.array(columns[0], type=pa.int32()),
+                    pa.array(columns[1], type=pa.string()).dictionary_encode(),
+                    pa.array(columns[2], type=pa.string()).dictionary_encode(),
+                    pa.array(columns[3], type=pa.string()).dictionary_encode(),
+                    pa.array(columns[4], type=pa.string())
+                ]
+                writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+                for column in columns:
+                    column.clear()
+            
+            for index, result in enumerate(results_data, 1):
+                platform = str(result.get('platform', 'Unknown'))
+                status = str(result.get('status', 'unknown'))
+                details = result.get('details', {}) or {'Status': status}
+                
+                for key, value in details.items():
+                    columns[0].append(index)
+                    columns[1].append(platform)
+                    columns[2].append(status)
+                    columns[3].append(str(key))
+                    columns[4].append(str(value))
+                
+                if len(columns[0]) >= self.COLUMNAR_BATCH_ROWS:
+                    flush()
+                    yield sink.drain()
+            
+            if columns[0]:
+                flush()
+            writer.close()
+            yield sink.drain()
+
+    def iter_zip(self, entries):
+        """Stream a zip archive built from (name, chunks, compress) entries
+        
+        Each entry's chunks are written into the archive as they arrive and
+        the compressed bytes are yielded straight away, so only the entry
+        currently being written is ever held in memory. The output is not
+        seekable, so sizes and checksums go in data descriptors after each
+        entry, which every common unzip tool reads. `chunks` may also be a
+        callable returning the iterable, to defer work (such as waiting for
+        a PDF render) until the archive reaches that entry.
+        """
+        with tracing.span('export:zip') as span:
+            sink = _StreamSink()
+            count = 0
+            
+            with zipfile.ZipFile(sink, mode='w', allowZip64=True) as archive:
+                for name, chunks, compress in entries:
+                    if callable(chunks):
+                        chunks = chunks()
+                    info = zipfile.ZipInfo(name, date_time=datetime.now().timetuple()[:6])
+                    info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+                    info.external_attr = 0o644 << 16
+                    
+                    # force_zip64 because the entry size is not known up front
+                    with archive.open(info, mode='w', force_zip64=True) as handle:
+                        for chunk in chunks:
+                            handle.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+                    count += 1
+            
+            if span is not None:
+                span.set('entries', count)
+            # Remaining compressed data, data descriptors and the central directory
+            yield sink.drain()
+
+class ColumnarExportUnavailable(Exception):
+    """Raised when a columnar format is requested but pyarrow is not installed"""
+
+def _load_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow, pyarrow.parquet
+    except ImportError:
+        raise ColumnarExportUnavailable("Parquet and Arrow exports require the pyarrow package")
+
+class _StreamSink:
+    """Write-only file object whose bytes are collected and drained in pieces
+    
+    Writers such as ParquetWriter record absolute offsets, so tell() keeps
+    counting across drains even though the drained bytes are released.
+    """
+    
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+        self.closed = False
+    
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+    
+    def tell(self):
+        return self.position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def writable(self):
+        return True
+    
+    def seekable(self):
+        return False
+    
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from api_modules import tracing
+
+logger = logging.getLogger(__name__)
+
+JOB_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+def _write_json(path, data):
+    """Write a small JSON file atomically so readers never see half of it"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as handle:
+        json.dump(data, handle)
+    os.replace(tmp_path, path)
+
+def _render_pdf_job(directory, job_id, results, query, searches=None):
+    """Runs in a pool process: render the PDF to disk and mark the job done
+
+    With `searches` (a list of stored searches) a combined report is
+    rendered instead of a single-search one.
+    """
+    from api_modules.export_handler import ExportHandler
+
+    meta_path = os.path.join(directory, f"{job_id}.json")
+    pdf_path = os.path.join(directory, f"{job_id}.pdf")
+    started = time.time()
+
+    try:
+        handler = ExportHandler()
+        if searches is not None:
+            buffer = handler.generate_combined_pdf(searches)
+        else:
+            buffer = handler.generate_pdf(results, query)
+        tmp_path = f"{pdf_path}.tmp"
+        with open(tmp_path, 'wb') as handle:
+            handle.write(buffer.getbuffer())
+        os.replace(tmp_path, pdf_path)
+
+        _write_json(meta_path, {
+            'job_id': job_id,
+            'format': 'pdf',
+            'status': 'done',
+            'created': started,
+            'finished': time.time(),
+            'render_seconds': round(time.time() - started, 3),
+            'size': os.path.getsize(pdf_path)
+        })
+        return pdf_path
+    except Exception as e:
+        _write_json(meta_path, {
+            'job_id': job_id,
+            'format': 'pdf',
+            'status': 'failed',
+            'created': started,
+            'finished': time.time(),
+            'error': str(e)
+        })
+        raise
+
+class ExportJobManager:
+    """Render PDF exports in a dedicated process pool
+
+    ReportLab layout is CPU-bound and holds the GIL, so rendering on the
+    request thread stalls every other request in the worker. Jobs run in
+    separate processes instead; their status and the finished file live on
+    disk, so any worker can answer a poll and repeat downloads are served
+    from the file without rendering again.
+
+    A pool process that dies (killed, out of memory) breaks the whole pool.
+    The broken pool is then shut down and replaced, and each job it held is
+    run once more on the new one.
+    """
+
+    PURGE_INTERVAL = 600
+
+    def __init__(self, directory, max_workers=2, ttl=24 * 3600):
+        self.directory = directory
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.last_purge = 0
+        self.executor = None
+        self.executor_pid = None
+        self.lock = threading.Lock()
+
+    def _executor(self):
+        # Each worker process needs its own pool (e.g. after a gunicorn fork)
+        with self.lock:
+            if self.executor is None or self.executor_pid != os.getpid():
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self.executor_pid = os.getpid()
+            return self.executor
+
+    def _discard(self, executor):
+        """Shut down a broken pool so the next job starts a new one"""
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, args, retries=1):
+        """Render in the pool, settling `job` with the outcome
+
+        On a broken pool, at submit or while rendering, the job is retried
+        `retries` more times on a new pool.
+        """
+        executor = self._executor()
+        try:
+            future = executor.submit(_render_pdf_job, *args)
+        except BrokenProcessPool:
+            self._discard(executor)
+            if not retries:
+                raise
+            return self._run(job, args, retries - 1)
+        future.add_done_callback(lambda f: self._settle(job, executor, f, args, retries))
+
+    def _settle(self, job, executor, future, args, retries):
+        if future.cancelled():
+            # Cancelled when its broken pool was shut down
+            error = BrokenProcessPool("export pool was shut down")
+        else:
+            error = future.exception()
+        if isinstance(error, BrokenProcessPool):
+            self._discard(executor)
+            if retries:
+                logger.error(f"Export pool broke while rendering job {args[1]}, retrying on a new pool")
+                try:
+                    self._run(job, args, retries - 1)
+                    return
+                except Exception as e:
+                    error = e
+            # The pool process died before it could record the failure
+            self._mark_failed(args[1], error)
+        if error is not None:
+            job.set_exception(error)
+        else:
+            job.set_result(future.result())
+
+    def _mark_failed(self, job_id, error):
+        status = self.status(job_id)
+        if status and status['status'] == 'pending':
+            _write_json(self._path(job_id, 'json'), {
+                **status,
+                'status': 'failed',
+                'finished': time.time(),
+                'error': str(error)
+            })
+
+    def _path(self, job_id, extension):
+        return os.path.join(self.directory, f"{job_id}.{extension}")
+
+    def submit(self, results, query="", searches=None):
+        """Queue a PDF render; returns (job ID, future)
+
+        Pass `searches` instead of results to render a combined report.
+        """
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.directory, exist_ok=True)
+
+        _write_json(self._path(job_id, 'json'), {
+            'job_id': job_id,
+            'format': 'pdf',
+            'status': 'pending',
+            'created': time.time()
+        })
+
+        future = Future()
+        with tracing.span('export:job_submit', job_id=job_id):
+            try:
+                self._run(future, (self.directory, job_id, results, query, searches))
+            except Exception as e:
+                self._mark_failed(job_id, e)
+                raise
+        future.add_done_callback(lambda f: self._log_failure(job_id, f))
+
+        self.purge_expired()
+        return job_id, future
+
+    def _log_failure(self, job_id, future):
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Export job {job_id} failed: {str(error)}")
+
+    def render(self, results, query="", timeout=120):
+        """Render in the pool and wait; the calling thread releases the GIL meanwhile"""
+        job_id, future = self.submit(results, query)
+        with tracing.span('export:job_wait', job_id=job_id):
+            return future.result(timeout=timeout)
+
+    def status(self, job_id):
+        """Job metadata, or None for unknown IDs"""
+        if not JOB_ID_PATTERN.match(job_id or ''):
+            return None
+        try:
+            with open(self._path(job_id, 'json'), encoding='utf-8') as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return None
+
+    def wait(self, job_id, timeout):
+        """Poll the job's status file until it finishes or timeout passes"""
+        deadline = time.time() + timeout
+        status = self.status(job_id)
+        while status and status['status'] == 'pending' and time.time() < deadline:
+            time.sleep(0.1)
+            status = self.status(job_id)
+        return status
+
+    def file_path(self, job_id):
+        """Path of a finished job's file, or None"""
+        status = self.status(job_id)
+        if not status or status['status'] != 'done':
+            return None
+        return self._path(job_id, status['format'])
+
+    def purge_expired(self):
+        """Delete job files older than the TTL (at most every PURGE_INTERVAL seconds)"""
+        now = time.time()
+        if now - self.last_purge < self.PURGE_INTERVAL:
+            return
+        self.last_purge = now
+
+        cutoff = now - self.ttl
+        try:
+            for name in os.listdir(self.directory):
+                path = os.path.join(self.directory, name)
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+        except OSError as e:
+            logger.error(f"Export job cleanup error: {str(e)}")
+
+# Global export job manager instance
+export_jobs = ExportJobManager(
+    os.environ.get('EXPORT_JOB_DIR', os.path.join('exports', 'jobs')),
+    max_workers=int(os.environ.get('EXPORT_PROCESSES', 2)),
+    ttl=int(os.environ.get('EXPORT_JOB_TTL', 24 * 3600))
+)
@@ -0,0 +1,44 @@
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+class IndicatorMatcher:
+    """Finds which of a fixed set of indicator strings occur in page bytes
+
+    Built once per set of indicators and shared by every scan. Each
+    indicator maps to a label (such as 'found' or 'not_found') and
+    labels_in() returns the labels of the indicators present in lowercased
+    bytes. With pyahocorasick installed the indicators are compiled into a
+    single Aho-Corasick automaton, so a page is scanned once however many
+    indicators there are. Without it each indicator is searched for in turn
+    with the C substring search, which is quick for a handful of indicators
+    but grows with their number.
+
+    Callers scanning a stream chunk by chunk carry the last `overlap` bytes
+    of one chunk over to the next, so indicators split across chunks are
+    still found.
+    """
+
+    def __init__(self, indicators):
+        """indicators: {indicator text: label}"""
+        self.indicators = {text.lower().encode('utf-8'): label for text, label in indicators.items()}
+        self.overlap = max((len(indicator) for indicator in self.indicators), default=1) - 1
+        self.automaton = None
+
+        if ahocorasick is not None and self.indicators:
+            self.automaton = ahocorasick.Automaton()
+            for indicator, label in self.indicators.items():
+                # latin-1 maps each byte to one code point, so the automaton matches bytes
+                self.automaton.add_word(indicator.decode('latin-1'), label)
+            self.automaton.make_automaton()
+
+    @property
+    def compiled(self):
+        return self.automaton is not None
+
+    def labels_in(self, data):
+        """Labels of the indicators occurring in `data` (lowercased bytes)"""
+        if self.automaton is not None:
+            return {label for _, label in self.automaton.iter(data.decode('latin-1'))}
+        return {label for indicator, label in self.indicators.items() if indicator in data}
@@ -2,6 +2,137 @@ import re
 import ipaddress
 from urllib.parse import urlparse
 
+# Patterns are compiled once at import instead of on every request
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+DOMAIN_PATTERN = re.compile(r'^[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$')
+USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_-]+$')
+NAME_PATTERN = re.compile(r"^[a-zA-Z\s'-]+$")
+PHONE_NOISE_PATTERN = re.compile(r'[^\d+]')
+
+# Potentially dangerous characters, removed in a single str.translate pass.
+# A list indexed by code point translates much faster than the dict
+# str.maketrans builds; characters past its end are left as they are.
+DANGEROUS_CHARS = [None if chr(code) in '<>"\'&\x00' else chr(code) for code in range(128)]
+
+class SearchQuery:
+    """A validated search query
+
+    `value` is the sanitized query the lookups are given and the search
+    store keeps. `normalized` is its canonical form: lowercased email
+    domain, bare lowercased host, compressed IP address, phone digits,
+    username without @, name with single spaces. `domain` is the host of
+    email and domain searches and `ip` the parsed address of IP searches,
+    so lookups need not parse the query again.
+    """
+
+    __slots__ = ('search_type', 'value', 'normalized', 'domain', 'ip')
+
+    def __init__(self, search_type, value, normalized, domain=None, ip=None):
+        self.search_type = search_type
+        self.value = value
+        self.normalized = normalized
+        self.domain = domain
+        self.ip = ip
+
+    def __repr__(self):
+        return f"<SearchQuery {self.search_type} {self.normalized!r}>"
+
+def _bare_domain(domain):
+    """Host part of a domain query, without protocol or leading www."""
+    if domain.startswith(('http://', 'https://')):
+        domain = urlparse(domain).netloc
+    if domain.startswith('www.'):
+        domain = domain[4:]
+    return domain
+
+def _parse_email(value):
+    if len(value) > 254 or not EMAIL_PATTERN.match(value):
+        return None
+    local, domain = value.split('@')
+    domain = domain.lower()
+    return SearchQuery('email', value, f"{local}@{domain}", domain=domain)
+
+def _parse_phone(value):
+    cleaned = PHONE_NOISE_PATTERN.sub('', value)
+    digits = cleaned[1:] if cleaned.startswith('+') else cleaned
+    if not (digits.isdigit() and 7 <= len(digits) <= 15):
+        return None
+    return SearchQuery('phone', value, cleaned)
+
+def _parse_ip(value):
+    try:
+        ip = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    return SearchQuery('ip', value, str(ip), ip=ip)
+
+def _parse_domain(value):
+    if len(value) > 253:
+        return None
+    domain = _bare_domain(value)
+    if not DOMAIN_PATTERN.match(domain):
+        return None
+    domain = domain.lower()
+    return SearchQuery('domain', value, domain, domain=domain)
+
+def _parse_username(value):
+    username = value[1:] if value.startswith('@') else value
+    if not username or len(username) > 50 or not USERNAME_PATTERN.match(username):
+        return None
+    return SearchQuery('username', value, username)
+
+def _parse_name(value):
+    if len(value) > 100 or not NAME_PATTERN.match(value.strip()):
+        return None
+    return SearchQuery('name', value, ' '.join(value.split()))
+
+# Everything a phone number is written with
+PHONE_CHARS = '0123456789+-(). '
+
+def _parse_auto(value):
+    """Parse a query of unknown type as the one type its characters point to
+    
+    A few character tests pick the candidate before any pattern or parser
+    runs: an @ means an email address (or an @handle), a scheme a URL, a
+    colon an IPv6 address, digits and three dots an IPv4 address, phone
+    characters only a phone number, a space a name, a dot a domain and
+    anything else a username. Handles can look like the first three
+    (1337, 12345), so a query that fails as an IPv4 address, phone number
+    or domain is tried as a username before it is rejected.
+    """
+    first = value[0]
+    if '@' in value:
+        return _parse_username(value) if first == '@' else _parse_email(value)
+    if value.startswith(('http://', 'https://')):
+        return _parse_domain(value)
+    if ':' in value:
+        return _parse_ip(value)
+    if first.isdigit() and value.count('.') == 3 and value.replace('.', '').isdigit():
+        return _parse_ip(value) or _parse_username(value)
+    if not value.strip(PHONE_CHARS):
+        return _parse_phone(value) or _parse_username(value)
+    if ' ' in value:
+        return _parse_name(value)
+    if '.' in value:
+        return _parse_domain(value) or _parse_username(value)
+    return _parse_username(value)
+
+# Search type -> parser returning a SearchQuery, or None when the query is invalid
+PARSERS = {
+    'email': _parse_email,
+    'phone': _parse_phone,
+    'ip': _parse_ip,
+    'domain': _parse_domain,
+    'username': _parse_username,
+    'name': _parse_name,
+    'auto': _parse_auto
+}
+
+def _invalid(search_type):
+    if search_type == 'auto':
+        return "Could not detect the search type of the query"
+    return f"Invalid {search_type} format"
+
 class InputValidator:
     """Input validation and sanitization"""
     
@@ -11,8 +142,7 @@ class InputValidator:
         if not email or len(email) > 254:
             return False
         
-        email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(email_regex, email))
+        return bool(EMAIL_PATTERN.match(email))
     
     @staticmethod
     def validate_phone(phone):
@@ -21,7 +151,7 @@ class InputValidator:
             return False
         
         # Remove all non-digit characters except +
-        cleaned = re.sub(r'[^\d+]', '', phone)
+        cleaned = PHONE_NOISE_PATTERN.sub('', phone)
         
         # Basic validation: should start with + or digit, be between 7-15 digits
         if not cleaned:
@@ -40,17 +170,8 @@ class InputValidator:
         if not domain or len(domain) > 253:
             return False
         
-        # Remove protocol if present
-        if domain.startswith(('http://', 'https://')):
-            domain = urlparse(domain).netloc
-        
-        # Remove www if present
-        if domain.startswith('www.'):
-            domain = domain[4:]
-        
-        # Basic domain validation
-        domain_regex = r'^[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*$'
-        return bool(re.match(domain_regex, domain))
+        # Basic domain validation, without protocol or www
+        return bool(DOMAIN_PATTERN.match(_bare_domain(domain)))
     
     @staticmethod
     def validate_username(username):
@@ -66,8 +187,7 @@ class InputValidator:
         if len(username) > 50:
             return False
         
-        username_regex = r'^[a-zA-Z0-9_-]+$'
-        return bool(re.match(username_regex, username))
+        return bool(USERNAME_PATTERN.match(username))
     
     @staticmethod
     def validate_name(name):
@@ -76,8 +196,7 @@ class InputValidator:
             return False
         
         # Allow letters, spaces, apostrophes, and hyphens
-        name_regex = r"^[a-zA-Z\s'-]+$"
-        return bool(re.match(name_regex, name.strip()))
+        return bool(NAME_PATTERN.match(name.strip()))
     
     @staticmethod
     def validate_ip(ip_address):
@@ -99,38 +218,70 @@ class InputValidator:
             return ""
         
         # Remove potentially dangerous characters
-        dangerous_chars = ['<', '>', '"', "'", '&', '\x00']
-        sanitized = input_str
+        return input_str.translate(DANGEROUS_CHARS).strip()
+    
+    @staticmethod
+    def parse_search_input(search_type, query):
+        """Sanitize and validate a search; returns (SearchQuery, None) or (None, error message)
         
-        for char in dangerous_chars:
-            sanitized = sanitized.replace(char, '')
+        With search type 'auto' the type is detected from the query and is
+        the SearchQuery's search_type.
+        """
+        if not search_type or not query:
+            return None, "Search type and query are required"
+        
+        parser = PARSERS.get(search_type)
+        if not parser:
+            return None, f"Invalid search type: {search_type}"
+        
+        # Sanitize input
+        value = InputValidator.sanitize_input(query)
+        parsed = parser(value) if value else None
+        if parsed is None:
+            return None, _invalid(search_type)
         
-        return sanitized.strip()
+        return parsed, None
     
     @staticmethod
     def validate_search_input(search_type, query):
         """Validate search input based on type"""
-        if not search_type or not query:
-            return False, "Search type and query are required"
+        parsed, error = InputValidator.parse_search_input(search_type, query)
+        if error:
+            return False, error
         
-        # Sanitize input
-        query = InputValidator.sanitize_input(query)
-        
-        # Validate based on type
-        validators = {
-            'email': InputValidator.validate_email,
-            'phone': InputValidator.validate_phone,
-            'ip': InputValidator.validate_ip,
-            'domain': InputValidator.validate_domain,
-            'username': InputValidator.validate_username,
-            'name': InputValidator.validate_name
-        }
-        
-        validator = validators.get(search_type)
-        if not validator:
-            return False, f"Invalid search type: {search_type}"
-        
-        if not validator(query):
-            return False, f"Invalid {search_type} format"
-        
-        return True, query
\ No newline at end of file
+        return True, parsed.value
+    
+    @staticmethod
+    def validate_bulk(search_type, queries):
+        """parse_search_input over many queries of one type (or 'auto'), in order
+        
+        The parser is looked up once and the whole list is sanitized in one
+        str.translate call, which is what makes large imports cheap.
+        """
+        missing = (None, "Search type and query are required")
+        parser = PARSERS.get(search_type)
+        if not search_type or not parser:
+            unknown = missing if not search_type else (None, f"Invalid search type: {search_type}")
+            return [unknown if query else missing for query in queries]
+        
+        values = _sanitize_many(queries)
+        invalid = (None, _invalid(search_type))
+        
+        results = []
+        for query, value in zip(queries, values):
+            if not query:
+                results.append(missing)
+                continue
+            parsed = parser(value) if value else None
+            results.append((parsed, None) if parsed is not None else invalid)
+        return results
+
+def _sanitize_many(queries):
+    """sanitize_input of every query, translating them joined by newlines in one pass"""
+    texts = [query if isinstance(query, str) else '' for query in queries]
+    joined = '\n'.join(texts)
+    values = joined.translate(DANGEROUS_CHARS).split('\n')
+    if len(values) != len(texts):
+        # A query holding a newline of its own: sanitize one by one
+        return [InputValidator.sanitize_input(text) for text in texts]
+    return [value.strip() for value in values]
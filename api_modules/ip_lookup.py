@@ -1,8 +1,9 @@
-import requests
 import logging
 import re
 import socket
 from datetime import datetime
+from api_modules.quota_manager import quota_manager
+from api_modules.upstream import upstream
 
 logger = logging.getLogger(__name__)
 
@@ -15,13 +16,13 @@ class IPLookup:
         self.ipwhois_url = "https://ipwhois.app/json"
         self.ipinfo_url = "https://ipinfo.io"
     
-    def search(self, ip_address):
-        """Perform comprehensive IP address lookup"""
+    def search(self, ip_address, parsed=None):
+        """Perform comprehensive IP address lookup; `parsed` is the validated SearchQuery, when there is one"""
         results = []
         
         # Validate IP address format
         try:
-            validation_result = self._validate_ip(ip_address)
+            validation_result = self._validate_ip(ip_address, parsed)
             results.append(validation_result)
         except Exception as e:
             logger.error(f"IP validation error: {str(e)}")
@@ -60,44 +61,13 @@ class IPLookup:
         
         return results
     
-    def _validate_ip(self, ip_address):
-        """Validate IP address format and determine type"""
-        try:
-            # Check if it's a valid IPv4 address
-            socket.inet_aton(ip_address)
-            ip_type = "IPv4"
-            
-            # Check if it's private/reserved
-            octets = ip_address.split('.')
-            first_octet = int(octets[0])
-            second_octet = int(octets[1])
-            
-            if first_octet == 10:
-                ip_class = "Private (Class A)"
-            elif first_octet == 172 and 16 <= second_octet <= 31:
-                ip_class = "Private (Class B)"
-            elif first_octet == 192 and second_octet == 168:
-                ip_class = "Private (Class C)"
-            elif first_octet == 127:
-                ip_class = "Loopback"
-            elif first_octet == 169 and second_octet == 254:
-                ip_class = "Link-Local"
-            elif 224 <= first_octet <= 239:
-                ip_class = "Multicast"
-            elif 240 <= first_octet <= 255:
-                ip_class = "Reserved"
-            else:
-                ip_class = "Public"
-                
-        except socket.error:
-            try:
-                # Check if it's IPv6
-                socket.inet_pton(socket.AF_INET6, ip_address)
-                ip_type = "IPv6"
-                ip_class = "Unknown"
-            except socket.error:
-                ip_type = "Invalid"
-                ip_class = "Invalid Format"
+    def _validate_ip(self, ip_address, parsed=None):
+        """Validate IP address format and determine type, reusing InputValidator's parsed address if there is one"""
+        if parsed is not None:
+            ip_type = f"IPv{parsed.ip.version}"
+            ip_class = self._ipv4_class(*parsed.ip.packed[:2]) if parsed.ip.version == 4 else "Unknown"
+        else:
+            ip_type, ip_class = self._parse_ip_type(ip_address)
         
         validation_info = {
             'IP Address': ip_address,
@@ -112,90 +82,144 @@ class IPLookup:
             'status': 'valid' if ip_type != 'Invalid' else 'invalid',
             'details': validation_info
         }
+    
+    def _parse_ip_type(self, ip_address):
+        """(IP version, classification) of an address string that was not validated yet"""
+        try:
+            # Check if it's a valid IPv4 address
+            socket.inet_aton(ip_address)
+            octets = ip_address.split('.')
+            return "IPv4", self._ipv4_class(int(octets[0]), int(octets[1]))
+        except socket.error:
+            try:
+                # Check if it's IPv6
+                socket.inet_pton(socket.AF_INET6, ip_address)
+                return "IPv6", "Unknown"
+            except socket.error:
+                return "Invalid", "Invalid Format"
+    
+    def _ipv4_class(self, first_octet, second_octet):
+        """Private/reserved classification of an IPv4 address from its first two octets"""
+        if first_octet == 10:
+            return "Private (Class A)"
+        elif first_octet == 172 and 16 <= second_octet <= 31:
+            return "Private (Class B)"
+        elif first_octet == 192 and second_octet == 168:
+            return "Private (Class C)"
+        elif first_octet == 127:
+            return "Loopback"
+        elif first_octet == 169 and second_octet == 254:
+            return "Link-Local"
+        elif 224 <= first_octet <= 239:
+            return "Multicast"
+        elif 240 <= first_octet <= 255:
+            return "Reserved"
+        else:
+            return "Public"
 
     def _ip_api_lookup(self, ip_address):
         """Lookup using IP-API service"""
         try:
-            response = requests.get(f"{self.ip_api_url}/{ip_address}", timeout=10)
+            if not quota_manager.acquire('ip-api'):
+                return self._quota_exceeded('IP-API Geolocation')
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('status') == 'success':
-                    ip_info = {
-                        'IP Address': ip_address,
-                        'Country': data.get('country', 'N/A'),
-                        'Country Code': data.get('countryCode', 'N/A'),
-                        'Region': data.get('regionName', 'N/A'),
-                        'City': data.get('city', 'N/A'),
-                        'ZIP Code': data.get('zip', 'N/A'),
-                        'ISP': data.get('isp', 'N/A'),
-                        'Organization': data.get('org', 'N/A'),
-                        'AS Number': data.get('as', 'N/A'),
-                        'Timezone': data.get('timezone', 'N/A'),
-                        'Latitude': str(data.get('lat', 'N/A')),
-                        'Longitude': str(data.get('lon', 'N/A')),
-                        'Mobile/Proxy': 'Yes' if data.get('mobile') or data.get('proxy') else 'No',
-                        'VPN Detection': 'Yes' if data.get('hosting') else 'No'
-                    }
-                    
-                    return {
-                        'platform': 'IP-API Geolocation',
-                        'status': 'found',
-                        'details': ip_info
-                    }
-                else:
-                    return {
-                        'platform': 'IP-API Geolocation',
-                        'status': 'not_found',
-                        'details': {'Error': data.get('message', 'IP not found')}
-                    }
+            response = upstream.get('ip-api', f"{self.ip_api_url}/{ip_address}")
+            return self._parse_ip_api(ip_address, response)
             
         except Exception as e:
             logger.error(f"IP-API request error: {str(e)}")
             return None
+    
+    def _parse_ip_api(self, ip_address, response):
+        """Turn an IP-API response into a result"""
+        if response.status_code == 200:
+            data = response.json()
+            
+            if data.get('status') == 'success':
+                ip_info = {
+                    'IP Address': ip_address,
+                    'Country': data.get('country', 'N/A'),
+                    'Country Code': data.get('countryCode', 'N/A'),
+                    'Region': data.get('regionName', 'N/A'),
+                    'City': data.get('city', 'N/A'),
+                    'ZIP Code': data.get('zip', 'N/A'),
+                    'ISP': data.get('isp', 'N/A'),
+                    'Organization': data.get('org', 'N/A'),
+                    'AS Number': data.get('as', 'N/A'),
+                    'Timezone': data.get('timezone', 'N/A'),
+                    'Latitude': str(data.get('lat', 'N/A')),
+                    'Longitude': str(data.get('lon', 'N/A')),
+                    'Mobile/Proxy': 'Yes' if data.get('mobile') or data.get('proxy') else 'No',
+                    'VPN Detection': 'Yes' if data.get('hosting') else 'No'
+                }
+                
+                return {
+                    'platform': 'IP-API Geolocation',
+                    'status': 'found',
+                    'details': ip_info
+                }
+            else:
+                return {
+                    'platform': 'IP-API Geolocation',
+                    'status': 'not_found',
+                    'details': {'Error': data.get('message', 'IP not found')}
+                }
         
         return None
     
     def _ipwhois_lookup(self, ip_address):
         """Lookup using IPWhois service"""
         try:
-            response = requests.get(f"{self.ipwhois_url}/{ip_address}", timeout=10)
+            if not quota_manager.acquire('ipwhois'):
+                return self._quota_exceeded('IPWhois Registry')
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('success'):
-                    whois_info = {
-                        'IP Address': ip_address,
-                        'Type': data.get('type', 'N/A'),
-                        'Country': data.get('country', 'N/A'),
-                        'Country Code': data.get('country_code', 'N/A'),
-                        'Region': data.get('region', 'N/A'),
-                        'City': data.get('city', 'N/A'),
-                        'ISP': data.get('isp', 'N/A'),
-                        'ASN': data.get('asn', 'N/A'),
-                        'Org': data.get('org', 'N/A')
-                    }
-                    
-                    return {
-                        'platform': 'IPWhois Registry',
-                        'status': 'found',
-                        'details': whois_info
-                    }
-                else:
-                    return {
-                        'platform': 'IPWhois Registry',
-                        'status': 'not_found',
-                        'details': {'Error': 'IP information not available'}
-                    }
+            response = upstream.get('ipwhois', f"{self.ipwhois_url}/{ip_address}")
+            return self._parse_ipwhois(ip_address, response)
             
         except Exception as e:
             logger.error(f"IPWhois request error: {str(e)}")
             return None
+    
+    def _parse_ipwhois(self, ip_address, response):
+        """Turn an IPWhois response into a result"""
+        if response.status_code == 200:
+            data = response.json()
+            
+            if data.get('success'):
+                whois_info = {
+                    'IP Address': ip_address,
+                    'Type': data.get('type', 'N/A'),
+                    'Country': data.get('country', 'N/A'),
+                    'Country Code': data.get('country_code', 'N/A'),
+                    'Region': data.get('region', 'N/A'),
+                    'City': data.get('city', 'N/A'),
+                    'ISP': data.get('isp', 'N/A'),
+                    'ASN': data.get('asn', 'N/A'),
+                    'Org': data.get('org', 'N/A')
+                }
+                
+                return {
+                    'platform': 'IPWhois Registry',
+                    'status': 'found',
+                    'details': whois_info
+                }
+            else:
+                return {
+                    'platform': 'IPWhois Registry',
+                    'status': 'not_found',
+                    'details': {'Error': 'IP information not available'}
+                }
         
         return None
     
+    def _quota_exceeded(self, platform):
+        """Result returned when a provider's request budget is used up"""
+        return {
+            'platform': platform,
+            'status': 'quota_exceeded',
+            'details': {'Error': 'Provider request quota reached, try again later'}
+        }
+    
     def get_ip_from_domain(self, domain):
         """Get IP address from domain name"""
         try:
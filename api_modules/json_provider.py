@@ -0,0 +1,56 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses orjson when it is installed
+
+    Output matches the default provider: keys are sorted when `sort_keys`
+    is set, dates are formatted as HTTP dates, and anything orjson cannot
+    handle natively (Decimal, objects with __html__, ...) goes through the
+    same `default` hook. Responses are encoded straight to bytes instead of
+    building a str first. Values orjson rejects outright, such as integers
+    wider than 64 bits, fall back to the stdlib encoder. Without orjson this
+    behaves exactly like the default provider.
+    """
+
+    @property
+    def fast(self):
+        return orjson is not None
+
+    def _options(self, pretty=False):
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        try:
+            return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+        except TypeError:
+            return super().dumps(obj)
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        try:
+            body = orjson.dumps(obj, default=self.default, option=self._options(pretty) | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            return super().response(obj)
+
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,67 @@
+import time
+import logging
+import importlib
+import threading
+
+logger = logging.getLogger(__name__)
+
+class LazyObject:
+    """Stand-in that builds the real object on first attribute access
+
+    Lets app.py hold module-level lookup and export handlers without
+    importing their dependencies (reportlab, phonenumbers, whois, requests)
+    until a request actually needs them.
+    """
+
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Build the object now if it has not been built yet, and return it"""
+        target = self._target
+        if target is None:
+            with self._lock:
+                if self._target is None:
+                    start = time.perf_counter()
+                    self._target = self._factory()
+                    logger.info(f"Loaded {self._name} in {(time.perf_counter() - start) * 1000:.0f}ms")
+                target = self._target
+        return target
+
+    @property
+    def loaded(self):
+        return self._target is not None
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<LazyObject {self._name} ({state})>"
+
+_registry = []
+
+def lazy_module(module_name):
+    """A module imported on first attribute access"""
+    proxy = LazyObject(module_name, lambda: importlib.import_module(module_name))
+    _registry.append(proxy)
+    return proxy
+
+def lazy_instance(module_name, class_name, *args, **kwargs):
+    """An instance of module_name.class_name created on first attribute access"""
+    proxy = LazyObject(
+        f"{module_name}.{class_name}",
+        lambda: getattr(importlib.import_module(module_name), class_name)(*args, **kwargs)
+    )
+    _registry.append(proxy)
+    return proxy
+
+def preload():
+    """Load every lazy object now, e.g. in the gunicorn master before forking"""
+    start = time.perf_counter()
+    for proxy in _registry:
+        proxy.load()
+    logger.info(f"Preloaded {len(_registry)} modules in {(time.perf_counter() - start) * 1000:.0f}ms")
@@ -1,7 +1,9 @@
 import phonenumbers
 from phonenumbers import geocoder, carrier
-import requests
 import logging
+from api_modules.quota_manager import quota_manager
+from api_modules.upstream import upstream
+from api_modules.input_validator import PHONE_NOISE_PATTERN
 
 logger = logging.getLogger(__name__)
 
@@ -11,20 +13,23 @@ class PhoneLookup:
         self.numverify_api_key = None  # Add your NumVerify API key here if available
         self.numverify_url = "http://apilayer.net/api/validate"
     
-    def search(self, phone_number):
+    def search(self, phone_number, parsed=None):
         """
         Search method for compatibility with app.py - returns only real, verifiable data
         """
-        return self.lookup(phone_number)
+        return self.lookup(phone_number, parsed)
     
-    def lookup(self, phone_number):
+    def lookup(self, phone_number, parsed=None):
         """
         Main lookup function - returns only real, verifiable data
+        
+        `parsed` is the validated SearchQuery, when there is one; its number
+        has the separators stripped already.
         """
         results = []
         
         # Primary lookup using phonenumbers library (real data only)
-        basic_result = self._parse_phone_basic(phone_number)
+        basic_result = self._parse_phone_basic(phone_number, parsed)
         if basic_result:
             results.append(basic_result)
         
@@ -36,11 +41,14 @@ class PhoneLookup:
         
         return results if results else [{'platform': 'Phone Number Parser', 'status': 'not_found', 'details': {}}]
     
-    def _parse_phone_basic(self, phone_number):
+    def _parse_phone_basic(self, phone_number, parsed=None):
         """Basic phone number parsing using phonenumbers library - REAL DATA ONLY"""
         try:
+            # Digits and + only, as InputValidator already cleaned them when it parsed the query
+            cleaned = parsed.normalized if parsed is not None else PHONE_NOISE_PATTERN.sub('', phone_number)
+            
             # Parse the phone number
-            parsed_number = phonenumbers.parse(phone_number, None)
+            parsed_number = phonenumbers.parse(cleaned, None)
             
             if phonenumbers.is_valid_number(parsed_number):
                 # Get real carrier information from phonenumbers library
@@ -76,11 +84,11 @@ class PhoneLookup:
                     'Reported Issues': spam_analysis['reported_issues'],
                     # External lookup links
                     'Reverse Lookup': f'https://www.google.com/search?q="{phone_number}"',
-                    'Whitepages Search': f'https://www.whitepages.com/phone/{phone_number.replace("+", "").replace(" ", "").replace("-", "").replace("(", "").replace(")", "")}',
+                    'Whitepages Search': f'https://www.whitepages.com/phone/{cleaned.lstrip("+")}',
                     'TrueCaller Profile': f'https://www.truecaller.com/search/in/{truecaller_number}',
                     'GetContact Profile': f'https://www.getcontact.com/en/number/{truecaller_with_plus}',
                     'Mobile Tracker': f'https://www.mobilenumbertracker.com/search.php?mobileno={truecaller_number}',
-                    'Reverse Phone Lookup': f'https://www.reversephonelookup.com/number/{phone_number.replace("+", "").replace(" ", "").replace("-", "").replace("(", "").replace(")", "")}',
+                    'Reverse Phone Lookup': f'https://www.reversephonelookup.com/number/{cleaned.lstrip("+")}',
                     'Phone Validator': f'https://www.phonevalidator.com/index.aspx?number={formatted_for_truecaller}'
                 }
                 
@@ -192,47 +200,61 @@ class PhoneLookup:
             return None
         
         try:
-            params = {
-                'access_key': self.numverify_api_key,
-                'number': phone_number,
-                'country_code': '',
-                'format': 1
-            }
+            if not quota_manager.acquire('numverify', key=self.numverify_api_key):
+                return self._numverify_quota_exceeded()
             
-            response = requests.get(self.numverify_url, params=params, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('valid'):
-                    numverify_info = {
-                        'Phone Number': phone_number,
-                        'Valid': 'Yes' if data.get('valid') else 'No',
-                        'Country': data.get('country_name', 'Unknown'),
-                        'Country Code': data.get('country_code', 'Unknown'),
-                        'State': data.get('region', 'Unknown'),
-                        'Carrier': data.get('carrier', 'Unknown'),
-                        'Line Type': data.get('line_type', 'Unknown'),
-                        'International Format': data.get('international_format', 'Unknown'),
-                        'Local Format': data.get('local_format', 'Unknown'),
-                        'Timezone': data.get('timezone', 'Unknown')
-                    }
-                    
-                    return {
-                        'platform': 'NumVerify API',
-                        'status': 'found',
-                        'details': numverify_info
-                    }
-                else:
-                    return {
-                        'platform': 'NumVerify API',
-                        'status': 'invalid',
-                        'details': {'Error': 'Invalid phone number'}
-                    }
+            response = upstream.get('numverify', self.numverify_url, params=self._numverify_params(phone_number))
+            return self._parse_numverify(phone_number, response)
             
         except Exception as e:
             logger.error(f"NumVerify request error: {str(e)}")
             return None
+    
+    def _numverify_params(self, phone_number):
+        return {
+            'access_key': self.numverify_api_key,
+            'number': phone_number,
+            'country_code': '',
+            'format': 1
+        }
+    
+    def _numverify_quota_exceeded(self):
+        return {
+            'platform': 'NumVerify API',
+            'status': 'quota_exceeded',
+            'details': {'Error': 'Provider request quota reached, try again later'}
+        }
+    
+    def _parse_numverify(self, phone_number, response):
+        """Turn a NumVerify validate response into a result"""
+        if response.status_code == 200:
+            data = response.json()
+            
+            if data.get('valid'):
+                numverify_info = {
+                    'Phone Number': phone_number,
+                    'Valid': 'Yes' if data.get('valid') else 'No',
+                    'Country': data.get('country_name', 'Unknown'),
+                    'Country Code': data.get('country_code', 'Unknown'),
+                    'State': data.get('region', 'Unknown'),
+                    'Carrier': data.get('carrier', 'Unknown'),
+                    'Line Type': data.get('line_type', 'Unknown'),
+                    'International Format': data.get('international_format', 'Unknown'),
+                    'Local Format': data.get('local_format', 'Unknown'),
+                    'Timezone': data.get('timezone', 'Unknown')
+                }
+                
+                return {
+                    'platform': 'NumVerify API',
+                    'status': 'found',
+                    'details': numverify_info
+                }
+            else:
+                return {
+                    'platform': 'NumVerify API',
+                    'status': 'invalid',
+                    'details': {'Error': 'Invalid phone number'}
+                }
         
         return None
     
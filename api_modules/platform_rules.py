@@ -0,0 +1,139 @@
+import os
+import json
+import asyncio
+import logging
+import threading
+import weakref
+from api_modules.indicator_matcher import IndicatorMatcher
+from api_modules.quota_manager import quota_manager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'social_platforms.json')
+
+RULE_FIELDS = {
+    'url', 'profile_url', 'method', 'found_status', 'not_found_status', 'not_found_indicators',
+    'found_indicators', 'decisive_indicators', 'max_bytes', 'concurrency', 'rate_limit'
+}
+
+def parse_rate_limit(value):
+    """'<requests>/<seconds>' as (requests, seconds), or None for no limit"""
+    if value is None:
+        return None
+    try:
+        capacity, period = str(value).split('/')
+        capacity, period = int(capacity), float(period)
+    except ValueError:
+        raise ValueError(f"rate limit must look like <requests>/<seconds>, not {value}") from None
+    if capacity < 1 or period <= 0:
+        raise ValueError(f"rate limit must allow at least one request per period: {value}")
+    return capacity, period
+
+class PlatformRule:
+    """How one platform is probed for a username, compiled from its declaration
+
+    `url` is the page or API endpoint requested and `profile_url` the link
+    shown in results, both with {} standing for the username. A status in
+    `not_found_status` means no profile. A status in `found_status` means a
+    profile when the rule is status-only (a HEAD request, or no indicators
+    declared). Otherwise the body is read, at most `max_bytes` of it: a
+    not-found indicator anywhere in it means no profile, and a found
+    indicator means a profile. Reading stops early only at a not-found
+    indicator or at one of the `decisive_indicators`, found indicators
+    that only a real profile page carries. Any other status is unknown.
+
+    At most `concurrency` probes of the platform are in flight at once in a
+    process, and `rate_limit` is its token bucket in quota_manager.
+    """
+
+    __slots__ = (
+        'name', 'provider', 'url', 'profile_url', 'method', 'found_status', 'not_found_status', 'matcher',
+        'status_only', 'max_bytes', 'concurrency', 'rate_limit', 'limit', 'async_limits'
+    )
+
+    def __init__(self, name, declaration, matcher):
+        unknown = set(declaration) - RULE_FIELDS
+        if unknown:
+            raise ValueError(f"Platform {name}: unknown fields {', '.join(sorted(unknown))}")
+
+        self.name = name
+        self.provider = f"social:{name}"
+        self.url = declaration.get('url', '')
+        if '{}' not in self.url:
+            raise ValueError(f"Platform {name}: url must contain {{}} for the username")
+        self.profile_url = declaration.get('profile_url') or self.url
+
+        self.method = declaration.get('method', 'GET').upper()
+        if self.method not in ('GET', 'HEAD'):
+            raise ValueError(f"Platform {name}: method must be GET or HEAD, not {self.method}")
+        self.found_status = frozenset(int(status) for status in declaration.get('found_status', [200]))
+        self.not_found_status = frozenset(int(status) for status in declaration.get('not_found_status', [404]))
+
+        self.matcher = matcher
+        self.status_only = self.method == 'HEAD' or not matcher.indicators
+        # The status decides a status-only rule, so its body is not wanted
+        self.max_bytes = 0 if self.status_only else int(declaration.get('max_bytes', 256 * 1024))
+
+        self.concurrency = int(declaration.get('concurrency', 4))
+        if self.concurrency < 1:
+            raise ValueError(f"Platform {name}: concurrency must be at least 1")
+        try:
+            self.rate_limit = parse_rate_limit(declaration.get('rate_limit'))
+        except ValueError as e:
+            raise ValueError(f"Platform {name}: {str(e)}") from e
+
+        self.limit = threading.BoundedSemaphore(self.concurrency)
+        self.async_limits = weakref.WeakKeyDictionary()
+
+    def async_limit(self):
+        """The concurrency limit for coroutines, one per event loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self.async_limits.get(loop)
+        if semaphore is None:
+            semaphore = self.async_limits[loop] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+def compile_rules(config):
+    """{platform: PlatformRule} from a rules document
+
+    Each platform's declaration is laid over the document's defaults.
+    Platforms declaring the same indicators share one compiled matcher, so
+    adding platforms that use the default indicators compiles nothing new.
+    """
+    defaults = config.get('defaults', {})
+    matchers = {}
+    rules = {}
+
+    for name, overrides in config.get('platforms', {}).items():
+        declaration = {**defaults, **overrides}
+        not_found = tuple(indicator.lower() for indicator in declaration.get('not_found_indicators', []))
+        found = tuple(indicator.lower() for indicator in declaration.get('found_indicators', []))
+        decisive = tuple(indicator.lower() for indicator in declaration.get('decisive_indicators', []))
+
+        matcher = matchers.get((not_found, found, decisive))
+        if matcher is None:
+            matcher = matchers[(not_found, found, decisive)] = IndicatorMatcher({
+                **{indicator: 'found' for indicator in found},
+                **{indicator: 'decisive' for indicator in decisive},
+                **{indicator: 'not_found' for indicator in not_found}
+            })
+        rules[name] = PlatformRule(name, declaration, matcher)
+
+    return rules
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    with open(path, encoding='utf-8') as handle:
+        rules = compile_rules(json.load(handle))
+    logger.info(f"Loaded {len(rules)} platform rules from {path}")
+    return rules
+
+def register_rate_limits(rules, quotas):
+    """Give every rate-limited platform its bucket in the quota manager"""
+    for rule in rules.values():
+        if rule.rate_limit:
+            quotas.configure(rule.provider, *rule.rate_limit)
+
+# Loaded and compiled once per process, shared by every username search.
+# Set SOCIAL_PLATFORMS_PATH to use another rules file.
+platform_rules = load_rules(os.environ.get('SOCIAL_PLATFORMS_PATH') or DEFAULT_RULES_PATH)
+register_rate_limits(platform_rules, quota_manager)
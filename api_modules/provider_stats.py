@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from api_modules.metrics import provider_call_duration, provider_errors
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the histogram buckets reported by snapshot()
+HISTOGRAM_BOUNDS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class RollingWindow:
+    """Most recent call samples for one provider"""
+
+    def __init__(self, max_samples, max_age):
+        self.samples = deque(maxlen=max_samples)
+        self.max_age = max_age
+
+    def add(self, latency, error):
+        self.samples.append((time.time(), latency, error))
+
+    def current(self):
+        """Samples younger than max_age, oldest first"""
+        cutoff = time.time() - self.max_age
+        while self.samples and self.samples[0][0] < cutoff:
+            self.samples.popleft()
+        return list(self.samples)
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+class ProviderStats:
+    """Rolling latency and error tracking per upstream provider
+
+    Lookups record every upstream call here. The percentiles drive two
+    decisions: timeouts are derived from the observed p99 instead of a fixed
+    value, and callers probing several providers can try the fast ones first.
+    """
+
+    def __init__(self, max_samples=500, max_age=900, min_samples=20,
+                 timeout_multiplier=2.0, min_timeout=1.0):
+        self.max_samples = max_samples
+        self.max_age = max_age
+        self.min_samples = min_samples
+        self.timeout_multiplier = timeout_multiplier
+        self.min_timeout = min_timeout
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def record(self, provider, latency, error=False):
+        """Record one upstream call"""
+        provider_call_duration.labels(provider).observe(latency)
+        if error:
+            provider_errors.labels(provider).inc()
+        
+        with self.lock:
+            window = self.windows.get(provider)
+            if window is None:
+                window = self.windows[provider] = RollingWindow(self.max_samples, self.max_age)
+            window.add(latency, error)
+
+    @contextmanager
+    def track(self, provider):
+        """Time the enclosed block; an exception counts as an error"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(provider, time.perf_counter() - start, error=True)
+            raise
+        self.record(provider, time.perf_counter() - start)
+
+    def _samples(self, provider):
+        with self.lock:
+            window = self.windows.get(provider)
+            return window.current() if window else []
+
+    def summary(self, provider):
+        """Percentiles, error rate and histogram for one provider, or None"""
+        samples = self._samples(provider)
+        if not samples:
+            return None
+
+        latencies = sorted(latency for _, latency, _ in samples)
+        errors = sum(1 for _, _, error in samples if error)
+
+        histogram = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        for latency in latencies:
+            histogram[bisect.bisect_left(HISTOGRAM_BOUNDS, latency)] += 1
+
+        return {
+            'count': len(latencies),
+            'p50': _percentile(latencies, 0.50),
+            'p95': _percentile(latencies, 0.95),
+            'p99': _percentile(latencies, 0.99),
+            'error_rate': errors / len(latencies),
+            'histogram': {
+                **{f"le_{bound}": count for bound, count in zip(HISTOGRAM_BOUNDS, histogram)},
+                'le_inf': histogram[-1]
+            }
+        }
+
+    def timeout_for(self, provider, default=10):
+        """Timeout derived from the observed p99, capped at the default"""
+        summary = self.summary(provider)
+        if not summary or summary['count'] < self.min_samples:
+            return default
+
+        timeout = summary['p99'] * self.timeout_multiplier
+        return max(self.min_timeout, min(default, timeout))
+
+    def order(self, providers, key=None):
+        """Sort providers fastest first by median latency
+
+        Providers with no samples yet sort first so they get measured.
+        """
+        key = key or (lambda provider: provider)
+
+        def median(item):
+            summary = self.summary(key(item))
+            return summary['p50'] if summary else 0.0
+
+        return sorted(providers, key=median)
+
+    def snapshot(self):
+        """Summaries for every provider seen so far"""
+        with self.lock:
+            providers = list(self.windows)
+
+        snapshot = {}
+        for provider in sorted(providers):
+            summary = self.summary(provider)
+            if summary:
+                summary['timeout'] = self.timeout_for(provider)
+                snapshot[provider] = summary
+        return snapshot
+
+    def save(self, path):
+        """Write the current samples to path so a new process can start warm"""
+        with self.lock:
+            data = {provider: window.current() for provider, window in self.windows.items()}
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as handle:
+                json.dump(data, handle)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Provider stats save error: {str(e)}")
+
+    def load(self, path):
+        """Add samples saved by save(); expired ones are dropped as usual"""
+        try:
+            with open(path, encoding='utf-8') as handle:
+                data = json.load(handle)
+        except (OSError, ValueError):
+            return
+
+        with self.lock:
+            for provider, samples in data.items():
+                window = self.windows.get(provider)
+                if window is None:
+                    window = self.windows[provider] = RollingWindow(self.max_samples, self.max_age)
+                merged = sorted(list(window.samples) + [tuple(sample) for sample in samples])
+                window.samples.clear()
+                window.samples.extend(merged)
+
+# Global provider stats instance
+provider_stats = ProviderStats()
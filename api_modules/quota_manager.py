@@ -0,0 +1,205 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from api_modules.metrics import quota_rejections
+from api_modules.sqlite_local import LocalConnection
+
+logger = logging.getLogger(__name__)
+
+# Free-tier budgets as (requests, period in seconds). Override any of them
+# with QUOTA_<PROVIDER>=<requests>/<seconds>, e.g. QUOTA_IP_API=45/60.
+DEFAULT_QUOTAS = {
+    'ip-api': (45, 60),
+    'ipwhois': (10000, 30 * 24 * 3600),
+    'hibp': (10, 60),
+    'numverify': (100, 30 * 24 * 3600)
+}
+
+class MemoryBucketStore:
+    """Token bucket state held in process memory"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def reserve(self, name, capacity, rate, tokens, max_wait):
+        """Take tokens from a bucket, reserving future ones if the wait is short enough
+
+        Returns (acquired, wait_seconds, remaining).
+        """
+        with self.lock:
+            now = time.time()
+            level, updated = self.buckets.get(name, (capacity, now))
+            level = min(capacity, level + (now - updated) * rate)
+
+            after = level - tokens
+            wait = max(0.0, -after / rate)
+            if wait > max_wait:
+                self.buckets[name] = (level, now)
+                return False, wait, level
+
+            self.buckets[name] = (after, now)
+            return True, wait, after
+
+    def peek(self, name, capacity, rate):
+        with self.lock:
+            now = time.time()
+            level, updated = self.buckets.get(name, (capacity, now))
+            return min(capacity, level + (now - updated) * rate)
+
+class SQLiteBucketStore:
+    """Token bucket state shared by every worker process on one host"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connections = LocalConnection(path)
+        self.connections.get().execute(
+            "CREATE TABLE IF NOT EXISTS quota_buckets ("
+            "name TEXT PRIMARY KEY, level REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _load(self, conn, name, capacity, rate, now):
+        row = conn.execute(
+            "SELECT level, updated FROM quota_buckets WHERE name = ?", (name,)
+        ).fetchone()
+        level, updated = row if row else (capacity, now)
+        return min(capacity, level + (now - updated) * rate)
+
+    def reserve(self, name, capacity, rate, tokens, max_wait):
+        conn = self.connections.get()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            level = self._load(conn, name, capacity, rate, now)
+
+            after = level - tokens
+            wait = max(0.0, -after / rate)
+            acquired = wait <= max_wait
+
+            conn.execute(
+                "INSERT OR REPLACE INTO quota_buckets (name, level, updated) VALUES (?, ?, ?)",
+                (name, after if acquired else level, now)
+            )
+            conn.execute("COMMIT")
+            return acquired, wait, after if acquired else level
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def peek(self, name, capacity, rate):
+        return self._load(self.connections.get(), name, capacity, rate, time.time())
+
+class QuotaManager:
+    """Central token-bucket budgets for upstream providers
+
+    Each provider has a bucket of `capacity` requests refilled evenly over
+    `period` seconds; lookups that pass an API key get a bucket per key.
+    A call that finds tokens proceeds immediately, one that would have to
+    wait up to `max_wait` seconds is queued (it reserves its token and
+    sleeps), and anything beyond that is rejected so the caller can report
+    the provider as temporarily unavailable instead of earning a 429 or ban.
+    """
+
+    def __init__(self, quotas=None, store=None, max_wait=5.0):
+        self.quotas = dict(quotas if quotas is not None else DEFAULT_QUOTAS)
+        self.store = store or MemoryBucketStore()
+        self.max_wait = max_wait
+        self.bucket_names = {}
+        self.lock = threading.Lock()
+
+    def configure(self, provider, capacity, period):
+        """Set (or replace) the budget for a provider"""
+        self.quotas[provider] = (capacity, period)
+
+    def _bucket(self, provider, key=None):
+        name = provider
+        if key:
+            # Never keep raw API keys in bucket names or reports
+            name = f"{provider}:{hashlib.sha256(key.encode()).hexdigest()[:8]}"
+        with self.lock:
+            self.bucket_names[name] = provider
+        return name
+
+    def _reserve(self, provider, key, tokens, max_wait):
+        """Reserve budget; returns seconds to wait for it, or None when over budget"""
+        quota = self.quotas.get(provider)
+        if not quota:
+            return 0.0
+
+        capacity, period = quota
+        max_wait = self.max_wait if max_wait is None else max_wait
+        name = self._bucket(provider, key)
+
+        try:
+            acquired, wait, _ = self.store.reserve(name, capacity, capacity / period, tokens, max_wait)
+        except Exception as e:
+            logger.error(f"Quota store error for {provider}: {str(e)}")
+            return 0.0
+
+        if not acquired:
+            quota_rejections.labels(provider).inc()
+            logger.warning(f"Quota exhausted for {provider}, next token in {wait:.1f}s")
+            return None
+        return wait
+
+    def acquire(self, provider, key=None, tokens=1, max_wait=None):
+        """Take budget for one upstream call; returns False when over budget"""
+        wait = self._reserve(provider, key, tokens, max_wait)
+        if wait is None:
+            return False
+
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, provider, key=None, tokens=1, max_wait=None):
+        """acquire() for coroutines: a queued call waits without blocking the event loop"""
+        wait = self._reserve(provider, key, tokens, max_wait)
+        if wait is None:
+            return False
+
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def remaining(self):
+        """Report the current budget of every bucket that has been used"""
+        with self.lock:
+            names = dict(self.bucket_names)
+        for provider in self.quotas:
+            names.setdefault(provider, provider)
+
+        report = {}
+        for name, provider in sorted(names.items()):
+            capacity, period = self.quotas[provider]
+            level = self.store.peek(name, capacity, capacity / period)
+            report[name] = {
+                'provider': provider,
+                'capacity': capacity,
+                'period_seconds': period,
+                'remaining': max(0, int(level))
+            }
+        return report
+
+def _quotas_from_env():
+    quotas = dict(DEFAULT_QUOTAS)
+    for provider in DEFAULT_QUOTAS:
+        value = os.environ.get(f"QUOTA_{provider.upper().replace('-', '_')}")
+        if not value:
+            continue
+        try:
+            capacity, period = value.split('/')
+            quotas[provider] = (int(capacity), float(period))
+        except ValueError:
+            logger.error(f"Ignoring malformed quota for {provider}: {value}")
+    return quotas
+
+def _store_from_env():
+    path = os.environ.get('QUOTA_STORE_PATH')
+    return SQLiteBucketStore(path) if path else MemoryBucketStore()
+
+# Global quota manager instance
+quota_manager = QuotaManager(_quotas_from_env(), _store_from_env())
@@ -0,0 +1,231 @@
+import os
+import time
+import socket
+import logging
+import threading
+from collections import defaultdict, deque
+from urllib.parse import urlparse
+from api_modules.sqlite_local import LocalConnection
+
+logger = logging.getLogger(__name__)
+
+class MemoryBackend:
+    """Per-process sliding-window backend (the original limiter behaviour)"""
+
+    def __init__(self):
+        self.requests = defaultdict(deque)
+        self.lock = threading.Lock()
+
+    def hit(self, identifier, max_requests, window_seconds, cost=1):
+        """Record a request costing `cost` and return True if it is within the limit"""
+        with self.lock:
+            now = time.time()
+            window_start = now - window_seconds
+            hits = self.requests[identifier]
+
+            # Clean old requests
+            while hits and hits[0] < window_start:
+                hits.popleft()
+
+            if len(hits) + cost <= max_requests:
+                hits.extend([now] * cost)
+                return True
+
+            return False
+
+class SQLiteBackend:
+    """Sliding-window backend shared by every worker process on one host"""
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self.connections = LocalConnection(path)
+        self.hits_since_purge = 0
+        self.max_window = 0
+
+        conn = self.connections.get()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_hits ("
+            "identifier TEXT NOT NULL, ts REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_rate_limit_hits "
+            "ON rate_limit_hits (identifier, ts)"
+        )
+
+    def hit(self, identifier, max_requests, window_seconds, cost=1):
+        """Record a request costing `cost` and return True if it is within the limit"""
+        conn = self.connections.get()
+        now = time.time()
+        window_start = now - window_seconds
+        self.max_window = max(self.max_window, window_seconds)
+
+        # BEGIN IMMEDIATE takes the write lock up front, so the
+        # count-then-insert below is atomic across processes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM rate_limit_hits WHERE identifier = ? AND ts < ?",
+                (identifier, window_start)
+            )
+            count = conn.execute(
+                "SELECT COUNT(*) FROM rate_limit_hits WHERE identifier = ?",
+                (identifier,)
+            ).fetchone()[0]
+
+            allowed = count + cost <= max_requests
+            if allowed:
+                conn.executemany(
+                    "INSERT INTO rate_limit_hits (identifier, ts) VALUES (?, ?)",
+                    [(identifier, now)] * cost
+                )
+
+            self.hits_since_purge += 1
+            if self.hits_since_purge >= self.PURGE_EVERY:
+                # Drop rows left behind by clients that went quiet
+                self.hits_since_purge = 0
+                conn.execute(
+                    "DELETE FROM rate_limit_hits WHERE ts < ?",
+                    (now - self.max_window,)
+                )
+
+            conn.execute("COMMIT")
+            return allowed
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+class RedisBackend:
+    """Fixed-window counter backend speaking the Redis protocol (RESP)
+
+    Each decision is a single MULTI/INCR/PEXPIRE/EXEC round trip, so it is
+    atomic on the server and works against Redis or any RESP stand-in that
+    implements those four commands.
+    """
+
+    def __init__(self, host='127.0.0.1', port=6379, db=0, password=None, timeout=1.0, prefix='osint:rl:'):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self.prefix = prefix
+        self.local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        reader = sock.makefile('rb')
+        self.local.sock = sock
+        self.local.reader = reader
+
+        if self.password:
+            self._send([['AUTH', self.password]])
+            self._read_reply()
+        if self.db:
+            self._send([['SELECT', str(self.db)]])
+            self._read_reply()
+
+    def _close(self):
+        sock = getattr(self.local, 'sock', None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self.local.sock = None
+        self.local.reader = None
+
+    def _send(self, commands):
+        """Write several commands in one packet (pipelining)"""
+        payload = []
+        for command in commands:
+            payload.append(f"*{len(command)}\r\n".encode())
+            for arg in command:
+                arg = arg if isinstance(arg, bytes) else str(arg).encode()
+                payload.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        self.local.sock.sendall(b''.join(payload))
+
+    def _read_reply(self):
+        line = self.local.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise RuntimeError(f"Redis error: {rest.decode()}")
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self.local.reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(rest)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+
+        raise RuntimeError(f"Unexpected RESP reply: {line!r}")
+
+    def execute(self, *commands):
+        """Send commands in one round trip and return their replies"""
+        try:
+            if getattr(self.local, 'sock', None) is None:
+                self._connect()
+
+            self._send(commands)
+            return [self._read_reply() for _ in commands]
+        except Exception:
+            # An error reply stops the reading part-way, leaving the rest of
+            # the pipeline's replies on the socket for the next call to read
+            self._close()
+            raise
+
+    def hit(self, identifier, max_requests, window_seconds, cost=1):
+        """Record a request costing `cost` and return True if it is within the limit"""
+        window_ms = int(window_seconds * 1000)
+        bucket = int(time.time() * 1000) // window_ms
+        key = f"{self.prefix}{identifier}:{window_seconds}:{bucket}"
+
+        replies = self.execute(
+            ['MULTI'],
+            ['INCRBY', key, str(cost)],
+            ['PEXPIRE', key, str(window_ms)],
+            ['EXEC']
+        )
+        count = replies[-1][0]
+        if count > max_requests and cost > 1:
+            # A refused batch gives its cost back, so it does not use up the window
+            self.execute(['DECRBY', key, str(cost)])
+            return False
+        return count <= max_requests
+
+def create_backend(url=None):
+    """Build a backend from a URL such as memory://, sqlite:///path or redis://host:port/db"""
+    url = url or os.environ.get('RATE_LIMIT_BACKEND', 'memory://')
+    parsed = urlparse(url)
+
+    if parsed.scheme in ('', 'memory'):
+        return MemoryBackend()
+
+    if parsed.scheme == 'sqlite':
+        # sqlite:///relative.db or sqlite:////absolute/path.db
+        path = url[len('sqlite:///'):]
+        return SQLiteBackend(path or 'rate_limit.db')
+
+    if parsed.scheme == 'redis':
+        db = parsed.path.lstrip('/')
+        return RedisBackend(
+            host=parsed.hostname or '127.0.0.1',
+            port=parsed.port or 6379,
+            db=int(db) if db else 0,
+            password=parsed.password
+        )
+
+    raise ValueError(f"Unsupported rate limit backend: {url}")
@@ -0,0 +1,81 @@
+import os
+import json
+import time
+import uuid
+import logging
+from api_modules import tracing
+from api_modules.metrics import record_cache
+from api_modules.sqlite_local import LocalConnection
+
+logger = logging.getLogger(__name__)
+
+class SearchStore:
+    """Server-side store of completed searches, keyed by a random ID
+
+    Lets export endpoints read results by ID instead of having the browser
+    upload them again. Backed by SQLite so every worker process on the host
+    sees the same searches; entries expire after `ttl` seconds.
+    """
+
+    PURGE_EVERY = 100
+
+    def __init__(self, path, ttl=24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.connections = LocalConnection(path)
+        self.saves_since_purge = 0
+
+        self.connections.get().execute(
+            "CREATE TABLE IF NOT EXISTS searches ("
+            "id TEXT PRIMARY KEY, search_type TEXT NOT NULL, query TEXT NOT NULL, "
+            "results TEXT NOT NULL, created REAL NOT NULL)"
+        )
+
+    def save(self, search_type, query, results):
+        """Store a search and return its ID"""
+        search_id = uuid.uuid4().hex
+        now = time.time()
+
+        with tracing.span('store:save', search_id=search_id):
+            conn = self.connections.get()
+            conn.execute(
+                "INSERT INTO searches (id, search_type, query, results, created) VALUES (?, ?, ?, ?, ?)",
+                (search_id, search_type, query, json.dumps(results), now)
+            )
+
+            self.saves_since_purge += 1
+            if self.saves_since_purge >= self.PURGE_EVERY:
+                self.saves_since_purge = 0
+                conn.execute("DELETE FROM searches WHERE created < ?", (now - self.ttl,))
+
+        return search_id
+
+    def get(self, search_id):
+        """Return a stored search as a dict, or None if unknown or expired"""
+        with tracing.span('cache:search_store', search_id=search_id) as span:
+            row = self.connections.get().execute(
+                "SELECT search_type, query, results, created FROM searches WHERE id = ? AND created >= ?",
+                (search_id, time.time() - self.ttl)
+            ).fetchone()
+
+            record_cache('search_store', row is not None)
+            if span is not None:
+                span.set('hit', row is not None)
+
+        if row is None:
+            return None
+
+        search_type, query, results, created = row
+        return {
+            'search_id': search_id,
+            'search_type': search_type,
+            'query': query,
+            'results': json.loads(results),
+            'created': created
+        }
+
+# Global search store instance
+search_store = SearchStore(
+    os.environ.get('SEARCH_STORE_PATH', os.path.join('exports', 'searches.db')),
+    ttl=int(os.environ.get('SEARCH_STORE_TTL', 24 * 3600))
+)
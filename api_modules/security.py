@@ -1,45 +1,51 @@
 from functools import wraps
-from flask import request, jsonify
-import time
-from collections import defaultdict, deque
-import threading
+from flask import request, jsonify, g
+import logging
+from api_modules.rate_limit_backends import MemoryBackend, create_backend
+from api_modules.metrics import rate_limit_rejections
+
+logger = logging.getLogger(__name__)
 
 class RateLimiter:
-    """Simple in-memory rate limiter"""
+    """Rate limiter with a pluggable storage backend
+
+    The backend is chosen with the RATE_LIMIT_BACKEND environment variable
+    (memory://, sqlite:///path/to/file.db or redis://host:port/db). Only the
+    shared backends enforce limits across gunicorn workers.
+    """
     
-    def __init__(self):
-        self.requests = defaultdict(deque)
-        self.lock = threading.Lock()
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.fallback = MemoryBackend()
     
-    def is_allowed(self, identifier, max_requests=10, window_seconds=60):
-        """Check if request is allowed based on rate limit"""
-        with self.lock:
-            now = time.time()
-            window_start = now - window_seconds
-            
-            # Clean old requests
-            while self.requests[identifier] and self.requests[identifier][0] < window_start:
-                self.requests[identifier].popleft()
-            
-            # Check if under limit
-            if len(self.requests[identifier]) < max_requests:
-                self.requests[identifier].append(now)
-                return True
-            
-            return False
+    def is_allowed(self, identifier, max_requests=10, window_seconds=60, cost=1):
+        """Check if request is allowed based on rate limit
+        
+        `cost` is how many requests it counts as, e.g. the searches of a batch.
+        """
+        try:
+            return self.backend.hit(identifier, max_requests, window_seconds, cost)
+        except Exception as e:
+            # Keep limiting per process rather than failing open
+            logger.error(f"Rate limit backend error: {str(e)}")
+            return self.fallback.hit(identifier, max_requests, window_seconds, cost)
 
 # Global rate limiter instance
-rate_limiter = RateLimiter()
+rate_limiter = RateLimiter(create_backend())
+
+def client_identifier():
+    """Rate limit identifier of the current request: the client's IP address"""
+    return request.environ.get('REMOTE_ADDR', 'unknown')
 
 def rate_limit(max_requests=10, window_seconds=60):
     """Rate limiting decorator"""
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Use IP address as identifier
-            identifier = request.environ.get('REMOTE_ADDR', 'unknown')
+            identifier = client_identifier()
             
             if not rate_limiter.is_allowed(identifier, max_requests, window_seconds):
+                rate_limit_rejections.labels(request.endpoint or 'unknown').inc()
                 return jsonify({
                     "error": "Rate limit exceeded. Please try again later.",
                     "retry_after": window_seconds
@@ -50,7 +56,11 @@ def rate_limit(max_requests=10, window_seconds=60):
     return decorator
 
 def validate_json_request():
-    """Validate that request contains valid JSON"""
+    """Validate that request contains a JSON object
+    
+    The parsed body is kept in g.json_data so handlers reuse it instead of
+    parsing the request again.
+    """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -64,15 +74,25 @@ def validate_json_request():
             except Exception:
                 return jsonify({"error": "Invalid JSON"}), 400
             
+            if not isinstance(data, dict):
+                return jsonify({"error": "JSON body must be an object"}), 400
+            
+            g.json_data = data
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+# Sent with every response, by the Flask app and the async search endpoint alike
+SECURITY_HEADERS = {
+    'X-Content-Type-Options': 'nosniff',
+    'X-Frame-Options': 'DENY',
+    'X-XSS-Protection': '1; mode=block',
+    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+    'Content-Security-Policy': "default-src 'self'"
+}
+
 def add_security_headers(response):
     """Add security headers to response"""
-    response.headers['X-Content-Type-Options'] = 'nosniff'
-    response.headers['X-Frame-Options'] = 'DENY'
-    response.headers['X-XSS-Protection'] = '1; mode=block'
-    response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
-    response.headers['Content-Security-Policy'] = "default-src 'self'"
+    for name, value in SECURITY_HEADERS.items():
+        response.headers[name] = value
     return response
\ No newline at end of file
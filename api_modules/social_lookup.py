@@ -1,27 +1,87 @@
+import os
 import requests
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote
-import time
+from api_modules.provider_stats import provider_stats
+from api_modules.quota_manager import quota_manager
+from api_modules.upstream import upstream
+from api_modules.platform_rules import platform_rules
 
 logger = logging.getLogger(__name__)
 
+PROFILE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Threads probing the platforms of username searches, shared by all searches of a worker
+probe_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('SOCIAL_PROBE_WORKERS', 16)),
+    thread_name_prefix='social-probe'
+)
+
+class ProfileScan:
+    """Decides from a profile page, fed chunk by chunk, whether the profile exists
+    
+    Each chunk is scanned once for all of the platform rule's indicators,
+    including indicators split across two chunks. feed() returns True, so
+    the rest of the page need not be downloaded, only once the answer is
+    settled: a not-found indicator, or one of the rule's decisive found
+    indicators. Ordinary found indicators and links to the profile show up
+    on soft-404 pages too (in the page's head, say), so after one of those
+    the page is still read to its end or the rule's byte cap, and a
+    not-found indicator anywhere in it wins. For a status-only rule the
+    status code alone decides.
+    """
+    
+    def __init__(self, username, rule):
+        username = username.lower().encode('utf-8')
+        self.rule = rule
+        self.matcher = rule.matcher
+        # Links to the profile depend on the username, so they are not compiled in
+        self.markers = (b'@' + username, b'/' + username)
+        self.overlap = max(rule.matcher.overlap, len(username))
+        self.tail = b''
+        self.verdict = None
+        self.settled = False
+    
+    def feed(self, chunk):
+        if self.settled:
+            return True
+        
+        window = self.tail + chunk.lower()
+        labels = self.matcher.labels_in(window)
+        if 'not_found' in labels:
+            self.verdict = 'not_found'
+            self.settled = True
+        elif 'decisive' in labels:
+            self.verdict = 'found'
+            self.settled = True
+        elif self.verdict is None and ('found' in labels or any(marker in window for marker in self.markers)):
+            self.verdict = 'found'
+        self.tail = window[-self.overlap:]
+        return self.settled
+    
+    def status(self, status_code):
+        """Profile status for a response with this status code and the body fed so far"""
+        if status_code in self.rule.not_found_status:
+            return 'not_found'
+        elif status_code in self.rule.found_status:
+            if self.rule.status_only:
+                return 'found'
+            return self.verdict or 'unknown'
+        else:
+            # Rate limited, forbidden or otherwise unclear
+            return 'unknown'
+
 class SocialLookup:
     """Social media and username lookup functionality"""
     
     def __init__(self):
         self.name = "Social Lookup"
-        self.platforms = {
-            'GitHub': 'https://github.com/{}',
-            'Twitter': 'https://twitter.com/{}',
-            'Instagram': 'https://instagram.com/{}',
-            'LinkedIn': 'https://linkedin.com/in/{}',
-            'Reddit': 'https://reddit.com/user/{}',
-            'TikTok': 'https://tiktok.com/@{}',
-            'YouTube': 'https://youtube.com/@{}',
-            'Facebook': 'https://facebook.com/{}',
-            'Pinterest': 'https://pinterest.com/{}',
-            'Telegram': 'https://t.me/{}'
-        }
+        # {platform: PlatformRule}, compiled from social_platforms.json at import
+        self.platforms = platform_rules
     
     def search_by_username(self, username):
         """Search for username across social media platforms"""
@@ -30,20 +90,26 @@ class SocialLookup:
         # Clean username
         username = username.strip().replace('@', '')
         
-        # Check each platform
-        for platform, url_template in self.platforms.items():
+        # Probe every platform at once, each within its own rate and
+        # concurrency limits; results keep the fastest-first order
+        ordered = provider_stats.order(self.platforms.values(), key=lambda rule: rule.provider)
+        futures = [
+            probe_executor.submit(contextvars.copy_context().run, self._probe_platform, rule, username)
+            for rule in ordered
+        ]
+        for rule, future in zip(ordered, futures):
             try:
-                result = self._check_platform(platform, username, url_template)
+                result = future.result()
                 if result:
                     results.append(result)
                 
-                # Rate limiting
-                time.sleep(0.5)
-                
             except Exception as e:
-                logger.error(f"Error checking {platform} for {username}: {str(e)}")
+                logger.error(f"Error checking {rule.name} for {username}: {str(e)}")
         
-        # Add summary
+        return self._add_summary(username, results)
+    
+    def _add_summary(self, username, results):
+        """Put the username search summary in front of the platform results"""
         found_platforms = [r for r in results if r['status'] == 'found']
         summary = {
             'Username': username,
@@ -103,101 +169,100 @@ class SocialLookup:
         
         return results
     
-    def _check_platform(self, platform, username, url_template):
+    def _probe_platform(self, rule, username):
+        """Check a platform once its rate limit and concurrency limit allow"""
+        if not quota_manager.acquire(rule.provider):
+            return self._platform_quota_exceeded(rule.name, username, rule.profile_url.format(username))
+        
+        with rule.limit:
+            return self._check_platform(rule, username)
+    
+    def _check_platform(self, rule, username):
         """Check if username exists on a specific platform"""
         try:
-            url = url_template.format(username)
-            
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
+            url = rule.url.format(username)
+            scan = ProfileScan(username, rule)
             
-            response = requests.get(url, headers=headers, timeout=10, allow_redirects=True)
+            response = upstream.probe(
+                rule.provider, url, method=rule.method, until=scan.feed, max_bytes=rule.max_bytes,
+                headers=PROFILE_HEADERS, allow_redirects=True
+            )
+            return self._platform_result(
+                rule.name, username, rule.profile_url.format(username), response, scan.status(response.status_code)
+            )
             
-            # Different platforms have different indicators of existence
+        except requests.exceptions.RequestException as e:
+            return self._platform_error(rule.name, username, e)
+    
+    def _platform_result(self, platform, username, url, response, status=None):
+        """Turn a profile page response into a result"""
+        # Different platforms have different indicators of existence
+        if status is None:
             status = self._analyze_response(platform, response, username)
-            
-            if status == 'found':
-                details = {
-                    'Platform': platform,
-                    'Username': username,
-                    'Profile URL': url,
-                    'Status': 'Profile Found',
-                    'Response Code': str(response.status_code),
-                    'Visit Profile': url  # Direct link for frontend
-                }
-            elif status == 'not_found':
-                details = {
-                    'Platform': platform,
-                    'Username': username,
-                    'Status': 'Not Found',
-                    'Response Code': str(response.status_code),
-                    'Check Manually': url  # Still provide link to check manually
-                }
-            else:  # unknown
-                details = {
-                    'Platform': platform,
-                    'Username': username,
-                    'Status': 'Unknown (Check Manually)',
-                    'Profile URL': url,
-                    'Response Code': str(response.status_code),
-                    'Manual Check': url  # Link for manual verification
-                }
-            
-            return {
-                'platform': platform,
-                'status': status,
-                'details': details
+        
+        if status == 'found':
+            details = {
+                'Platform': platform,
+                'Username': username,
+                'Profile URL': url,
+                'Status': 'Profile Found',
+                'Response Code': str(response.status_code),
+                'Visit Profile': url  # Direct link for frontend
             }
-            
-        except requests.exceptions.RequestException as e:
-            return {
-                'platform': platform,
-                'status': 'error',
-                'details': {
-                    'Platform': platform,
-                    'Username': username,
-                    'Error': f'Request failed: {str(e)}'
-                }
+        elif status == 'not_found':
+            details = {
+                'Platform': platform,
+                'Username': username,
+                'Status': 'Not Found',
+                'Response Code': str(response.status_code),
+                'Check Manually': url  # Still provide link to check manually
+            }
+        else:  # unknown
+            details = {
+                'Platform': platform,
+                'Username': username,
+                'Status': 'Unknown (Check Manually)',
+                'Profile URL': url,
+                'Response Code': str(response.status_code),
+                'Manual Check': url  # Link for manual verification
+            }
+        
+        return {
+            'platform': platform,
+            'status': status,
+            'details': details
+        }
+    
+    def _platform_error(self, platform, username, error):
+        """Result for a profile check whose request failed"""
+        return {
+            'platform': platform,
+            'status': 'error',
+            'details': {
+                'Platform': platform,
+                'Username': username,
+                'Error': f'Request failed: {str(error)}'
+            }
+        }
+    
+    def _platform_quota_exceeded(self, platform, username, url):
+        """Result for a platform whose request budget is used up"""
+        return {
+            'platform': platform,
+            'status': 'quota_exceeded',
+            'details': {
+                'Platform': platform,
+                'Username': username,
+                'Error': 'Platform request quota reached, try again later',
+                'Check Manually': url
             }
+        }
     
     def _analyze_response(self, platform, response, username):
         """Analyze HTTP response to determine if profile exists"""
-        status_code = response.status_code
-        content = response.text.lower()
-        
-        # Common indicators
-        not_found_indicators = [
-            'user not found',
-            'page not found',
-            'profile not found',
-            'this account doesn\'t exist',
-            'sorry, that page doesn\'t exist',
-            'the specified user does not exist'
-        ]
-        
-        found_indicators = [
-            f'@{username.lower()}',
-            f'/{username.lower()}',
-            'profile',
-            'followers',
-            'following'
-        ]
-        
-        if status_code == 404:
-            return 'not_found'
-        elif status_code == 200:
-            # Check content for indicators
-            if any(indicator in content for indicator in not_found_indicators):
-                return 'not_found'
-            elif any(indicator in content for indicator in found_indicators):
-                return 'found'
-            else:
-                return 'unknown'
-        elif status_code in [403, 429]:
-            return 'unknown'  # Rate limited or forbidden
-        else:
-            return 'unknown'
+        scan = ProfileScan(username, self.platforms[platform])
+        scan.feed(response.content)
+        return scan.status(response.status_code)
     
     def _generate_usernames(self, full_name):
         """Generate potential usernames from a full name"""
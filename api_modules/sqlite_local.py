@@ -0,0 +1,35 @@
+import os
+import sqlite3
+import threading
+
+class LocalConnection:
+    """One SQLite connection per thread to a database file, safe across fork
+
+    Each thread opens its connection on first use, in autocommit mode with
+    WAL journaling so writers do not block readers. SQLite connections must
+    not be shared across a fork (e.g. gunicorn preload), so a forked child
+    forgets the parent's connections and opens its own. The database
+    file's directory is created if missing.
+    """
+
+    def __init__(self, path, timeout=5):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()
+        os.register_at_fork(after_in_child=self._reset)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _reset(self):
+        self.local = threading.local()
+
+    def get(self):
+        """This thread's connection"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
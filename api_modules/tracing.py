@@ -0,0 +1,166 @@
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+import contextvars
+from functools import wraps
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar('osint_current_span', default=None)
+
+class Span:
+    """One timed step of a trace"""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'attributes',
+                 'start', 'start_perf', 'duration', 'error', 'children')
+
+    def __init__(self, trace_id, name, parent=None, attributes=None):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start = time.time()
+        self.start_perf = time.perf_counter()
+        self.duration = None
+        self.error = None
+        self.children = []
+
+        if parent is not None:
+            parent.children.append(self)
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def finish(self, error=None):
+        self.duration = time.perf_counter() - self.start_perf
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def elapsed_ms(self):
+        duration = self.duration if self.duration is not None else time.perf_counter() - self.start_perf
+        return round(duration * 1000, 3)
+
+    def record(self):
+        """Flat representation used by the JSON-lines exporter"""
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': self.elapsed_ms(),
+            'error': self.error,
+            'attributes': self.attributes
+        }
+
+    def to_dict(self):
+        """Nested span tree, as returned in debug responses"""
+        tree = {
+            'name': self.name,
+            'span_id': self.span_id,
+            'duration_ms': self.elapsed_ms(),
+            'attributes': self.attributes,
+            'children': [child.to_dict() for child in list(self.children)]
+        }
+        if self.error:
+            tree['error'] = self.error
+        return tree
+
+    def walk(self):
+        yield self
+        for child in list(self.children):
+            yield from child.walk()
+
+class JsonLinesExporter:
+    """Append finished traces to a local JSON-lines file, one span per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, root):
+        lines = ''.join(json.dumps(span.record(), default=str) + '\n' for span in root.walk())
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as handle:
+                handle.write(lines)
+
+def _exporter_from_env():
+    path = os.environ.get('TRACE_EXPORT_PATH')
+    return JsonLinesExporter(path) if path else None
+
+exporter = _exporter_from_env()
+
+def begin_trace(name, **attributes):
+    """Start a new trace and make it current; returns (root span, token)"""
+    root = Span(uuid.uuid4().hex, name, attributes=attributes)
+    return root, _current_span.set(root)
+
+def end_trace(root, token, error=None):
+    """Finish a trace started with begin_trace and export it"""
+    root.finish(error)
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # Finished from a different context (e.g. after a streamed response)
+        _current_span.set(None)
+
+    if exporter is not None:
+        try:
+            exporter.export(root)
+        except Exception as e:
+            logger.error(f"Trace export error: {str(e)}")
+
+@contextmanager
+def start_trace(name, **attributes):
+    """Start a new trace for one unit of work; yields the root span"""
+    root, token = begin_trace(name, **attributes)
+    error = None
+    try:
+        yield root
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        end_trace(root, token, error)
+
+@contextmanager
+def span(name, **attributes):
+    """Record a child span of the current trace; does nothing outside a trace"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace_id, name, parent, attributes)
+    token = _current_span.set(child)
+    error = None
+    try:
+        yield child
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        child.finish(error)
+        _current_span.reset(token)
+
+def traced(name):
+    """Decorator recording each call of a function as a span"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            with span(name):
+                return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def current_trace_id():
+    current = _current_span.get()
+    return current.trace_id if current else None
@@ -0,0 +1,205 @@
+import os
+import time
+import socket
+import logging
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from api_modules.provider_stats import provider_stats
+from api_modules.cassette import cassette_from_env, request_key, encode_response, decode_response, RecordedResponse
+from api_modules import tracing
+
+logger = logging.getLogger(__name__)
+
+def rewrite_url(override_url, url):
+    """Send https://host/path to <override_url>/host/path (local stand-ins for benchmarks)"""
+    parts = urlsplit(url)
+    rewritten = f"{override_url}/{parts.netloc}{parts.path}"
+    return f"{rewritten}?{parts.query}" if parts.query else rewritten
+
+def split_server(server, default_port):
+    """'host:port' (or just 'host') as a (host, port) pair"""
+    host, _, port = server.rpartition(':')
+    if not host:
+        return server, default_port
+    return host, int(port)
+
+def override_resolver(resolver_class, server):
+    """A dnspython resolver that only asks `server` (a local stand-in)"""
+    host, port = split_server(server, 53)
+    resolver = resolver_class(configure=False)
+    resolver.nameservers = [host]
+    resolver.port = port
+    return resolver
+
+def read_prefix(chunks, until=None, max_bytes=None):
+    """Join chunks until until(chunk) returns True or max_bytes have been read"""
+    read = []
+    size = 0
+    for chunk in chunks:
+        read.append(chunk)
+        size += len(chunk)
+        if (until is not None and until(chunk)) or (max_bytes is not None and size >= max_bytes):
+            break
+    return b''.join(read)
+
+def split_chunks(content, chunk_size):
+    return (content[start:start + chunk_size] for start in range(0, len(content), chunk_size))
+
+class UpstreamClient:
+    """Shared client for every call to an upstream provider
+
+    Covers HTTP providers as well as DNS and WHOIS queries. Keeps pooled
+    keep-alive connections, records latency and errors per provider, adds a
+    span to the current trace, and picks each HTTP call's timeout from that
+    provider's observed latency rather than a fixed value. The override
+    settings send HTTP, DNS and WHOIS queries to local stand-ins instead
+    (see benchmarks/fake_providers.py), and a cassette records every call
+    or replays recorded ones (see cassette.py).
+    """
+
+    def __init__(self, default_timeout=10, pool_size=20, override_url=None, dns_override=None,
+                 whois_override=None, cassette=None):
+        self.default_timeout = default_timeout
+        self.override_url = override_url.rstrip('/') if override_url else None
+        self.dns_override = dns_override
+        self.whois_override = whois_override
+        self.cassette = cassette
+        self.resolver = None
+        self.session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def timeout_for(self, provider):
+        return provider_stats.timeout_for(provider, self.default_timeout)
+
+    def request(self, provider, method, url, **kwargs):
+        """Send a request on behalf of a provider and record how it went"""
+        return self._call(provider, method, url, kwargs, lambda url: self.session.request(method, url, **kwargs))
+
+    def probe(self, provider, url, method='GET', until=None, max_bytes=None, chunk_size=16384, **kwargs):
+        """request() that reads no more of the body than a check needs
+
+        A successful GET has its body read in chunks of `chunk_size` bytes
+        until until(chunk) returns True or `max_bytes` have arrived, and the
+        connection is then dropped with the rest unread. Any other response
+        is decided by its status alone and its body is not read. Returns a
+        response holding only the bytes that were read.
+        """
+        def send(url):
+            response = self.session.request(method, url, stream=True, **kwargs)
+            with response:
+                if method != 'GET' or not 200 <= response.status_code < 300:
+                    content = b''
+                else:
+                    content = read_prefix(response.iter_content(chunk_size), until, max_bytes)
+            return RecordedResponse(response.status_code, content, response.encoding, response.url)
+
+        response = self._call(provider, method, url, kwargs, send)
+        if until is not None and self.cassette is not None and self.cassette.mode == 'replay':
+            # A replayed body was read when it was recorded; show it to the check now
+            read_prefix(split_chunks(response.content, chunk_size), until)
+        return response
+
+    def _call(self, provider, method, url, kwargs, send):
+        """send(url) with the provider's stats, trace span, timeout and cassette applied"""
+        kwargs.setdefault('timeout', self.timeout_for(provider))
+        # Recordings are keyed by the real provider URL, whatever serves it
+        key = request_key(method, url, kwargs.get('params'))
+        if self.override_url:
+            url = rewrite_url(self.override_url, url)
+
+        with tracing.span(f"provider:{provider}", method=method, url=url, timeout=kwargs['timeout']) as span:
+            start = time.perf_counter()
+            try:
+                if self.cassette is not None:
+                    response = self.cassette.play('http', key, lambda: send(url), encode_response, decode_response)
+                else:
+                    response = send(url)
+            except requests.exceptions.RequestException:
+                provider_stats.record(provider, time.perf_counter() - start, error=True)
+                raise
+
+            # Rate limiting and server errors count against the provider
+            error = response.status_code == 429 or response.status_code >= 500
+            provider_stats.record(provider, time.perf_counter() - start, error=error)
+
+            if span is not None:
+                span.set('status_code', response.status_code)
+                span.set('bytes', len(response.content))
+            return response
+
+    def get(self, provider, url, **kwargs):
+        return self.request(provider, 'GET', url, **kwargs)
+
+    def resolve(self, name, record_type):
+        """DNS query returning the answer records as strings"""
+        with tracing.span('dns', query=name, record_type=record_type) as span:
+            with provider_stats.track('dns'):
+                if self.cassette is not None:
+                    records = self.cassette.play('dns', f"{name} {record_type}", lambda: self._resolve(name, record_type))
+                else:
+                    records = self._resolve(name, record_type)
+
+            if span is not None:
+                span.set('records', len(records))
+            return records
+
+    def _resolve(self, name, record_type):
+        import dns.resolver
+
+        if self.dns_override:
+            if self.resolver is None:
+                self.resolver = override_resolver(dns.resolver.Resolver, self.dns_override)
+            answer = self.resolver.resolve(name, record_type)
+        else:
+            answer = dns.resolver.resolve(name, record_type)
+        return [str(record) for record in answer]
+
+    def whois(self, domain):
+        """WHOIS query returning the parsed python-whois entry"""
+        with tracing.span('whois', domain=domain):
+            with provider_stats.track('whois'):
+                if self.cassette is not None:
+                    # Recorded as the raw registry text and parsed again on replay
+                    return self.cassette.play(
+                        'whois', domain, lambda: self._whois(domain),
+                        encode=lambda entry: entry.text,
+                        decode=lambda text, key: self._parse_whois(key, text)
+                    )
+                return self._whois(domain)
+
+    def _whois(self, domain):
+        import whois
+
+        if self.whois_override:
+            return self._whois_query(domain)
+        return whois.whois(domain)
+
+    def _parse_whois(self, domain, text):
+        from whois.parser import WhoisEntry
+
+        return WhoisEntry.load(domain, text)
+
+    def _whois_query(self, domain):
+        """Plain WHOIS query to whois_override, parsed the way python-whois parses its own"""
+        with socket.create_connection(split_server(self.whois_override, 43), timeout=self.default_timeout) as conn:
+            conn.sendall(domain.encode('idna') + b'\r\n')
+            chunks = []
+            while True:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+
+        return self._parse_whois(domain, b''.join(chunks).decode('utf-8', errors='replace'))
+
+# Global upstream client instance
+upstream = UpstreamClient(
+    override_url=os.environ.get('UPSTREAM_OVERRIDE'),
+    dns_override=os.environ.get('UPSTREAM_DNS_OVERRIDE'),
+    whois_override=os.environ.get('UPSTREAM_WHOIS_OVERRIDE'),
+    cassette=cassette_from_env()
+)
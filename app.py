@@ -1,43 +1,90 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, g, Response, stream_with_context
 from flask_cors import CORS
 from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import logging
-from datetime import datetime
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 import json
 
-# Import our custom modules
-from api_modules.whois_lookup import WhoisLookup
-from api_modules.ip_lookup import IPLookup
-from api_modules.phone_lookup import PhoneLookup
-from api_modules.email_lookup import EmailLookup
-from api_modules.social_lookup import SocialLookup
-from api_modules.export_handler import ExportHandler
+# Import our custom modules (lookups and exports are loaded on first use, see below)
 from api_modules.input_validator import InputValidator
-from api_modules.security import rate_limit, validate_json_request, add_security_headers
+from api_modules.lazy import lazy_module, lazy_instance, preload
+from api_modules.json_provider import FastJSONProvider
+from api_modules.compression import CompressionMiddleware
+from api_modules.security import rate_limit, rate_limiter, client_identifier, validate_json_request, add_security_headers
+from api_modules.quota_manager import quota_manager
+from api_modules.search_store import search_store
+from api_modules.export_jobs import export_jobs
+from api_modules.export_cache import export_cache
+from api_modules.provider_stats import provider_stats
+from api_modules import metrics
+from api_modules import tracing
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-app.wsgi_app = ProxyFix(app.wsgi_app)
+app.json = FastJSONProvider(app)
+
+# Reverse proxies in front of the app. Their X-Forwarded-* headers give the
+# client address the rate limits key on; with none in front, those headers
+# come from the client itself and are ignored.
+PROXY_HOPS = int(os.environ.get('PROXY_HOPS', 0))
+if PROXY_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_HOPS, x_proto=PROXY_HOPS)
+app.wsgi_app = CompressionMiddleware(
+    app.wsgi_app,
+    min_size=int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+)
 
 # Configure CORS
-CORS(app, origins=["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:8000", "http://127.0.0.1:8000"])
+CORS_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:3000", "http://localhost:8000", "http://127.0.0.1:8000"]
+CORS(app, origins=CORS_ORIGINS)
+
+@app.before_request
+def start_request_instrumentation():
+    g.request_start = time.perf_counter()
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.search_type = ''
+    metrics.http_requests_in_flight.labels(g.metrics_endpoint).inc()
+    g.trace, g.trace_token = tracing.begin_trace(g.metrics_endpoint, method=request.method)
 
 # Add security headers to all responses
 @app.after_request
 def after_request(response):
+    endpoint = g.get('metrics_endpoint', 'unmatched')
+    search_type = g.get('search_type', '')
+    metrics.http_requests.labels(endpoint, request.method, search_type, str(response.status_code)).inc()
+    if 'request_start' in g:
+        metrics.http_request_duration.labels(endpoint, search_type).observe(time.perf_counter() - g.request_start)
+    if 'trace' in g:
+        response.headers['X-Trace-Id'] = g.trace.trace_id
     return add_security_headers(response)
 
-# Initialize API modules
-whois_lookup = WhoisLookup()
-ip_lookup = IPLookup()
-phone_lookup = PhoneLookup()
-email_lookup = EmailLookup()
-social_lookup = SocialLookup()
-export_handler = ExportHandler()
+@app.teardown_request
+def finish_request_instrumentation(error=None):
+    if 'metrics_endpoint' in g:
+        metrics.http_requests_in_flight.labels(g.metrics_endpoint).dec()
+    if 'trace' in g:
+        tracing.end_trace(g.trace, g.trace_token, error)
+
+# Initialize API modules. Each is imported and created on first use, so a
+# worker that never exports a PDF never loads reportlab. Set PRELOAD_MODULES
+# (or run gunicorn with preload) to load them all up front instead.
+whois_lookup = lazy_instance('api_modules.whois_lookup', 'WhoisLookup')
+ip_lookup = lazy_instance('api_modules.ip_lookup', 'IPLookup')
+phone_lookup = lazy_instance('api_modules.phone_lookup', 'PhoneLookup')
+email_lookup = lazy_instance('api_modules.email_lookup', 'EmailLookup')
+social_lookup = lazy_instance('api_modules.social_lookup', 'SocialLookup')
+export_module = lazy_module('api_modules.export_handler')
+export_handler = lazy_instance('api_modules.export_handler', 'ExportHandler')
+
+if os.environ.get('PRELOAD_MODULES', '').lower() in ('1', 'true', 'yes'):
+    preload()
 
 @app.route('/')
 def home():
@@ -48,75 +95,188 @@ def home():
         "timestamp": datetime.now().isoformat()
     })
 
+# Searches a client may run per minute, alone or within batches
+SEARCHES_PER_MINUTE = 30
+
 @app.route('/api/search', methods=['POST'])
-@rate_limit(max_requests=30, window_seconds=60)  # 30 requests per minute
+@rate_limit(max_requests=SEARCHES_PER_MINUTE, window_seconds=60)
 @validate_json_request()
 def search():
     """Main search endpoint that handles different types of searches"""
     try:
-        data = request.get_json()
+        data = g.json_data
         
         search_type = data.get('type')
         search_query = data.get('query')
         
-        # Validate input
-        is_valid, result = InputValidator.validate_search_input(search_type, search_query)
-        if not is_valid:
-            return jsonify({"error": result}), 400
+        # Validate input (type 'auto' detects the type from the query)
+        parsed, error = InputValidator.parse_search_input(search_type, search_query)
+        if error:
+            return jsonify({"error": error}), 400
         
-        # Use sanitized query
-        search_query = result
+        g.search_type = parsed.search_type
+        g.trace.set('search_type', parsed.search_type)
         
-        logger.info(f"Search request: type={search_type}, query={search_query}")
+        logger.info(f"Search request: type={parsed.search_type}, query={parsed.value}")
         
-        results = []
+        response = _run_search(parsed)
         
-        if search_type == 'email':
-            results = email_lookup.search(search_query)
-        elif search_type == 'phone':
-            results = phone_lookup.search(search_query)
-        elif search_type == 'ip':
-            results = ip_lookup.search(search_query)
-        elif search_type == 'domain':
-            results = whois_lookup.search(search_query)
-        elif search_type == 'name':
-            results = social_lookup.search_by_name(search_query)
-        elif search_type == 'username':
-            results = social_lookup.search_by_username(search_query)
-        else:
-            return jsonify({"error": "Invalid search type"}), 400
+        # Debug requests get the span tree of this search
+        if data.get('debug'):
+            response["trace"] = g.trace.to_dict()
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        return jsonify({"error": "Internal server error"}), 500
+
+def _run_search(parsed):
+    """Run a validated search, store its results and return the search response"""
+    search_type = parsed.search_type
+    search_query = parsed.value
+    
+    if search_type == 'email':
+        results = email_lookup.search(search_query, parsed)
+    elif search_type == 'phone':
+        results = phone_lookup.search(search_query, parsed)
+    elif search_type == 'ip':
+        results = ip_lookup.search(search_query, parsed)
+    elif search_type == 'domain':
+        results = whois_lookup.search(search_query, parsed)
+    elif search_type == 'name':
+        results = social_lookup.search_by_name(search_query)
+    else:
+        results = social_lookup.search_by_username(search_query)
+    
+    # Keep the results server-side so exports can refer to them by ID
+    try:
+        search_id = search_store.save(search_type, search_query, results)
+    except Exception as e:
+        logger.error(f"Search store error: {str(e)}")
+        search_id = None
+    
+    return {
+        "status": "success",
+        "search_id": search_id,
+        "search_type": search_type,
+        "query": search_query,
+        "results": results,
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Most queries a single batch search may hold
+MAX_BATCH_QUERIES = 50
+
+# Threads running the searches of batch requests, shared by all requests of a worker
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('BATCH_WORKERS', 4)),
+    thread_name_prefix='batch-search'
+)
+
+def _batch_search(parsed):
+    with tracing.span('search:batch_item', search_type=parsed.search_type):
+        return _run_search(parsed)
+
+@app.route('/api/search/batch', methods=['POST'])
+@rate_limit(max_requests=5, window_seconds=60)  # 5 batches per minute
+@validate_json_request()
+def search_batch():
+    """Run a list of searches of mixed types; the type of each is detected unless one is given"""
+    try:
+        data = g.json_data
+        
+        search_type = data.get('type', 'auto')
+        queries = data.get('queries')
+        
+        if not isinstance(queries, list) or not queries:
+            return jsonify({"error": "queries must be a non-empty list"}), 400
+        if len(queries) > MAX_BATCH_QUERIES:
+            return jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries per batch"}), 400
+        
+        validated = InputValidator.validate_bulk(search_type, queries)
+        
+        # Queries that normalize to the same indicator are searched once
+        unique = {}
+        for parsed, error in validated:
+            if parsed is not None:
+                unique.setdefault((parsed.search_type, parsed.normalized), parsed)
+        
+        # Each search counts against the same budget as a single search
+        if unique and not rate_limiter.is_allowed(client_identifier(), SEARCHES_PER_MINUTE, 60, cost=len(unique)):
+            metrics.rate_limit_rejections.labels(request.endpoint or 'unknown').inc()
+            return jsonify({
+                "error": f"Batch of {len(unique)} searches exceeds the limit of {SEARCHES_PER_MINUTE} searches per minute.",
+                "retry_after": 60
+            }), 429
+        
+        # Each search runs in a copy of this request's context so its spans
+        # join the request's trace
+        futures = {
+            key: batch_executor.submit(contextvars.copy_context().run, _batch_search, parsed)
+            for key, parsed in unique.items()
+        }
+        
+        logger.info(f"Batch search request: {len(queries)} queries, {len(futures)} searches")
+        
+        results = []
+        for query, (parsed, error) in zip(queries, validated):
+            if error:
+                results.append({"status": "error", "query": query, "error": error})
+                continue
+            try:
+                # A shared result still echoes this entry's own query
+                result = futures[(parsed.search_type, parsed.normalized)].result()
+                results.append({**result, "query": parsed.value})
+            except Exception as e:
+                logger.error(f"Batch search error for {parsed.value}: {str(e)}")
+                results.append({"status": "error", "query": parsed.value, "error": "Search failed"})
         
         return jsonify({
             "status": "success",
-            "search_type": search_type,
-            "query": search_query,
             "results": results,
             "timestamp": datetime.now().isoformat()
         })
         
     except Exception as e:
-        logger.error(f"Search error: {str(e)}")
+        logger.error(f"Batch search error: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/api/quotas', methods=['GET'])
+def quotas():
+    """Remaining upstream provider budget"""
+    return jsonify({
+        "status": "success",
+        "quotas": quota_manager.remaining(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/api/stats/providers', methods=['GET'])
+def provider_statistics():
+    """Rolling latency percentiles, error rates and timeouts per provider"""
+    return jsonify({
+        "status": "success",
+        "providers": provider_stats.snapshot(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/export/pdf', methods=['POST'])
 @rate_limit(max_requests=5, window_seconds=60)  # 5 exports per minute
 @validate_json_request()
 def export_pdf():
     """Export search results to PDF"""
     try:
-        data = request.get_json()
+        data = g.json_data
         
         if not data or 'results' not in data:
             return jsonify({"error": "Results data required"}), 400
         
-        pdf_buffer = export_handler.generate_pdf(data['results'], data.get('query', ''))
-        
-        return send_file(
-            pdf_buffer,
-            as_attachment=True,
-            download_name=f"osint_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf",
-            mimetype='application/pdf'
-        )
+        return _send_pdf(data['results'], data.get('query', ''))
         
     except Exception as e:
         logger.error(f"PDF export error: {str(e)}")
@@ -128,24 +288,330 @@ def export_pdf():
 def export_csv():
     """Export search results to CSV"""
     try:
-        data = request.get_json()
+        data = g.json_data
         
         if not data or 'results' not in data:
             return jsonify({"error": "Results data required"}), 400
         
-        csv_buffer = export_handler.generate_csv(data['results'], data.get('query', ''))
+        return _stream_csv(data['results'], data.get('query', ''))
+        
+    except Exception as e:
+        logger.error(f"CSV export error: {str(e)}")
+        return jsonify({"error": "CSV generation failed"}), 500
+
+@app.route('/api/searches/<search_id>', methods=['GET'])
+def get_search(search_id):
+    """Return a stored search"""
+    stored = search_store.get(search_id)
+    if not stored:
+        return jsonify({"error": "Search not found or expired"}), 404
+    
+    # Stored searches never change, so the ID is a stable validator
+    response = jsonify({"status": "success", **stored})
+    response.set_etag(search_id)
+    response.last_modified = datetime.fromtimestamp(stored['created'], timezone.utc)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/export/pdf/<search_id>', methods=['GET'])
+@rate_limit(max_requests=5, window_seconds=60)  # 5 exports per minute
+def export_stored_pdf(search_id):
+    """Export a stored search to PDF"""
+    try:
+        stored = search_store.get(search_id)
+        if not stored:
+            return jsonify({"error": "Search not found or expired"}), 404
+        
+        return _send_pdf(stored['results'], stored['query'])
         
-        return send_file(
-            csv_buffer,
-            as_attachment=True,
-            download_name=f"osint_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mimetype='text/csv'
-        )
+    except Exception as e:
+        logger.error(f"PDF export error: {str(e)}")
+        return jsonify({"error": "PDF generation failed"}), 500
+
+@app.route('/api/export/csv/<search_id>', methods=['GET'])
+@rate_limit(max_requests=5, window_seconds=60)  # 5 exports per minute
+def export_stored_csv(search_id):
+    """Export a stored search to CSV"""
+    try:
+        stored = search_store.get(search_id)
+        if not stored:
+            return jsonify({"error": "Search not found or expired"}), 404
+        
+        return _stream_csv(stored['results'], stored['query'])
         
     except Exception as e:
         logger.error(f"CSV export error: {str(e)}")
         return jsonify({"error": "CSV generation failed"}), 500
 
+@app.route('/api/export/jobs', methods=['POST'])
+@rate_limit(max_requests=5, window_seconds=60)  # 5 exports per minute
+@validate_json_request()
+def create_export_job():
+    """Start a background PDF export from a stored search or posted results"""
+    try:
+        data = g.json_data
+        
+        if data.get('format', 'pdf') != 'pdf':
+            return jsonify({"error": "Only PDF export jobs are supported"}), 400
+        
+        if data.get('search_id'):
+            stored = search_store.get(data['search_id'])
+            if not stored:
+                return jsonify({"error": "Search not found or expired"}), 404
+            results, query = stored['results'], stored['query']
+        elif 'results' in data:
+            results, query = data['results'], data.get('query', '')
+        else:
+            return jsonify({"error": "search_id or results required"}), 400
+        
+        job_id, _ = export_jobs.submit(results, query)
+        
+        return jsonify({
+            "status": "pending",
+            "job_id": job_id,
+            "status_url": f"/api/export/jobs/{job_id}",
+            "download_url": f"/api/export/jobs/{job_id}/download"
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"Export job error: {str(e)}")
+        return jsonify({"error": "Export job could not be started"}), 500
+
+@app.route('/api/export/jobs/<job_id>', methods=['GET'])
+def export_job_status(job_id):
+    """Poll an export job; ?wait=N blocks up to N seconds (max 30) for it to finish"""
+    wait = min(request.args.get('wait', 0, type=float), 30)
+    status = export_jobs.wait(job_id, wait) if wait > 0 else export_jobs.status(job_id)
+    
+    if not status:
+        return jsonify({"error": "Export job not found"}), 404
+    
+    return jsonify(status)
+
+@app.route('/api/export/jobs/<job_id>/download', methods=['GET'])
+def download_export_job(job_id):
+    """Download a finished export job"""
+    path = export_jobs.file_path(job_id)
+    if not path:
+        status = export_jobs.status(job_id)
+        if not status:
+            return jsonify({"error": "Export job not found"}), 404
+        return jsonify({"error": f"Export job is {status['status']}"}), 409
+    
+    return send_file(
+        os.path.abspath(path),
+        as_attachment=True,
+        download_name=f"osint_report_{job_id[:8]}.pdf",
+        mimetype='application/pdf'
+    )
+
+# Streamed export formats: (mimetype, file extension)
+STREAM_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows')
+}
+
+@app.route('/api/export/<any(ndjson, parquet, arrow):fmt>', methods=['POST'])
+@rate_limit(max_requests=5, window_seconds=60)  # 5 exports per minute
+@validate_json_request()
+def export_bulk(fmt):
+    """Export search results as NDJSON, Parquet or Arrow IPC"""
+    try:
+        data = g.json_data
+        
+        if not data or 'results' not in data:
+            return jsonify({"error": "Results data required"}), 400
+        
+        return _stream_bulk(fmt, data['results'], data.get('query', ''))
+        
+    except export_module.ColumnarExportUnavailable as e:
+        return jsonify({"error": str(e)}), 501
+    except Exception as e:
+        logger.error(f"{fmt} export error: {str(e)}")
+        return jsonify({"error": "Export failed"}), 500
+
+@app.route('/api/export/<any(ndjson, parquet, arrow):fmt>/<search_id>', methods=['GET'])
+@rate_limit(max_requests=5, window_seconds=60)  # 5 exports per minute
+def export_stored_bulk(fmt, search_id):
+    """Export a stored search as NDJSON, Parquet or Arrow IPC"""
+    try:
+        stored = search_store.get(search_id)
+        if not stored:
+            return jsonify({"error": "Search not found or expired"}), 404
+        
+        return _stream_bulk(fmt, stored['results'], stored['query'])
+        
+    except export_module.ColumnarExportUnavailable as e:
+        return jsonify({"error": str(e)}), 501
+    except Exception as e:
+        logger.error(f"{fmt} export error: {str(e)}")
+        return jsonify({"error": "Export failed"}), 500
+
+# Most stored searches a single combined export may include
+MAX_COMBINED_SEARCHES = 20
+
+@app.route('/api/export/combined', methods=['POST'])
+@rate_limit(max_requests=5, window_seconds=60)  # 5 exports per minute
+@validate_json_request()
+def export_combined():
+    """Export several stored searches as one zip: merged PDF, per-search CSVs and a manifest"""
+    try:
+        data = g.json_data
+        search_ids = data.get('search_ids')
+        
+        if not isinstance(search_ids, list) or not search_ids or not all(isinstance(i, str) for i in search_ids):
+            return jsonify({"error": "search_ids must be a non-empty list of search IDs"}), 400
+        
+        search_ids = list(dict.fromkeys(search_ids))
+        if len(search_ids) > MAX_COMBINED_SEARCHES:
+            return jsonify({"error": f"At most {MAX_COMBINED_SEARCHES} searches per combined export"}), 400
+        
+        searches = [search_store.get(search_id) for search_id in search_ids]
+        missing = [search_id for search_id, stored in zip(search_ids, searches) if not stored]
+        if missing:
+            return jsonify({"error": "Search not found or expired", "missing": missing}), 404
+        
+        return _stream_response(_combined_entries(searches), 'application/zip', 'zip', "Combined export")
+        
+    except Exception as e:
+        logger.error(f"Combined export error: {str(e)}")
+        return jsonify({"error": "Combined export failed"}), 500
+
+def _combined_entries(searches):
+    # Start the PDF in the export pool now so it renders while the CSVs stream
+    _, pdf_future = export_jobs.submit(None, searches=searches)
+    
+    csv_names = [
+        f"csv/{i:02d}_{stored['search_type']}_{stored['search_id'][:8]}.csv"
+        for i, stored in enumerate(searches, 1)
+    ]
+    manifest = {
+        'generated_at': datetime.now().isoformat(),
+        'report': 'report.pdf',
+        'searches': [
+            {
+                'search_id': stored['search_id'],
+                'search_type': stored['search_type'],
+                'query': stored['query'],
+                'created': datetime.fromtimestamp(stored['created']).isoformat(),
+                'result_count': len(stored['results']),
+                'csv': csv_name
+            }
+            for stored, csv_name in zip(searches, csv_names)
+        ]
+    }
+    
+    entries = [('manifest.json', [json.dumps(manifest, indent=2).encode('utf-8')], True)]
+    for stored, csv_name in zip(searches, csv_names):
+        entries.append((csv_name, export_handler.iter_csv(stored['results'], stored['query']), True))
+    # PDF streams are already compressed, so the report is stored as-is
+    entries.append(('report.pdf', lambda: _file_chunks(pdf_future.result(timeout=300)), False))
+    
+    return export_handler.iter_zip(entries)
+
+def _file_chunks(path, chunk_size=65536):
+    with open(path, 'rb') as handle:
+        while True:
+            chunk = handle.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+def _export_filename(extension):
+    return f"osint_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+def _send_pdf(results, query):
+    key = export_cache.key('pdf', results, query)
+    not_modified = _not_modified(key)
+    if not_modified:
+        return not_modified
+    
+    pdf_path = export_cache.get(key, 'pdf')
+    if pdf_path is None:
+        # Rendered in the export process pool so this worker keeps serving requests
+        pdf_path = export_cache.put_file(key, 'pdf', export_jobs.render(results, query))
+    
+    return _send_cached(key, pdf_path, 'application/pdf', 'pdf')
+
+def _stream_csv(results, query):
+    return _cached_stream(
+        'csv', results, query, lambda: export_handler.iter_csv(results, query),
+        'text/csv', 'csv', "CSV export"
+    )
+
+def _stream_bulk(fmt, results, query):
+    if fmt == 'ndjson':
+        render = lambda: export_handler.iter_ndjson(results, query)
+    else:
+        render = lambda: export_handler.iter_columnar(results, query, fmt)
+    
+    mimetype, extension = STREAM_FORMATS[fmt]
+    return _cached_stream(fmt, results, query, render, mimetype, extension, f"{fmt} export")
+
+def _cached_stream(fmt, results, query, render, mimetype, extension, label):
+    """Serve an export from the cache, or stream it while filling the cache"""
+    key = export_cache.key(fmt, results, query)
+    not_modified = _not_modified(key)
+    if not_modified:
+        return not_modified
+    
+    cached_path = export_cache.get(key, fmt)
+    if cached_path is not None:
+        return _send_cached(key, cached_path, mimetype, extension)
+    
+    response = _stream_response(export_cache.tee(key, fmt, render()), mimetype, extension, label)
+    response.set_etag(key, weak=True)
+    return response
+
+def _send_cached(key, path, mimetype, extension):
+    response = send_file(
+        os.path.abspath(path),
+        as_attachment=True,
+        download_name=_export_filename(extension),
+        mimetype=mimetype,
+        etag=False
+    )
+    # Weak: a re-render after eviction has new timestamps but the same content
+    response.set_etag(key, weak=True)
+    return response
+
+def _not_modified(key):
+    """Response for a request whose If-None-Match already names this export, else None
+    
+    GET and HEAD get 304 Not Modified. Any other method (the POST exports)
+    gets 412 Precondition Failed, as RFC 9110 requires.
+    """
+    if not request.if_none_match.contains_weak(key):
+        return None
+    
+    response = Response(status=304 if request.method in ('GET', 'HEAD') else 412)
+    response.set_etag(key, weak=True)
+    return response
+
+def _stream_response(chunks, mimetype, extension, label):
+    # Produce the first chunk now so setup errors still get a proper status code
+    first = next(chunks, b'')
+    
+    def body():
+        yield first
+        yield from chunks
+    
+    return Response(
+        stream_with_context(_log_stream_errors(body(), label)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f"attachment; filename={_export_filename(extension)}"}
+    )
+
+def _log_stream_errors(chunks, label):
+    """Pass chunks through, logging failures that happen after headers are sent"""
+    try:
+        yield from chunks
+    except Exception as e:
+        logger.error(f"{label} stream error: {str(e)}")
+        raise
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
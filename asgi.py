@@ -0,0 +1,16 @@
+"""ASGI entry point: the async search endpoint on an event loop, the rest of the API via Flask
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000 --proxy-headers
+
+Flask routes run on a pool of WSGI_THREADS threads (default 16), as they
+would in a gthread worker.
+"""
+import os
+from a2wsgi import WSGIMiddleware
+from app import app, CORS_ORIGINS
+from api_modules.async_search import AsyncSearchApp
+
+application = AsyncSearchApp(
+    WSGIMiddleware(app, workers=int(os.environ.get('WSGI_THREADS', 16))),
+    cors_origins=CORS_ORIGINS
+)
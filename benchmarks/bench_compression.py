@@ -0,0 +1,56 @@
+"""Response size and encode time with gzip and brotli for search-sized payloads.
+
+    python benchmarks/bench_compression.py [--results 50 1000 10000]
+
+Runs the JSON body of a stored-search response through CompressionMiddleware
+with each encoding and reports bytes on the wire and time spent compressing.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+from api_modules.compression import CompressionMiddleware, brotli
+from bench_pdf import make_results
+
+def make_app(payload):
+    app = Flask(__name__)
+
+    @app.route('/')
+    def results():
+        return jsonify(payload)
+
+    return app
+
+def fetch(wsgi_app, accept_encoding):
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': '/', 'SERVER_NAME': 'bench', 'SERVER_PORT': '80',
+        'wsgi.url_scheme': 'http', 'wsgi.input': None, 'HTTP_ACCEPT_ENCODING': accept_encoding
+    }
+    start = time.perf_counter()
+    body = b''.join(wsgi_app(environ, lambda status, headers, exc_info=None: None))
+    return len(body), time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--results', type=int, nargs='+', default=[50, 1000, 10000])
+    options = parser.parse_args()
+
+    encodings = ['identity', 'gzip'] + (['br'] if brotli is not None else [])
+    print(f"{'results':>8}" + ''.join(f"{name + ' KB':>12}{name + ' ms':>12}" for name in encodings))
+    for count in options.results:
+        app = make_app({'status': 'success', 'results': make_results(count)})
+        middleware = CompressionMiddleware(app.wsgi_app)
+
+        row = f"{count:>8}"
+        for encoding in encodings:
+            fetch(middleware, encoding)
+            size, seconds = min((fetch(middleware, encoding) for _ in range(5)), key=lambda r: r[1])
+            row += f"{size / 1024:>12.1f}{seconds * 1000:>12.1f}"
+        print(row)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""JSON serialization cost of large batch-style responses, stdlib vs orjson.
+
+    python benchmarks/bench_json.py [--searches 1 20 100] [--results 200] [--repeat 5]
+
+Each response holds `searches` search payloads of `results` results, shaped
+like /api/search output. Times are the best of `repeat` runs of building the
+Flask response (dumps) and parsing the body back (loads).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from api_modules.json_provider import FastJSONProvider, orjson
+from bench_pdf import make_results
+
+def make_batch(searches, results):
+    return {
+        'status': 'success',
+        'results': [
+            {
+                'status': 'success',
+                'search_type': 'username',
+                'query': f"user{i}",
+                'search_id': f"{i:032x}",
+                'timestamp': '2024-01-01T00:00:00',
+                'results': make_results(results)
+            }
+            for i in range(searches)
+        ]
+    }
+
+def best_of(repeat, function):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--searches', type=int, nargs='+', default=[1, 20, 100])
+    parser.add_argument('--results', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    options = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed; FastJSONProvider falls back to the stdlib encoder")
+
+    app = Flask(__name__)
+    providers = [('stdlib', DefaultJSONProvider(app)), ('fast', FastJSONProvider(app))]
+
+    print(f"{'searches':>9}{'MB':>8}" + ''.join(f"{name + ' dumps':>14}{name + ' loads':>14}" for name, _ in providers) + f"{'speedup':>9}")
+    with app.app_context():
+        for searches in options.searches:
+            batch = make_batch(searches, options.results)
+            body = providers[0][1].response(batch).get_data()
+
+            timings = []
+            for _, provider in providers:
+                timings.append(best_of(options.repeat, lambda: provider.response(batch).get_data()))
+                timings.append(best_of(options.repeat, lambda: provider.loads(body)))
+
+            row = f"{searches:>9}{len(body) / 1e6:>8.1f}"
+            row += ''.join(f"{seconds * 1000:>12.1f}ms" for seconds in timings)
+            row += f"{(timings[0] + timings[1]) / (timings[2] + timings[3]):>8.1f}x"
+            print(row)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""Time every lookup offline and reproducibly against a recorded cassette.
+
+    python benchmarks/bench_lookups.py --record lookups.jsonl.gz
+    python benchmarks/bench_lookups.py --cassette lookups.jsonl.gz [--latency-scale 1] [--runs 5] [--async]
+
+--record runs each search once through the sync lookups with real upstream
+calls (point them at benchmarks/fake_providers.py with the UPSTREAM_*
+overrides, or at the real providers) and writes what the providers answered
+to the cassette. Without --record the same searches are replayed from the
+cassette, with the recorded provider latencies multiplied by
+--latency-scale (0 measures the lookups' own CPU time). --async times the
+asyncio lookups instead. Each search also reports the provider body bytes
+its last run read, from the `bytes` of its provider trace spans.
+
+Provider quotas are switched off and the HIBP and NumVerify lookups get a
+placeholder key so that every code path runs.
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_modules import tracing
+from api_modules.cassette import Cassette
+from api_modules.upstream import upstream
+from api_modules.quota_manager import quota_manager
+
+SEARCHES = [
+    ('ip', '8.8.8.8'),
+    ('email', 'someone@example.com'),
+    ('phone', '+14155552671'),
+    ('domain', 'example.com'),
+    ('username', 'octocat'),
+    ('name', 'Ada Lovelace')
+]
+
+def make_lookups(use_async):
+    if use_async:
+        from api_modules.async_lookups import (
+            AsyncIPLookup as IPLookup, AsyncEmailLookup as EmailLookup, AsyncPhoneLookup as PhoneLookup,
+            AsyncWhoisLookup as WhoisLookup, AsyncSocialLookup as SocialLookup
+        )
+    else:
+        from api_modules.ip_lookup import IPLookup
+        from api_modules.email_lookup import EmailLookup
+        from api_modules.phone_lookup import PhoneLookup
+        from api_modules.whois_lookup import WhoisLookup
+        from api_modules.social_lookup import SocialLookup
+
+    email = EmailLookup()
+    email.hibp_api_key = 'benchmark'
+    phone = PhoneLookup()
+    phone.numverify_api_key = 'benchmark'
+    social = SocialLookup()
+    return {
+        'ip': IPLookup().search,
+        'email': email.search,
+        'phone': phone.search,
+        'domain': WhoisLookup().search,
+        'username': social.search_by_username,
+        'name': social.search_by_name
+    }
+
+def body_bytes(root):
+    """Body bytes read by the provider calls of a trace"""
+    return sum(span.attributes.get('bytes', 0) for span in root.walk())
+
+async def time_async(search, query):
+    with tracing.start_trace('bench') as root:
+        start = time.perf_counter()
+        await search(query)
+        elapsed = time.perf_counter() - start
+    return elapsed, body_bytes(root)
+
+def time_sync(search, query):
+    with tracing.start_trace('bench') as root:
+        start = time.perf_counter()
+        search(query)
+        elapsed = time.perf_counter() - start
+    return elapsed, body_bytes(root)
+
+def time_searches(lookups, runs, use_async):
+    """{search type: [(seconds, body bytes) per run]}"""
+    if use_async:
+        from api_modules.async_upstream import async_upstream
+
+        async def run_all():
+            timings = {}
+            for search_type, query in SEARCHES:
+                timings[search_type] = [await time_async(lookups[search_type], query) for _ in range(runs)]
+            await async_upstream.close()
+            return timings
+
+        return asyncio.run(run_all())
+
+    timings = {}
+    for search_type, query in SEARCHES:
+        timings[search_type] = [time_sync(lookups[search_type], query) for _ in range(runs)]
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--record', metavar='CASSETTE', help='record provider answers to this file')
+    group.add_argument('--cassette', help='replay provider answers from this file')
+    parser.add_argument('--latency-scale', type=float, default=1.0)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--async', dest='use_async', action='store_true', help='time the asyncio lookups')
+    options = parser.parse_args()
+
+    quota_manager.quotas.clear()
+
+    if options.record:
+        if os.path.exists(options.record):
+            os.remove(options.record)
+        upstream.cassette = Cassette(options.record, mode='record')
+        runs = 1
+    else:
+        upstream.cassette = Cassette(options.cassette, mode='replay', latency_scale=options.latency_scale)
+        runs = options.runs
+
+    timings = time_searches(make_lookups(options.use_async), runs, options.use_async)
+    print(f"{'search':>10}{'median ms':>12}{'min ms':>10}{'max ms':>10}{'body KB':>10}")
+    for search_type, runs in timings.items():
+        samples = [seconds for seconds, _ in runs]
+        print(f"{search_type:>10}{statistics.median(samples) * 1000:>12.1f}"
+              f"{min(samples) * 1000:>10.1f}{max(samples) * 1000:>10.1f}{runs[-1][1] / 1024:>10.1f}")
+
+    if options.record:
+        print(f"\nRecorded to {options.record} ({os.path.getsize(options.record) / 1024:.1f} KB)")
+
+if __name__ == '__main__':
+    main()
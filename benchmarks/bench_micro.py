@@ -0,0 +1,187 @@
+"""Micro-benchmarks of the hot pure-Python paths, checked against stored baselines.
+
+    python benchmarks/bench_micro.py [-k sanitize] [--rounds 7] [--threshold 25]
+    python benchmarks/bench_micro.py --update
+
+Each case runs in rounds of enough calls to take --min-time seconds; the
+median per-call time over --rounds rounds is compared with
+benchmarks/baselines.json. A case more than --threshold percent slower than
+its baseline is reported as a regression and makes the exit status 1, so CI
+can run the script as a gate. --update rewrites the baselines of the cases
+that ran.
+
+Baselines are only comparable on the machine that recorded them: regenerate
+them with --update on the CI runner before relying on the gate.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_modules.input_validator import InputValidator
+from api_modules.ip_lookup import IPLookup
+from api_modules.phone_lookup import PhoneLookup
+from api_modules.social_lookup import SocialLookup
+from api_modules.indicator_matcher import IndicatorMatcher
+from api_modules.export_handler import ExportHandler
+from api_modules.cassette import RecordedResponse
+from bench_pdf import make_results
+from fake_providers import profile_page
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+SEARCH_INPUTS = {
+    'email': 'someone.else+osint@example.co.uk',
+    'ip': '203.0.113.195',
+    'domain': 'https://www.sub.example-domain.com',
+    'username': '@octo_cat-1990',
+    'phone': '+1 (415) 555-2671',
+    'name': "Ada O'Brien-Lovelace"
+}
+
+def profile_response(page_kb):
+    status, body = profile_page('/github.com/octocat', {}, page_kb=page_kb)
+    return RecordedResponse(status, body.encode('utf-8'), 'utf-8', 'https://github.com/octocat')
+
+def make_cases():
+    """{name: zero-argument callable}, built once so setup stays out of the timings"""
+    cases = {}
+
+    for search_type, query in SEARCH_INPUTS.items():
+        cases[f"validate_search_input[{search_type}]"] = (
+            lambda search_type=search_type, query=query: InputValidator.validate_search_input(search_type, query)
+        )
+
+    emails = [f"user{i}@example{i % 50}.com" for i in range(1000)]
+    cases['validate_search_input[email x1000]'] = (
+        lambda: [InputValidator.validate_search_input('email', email) for email in emails]
+    )
+    cases['validate_bulk[email x1000]'] = lambda: InputValidator.validate_bulk('email', emails)
+
+    short_text = '<b>"Ada"</b> & \'Lovelace\'\x00  '
+    long_text = short_text * 128
+    cases['sanitize_input[short]'] = lambda: InputValidator.sanitize_input(short_text)
+    cases['sanitize_input[4kb]'] = lambda: InputValidator.sanitize_input(long_text)
+
+    ip_lookup = IPLookup()
+    cases['ip_validate[ipv4]'] = lambda: ip_lookup._validate_ip('203.0.113.195')
+    cases['ip_validate[ipv6]'] = lambda: ip_lookup._validate_ip('2001:db8::8a2e:370:7334')
+    ipv4 = InputValidator.parse_search_input('ip', '203.0.113.195')[0]
+    cases['ip_validate[ipv4 parsed]'] = lambda: ip_lookup._validate_ip(ipv4.value, ipv4)
+
+    social = SocialLookup()
+    for page_kb in (16, 64, 256):
+        response = profile_response(page_kb)
+        cases[f"analyze_response[{page_kb}kb]"] = (
+            lambda response=response: social._analyze_response('Twitter', response, 'octocat')
+        )
+    cases['generate_usernames'] = lambda: social._generate_usernames('Ada Augusta Lovelace')
+
+    # Matching cost against the number of indicators, on a 64 KB page
+    page = profile_response(64).content.lower()
+    for count in (10, 200):
+        matcher = IndicatorMatcher({f"indicator {i} absent from the page": 'found' for i in range(count)})
+        cases[f"indicator_matcher[{count}]"] = lambda matcher=matcher: matcher.labels_in(page)
+
+    phone = PhoneLookup()
+    cases['parse_phone[us]'] = lambda: phone._parse_phone_basic('+14155552671')
+    cases['parse_phone[gb]'] = lambda: phone._parse_phone_basic('+442079460958')
+    us = InputValidator.parse_search_input('phone', '+1 (415) 555-2671')[0]
+    cases['parse_phone[us parsed]'] = lambda: phone._parse_phone_basic(us.value, us)
+
+    handler = ExportHandler()
+    for count in (10, 1000):
+        results = make_results(count)
+        cases[f"generate_csv[{count}]"] = lambda results=results: handler.generate_csv(results, 'octocat')
+        cases[f"generate_pdf[{count}]"] = lambda results=results: handler.generate_pdf(results, 'octocat')
+
+    return cases
+
+def calls_per_round(function, min_time):
+    """Smallest power of ten of calls that takes at least min_time"""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        if time.perf_counter() - start >= min_time or number >= 10 ** 6:
+            return number
+        number *= 10
+
+def measure(function, rounds, min_time):
+    """Median and minimum seconds per call"""
+    number = calls_per_round(function, min_time)
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples), min(samples)
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle).get('cases', {})
+
+def save_baselines(path, baselines):
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump({
+            'machine': f"{platform.machine()} {platform.python_implementation()} {platform.python_version()}",
+            'cases': dict(sorted(baselines.items()))
+        }, handle, indent=2)
+        handle.write('\n')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='keyword', help='only run cases whose name contains this')
+    parser.add_argument('--rounds', type=int, default=7)
+    parser.add_argument('--min-time', type=float, default=0.1, help='seconds per round')
+    parser.add_argument('--threshold', type=float, default=25, help='percent slowdown flagged as a regression')
+    parser.add_argument('--baselines', default=BASELINES)
+    parser.add_argument('--update', action='store_true', help='store these timings as the new baselines')
+    options = parser.parse_args()
+
+    cases = make_cases()
+    if options.keyword:
+        cases = {name: function for name, function in cases.items() if options.keyword in name}
+    # First PDF render pays for font and style setup; keep it out of the numbers
+    ExportHandler().generate_pdf(make_results(1), 'warmup')
+
+    baselines = load_baselines(options.baselines)
+    regressed = []
+
+    print(f"{'case':<34}{'median us':>12}{'min us':>12}{'baseline':>12}{'change':>9}")
+    for name, function in cases.items():
+        median, minimum = measure(function, options.rounds, options.min_time)
+        median_us = median * 1e6
+
+        baseline = baselines.get(name, {}).get('median_us')
+        row = f"{name:<34}{median_us:>12.2f}{minimum * 1e6:>12.2f}"
+        if baseline and not options.update:
+            change = (median_us - baseline) / baseline * 100
+            row += f"{baseline:>12.2f}{change:>+8.1f}%"
+            if change > options.threshold:
+                row += '  REGRESSION'
+                regressed.append(name)
+        print(row)
+
+        if options.update:
+            baselines[name] = {'median_us': round(median_us, 3)}
+
+    if options.update:
+        save_baselines(options.baselines, baselines)
+        print(f"\nBaselines written to {options.baselines}")
+    elif regressed:
+        print(f"\n{len(regressed)} case(s) more than {options.threshold:g}% slower than baseline")
+
+    sys.exit(1 if regressed else 0)
+
+if __name__ == '__main__':
+    main()
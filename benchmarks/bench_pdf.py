@@ -0,0 +1,61 @@
+"""PDF rendering throughput (pages/sec) at several report sizes.
+
+    python benchmarks/bench_pdf.py [--sizes 10 1000 10000] [--layout auto]
+
+Results are synthetic but shaped like real lookups: a mix of short fields
+and long URLs per result.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_modules.export_handler import ExportHandler
+
+PAGE_MARKER = re.compile(rb'/Type /Page\b(?!s)')
+
+def make_results(count):
+    results = []
+    for i in range(count):
+        results.append({
+            'platform': f"Platform {i % 40}",
+            'status': ('found', 'not_found', 'unknown')[i % 3],
+            'details': {
+                'Platform': f"Platform {i % 40}",
+                'Username': f"user{i}",
+                'Profile URL': f"https://example.com/profiles/user{i}?ref=osint-framework-portal-benchmark",
+                'Status': 'Profile Found',
+                'Response Code': '200'
+            }
+        })
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--layout', default='auto', choices=['auto', 'flat', 'sectioned'])
+    options = parser.parse_args()
+
+    handler = ExportHandler()
+    # First render pays for font and style setup; keep it out of the numbers
+    handler.generate_pdf(make_results(1), 'warmup')
+
+    print(f"{'results':>8}{'layout':>11}{'pages':>8}{'seconds':>10}{'pages/sec':>11}{'KB':>9}")
+    for size in options.sizes:
+        results = make_results(size)
+        layout = options.layout
+        if layout == 'auto':
+            layout = 'flat' if size > handler.pdf_renderer.flat_threshold else 'sectioned'
+
+        start = time.perf_counter()
+        pdf = handler.generate_pdf(results, 'benchmark', layout=layout).getvalue()
+        elapsed = time.perf_counter() - start
+
+        pages = len(PAGE_MARKER.findall(pdf))
+        print(f"{size:>8}{layout:>11}{pages:>8}{elapsed:>10.2f}{pages / elapsed:>11.1f}{len(pdf) / 1024:>9.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Per-decision latency of each rate limit backend.
+
+    python benchmarks/bench_rate_limit.py [--iterations 5000]
+
+The Redis backend is measured against the local stand-in in fake_redis.py
+unless --redis-url points at a real server.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_modules.rate_limit_backends import MemoryBackend, SQLiteBackend, create_backend
+from fake_redis import FakeRedisServer
+
+def measure(backend, iterations):
+    samples = []
+    for i in range(iterations):
+        identifier = f"10.0.{i % 50}.1"
+        start = time.perf_counter()
+        backend.hit(identifier, 30, 60)
+        samples.append(time.perf_counter() - start)
+
+    samples.sort()
+    return {
+        'p50_us': samples[len(samples) // 2] * 1e6,
+        'p99_us': samples[int(len(samples) * 0.99)] * 1e6,
+        'mean_us': statistics.fmean(samples) * 1e6
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=5000)
+    parser.add_argument('--redis-url', default=None)
+    options = parser.parse_args()
+
+    backends = {'memory': MemoryBackend()}
+
+    tmpdir = tempfile.mkdtemp()
+    backends['sqlite'] = SQLiteBackend(os.path.join(tmpdir, 'rate_limit.db'))
+
+    if options.redis_url:
+        backends['redis'] = create_backend(options.redis_url)
+    else:
+        host, port = FakeRedisServer().start()
+        backends['redis (stand-in)'] = create_backend(f"redis://{host}:{port}/0")
+
+    print(f"{'backend':<18}{'p50 (us)':>12}{'p99 (us)':>12}{'mean (us)':>12}")
+    for name, backend in backends.items():
+        stats = measure(backend, options.iterations)
+        print(f"{name:<18}{stats['p50_us']:>12.1f}{stats['p99_us']:>12.1f}{stats['mean_us']:>12.1f}")
+
+if __name__ == '__main__':
+    main()
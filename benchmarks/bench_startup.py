@@ -0,0 +1,86 @@
+"""Worker cold-start cost: import time of app.py and resident memory afterwards.
+
+    python benchmarks/bench_startup.py [--runs 5] [--top 10] [--json startup.json]
+
+Each run imports app in a fresh interpreter under `python -X importtime`,
+once with lookups and exports loaded lazily (the default) and once with
+PRELOAD_MODULES=1. Reports the median import time of `app`, the median wall
+time of the whole process and its peak RSS, plus the slowest modules imported
+in the lazy mode. --json writes the numbers out so runs can be compared over
+time.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# "import time: self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+CHILD = (
+    "import resource, app; "
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+def run_once(preload):
+    env = dict(os.environ, PRELOAD_MODULES='1' if preload else '0')
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - start
+
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(2))
+
+    # ru_maxrss is in kilobytes on Linux
+    rss_kb = int(completed.stdout.strip().splitlines()[-1])
+    return {
+        'app_import_ms': modules.get('app', 0) / 1000,
+        'process_ms': wall * 1000,
+        'rss_mb': rss_kb / 1024,
+        'modules': modules
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', help='write results to this file')
+    options = parser.parse_args()
+
+    report = {}
+    print(f"{'mode':>8}{'app import ms':>15}{'process ms':>12}{'RSS MB':>9}")
+    for mode, preload in (('lazy', False), ('preload', True)):
+        runs = [run_once(preload) for _ in range(options.runs)]
+        report[mode] = {
+            key: round(statistics.median(run[key] for run in runs), 1)
+            for key in ('app_import_ms', 'process_ms', 'rss_mb')
+        }
+        print(f"{mode:>8}{report[mode]['app_import_ms']:>15.1f}{report[mode]['process_ms']:>12.1f}{report[mode]['rss_mb']:>9.1f}")
+
+        if mode == 'lazy':
+            slowest = sorted(runs[-1]['modules'].items(), key=lambda item: item[1], reverse=True)
+            top_level = [(name, us) for name, us in slowest if '.' not in name and name != 'app']
+            report[mode]['slowest'] = {name: round(us / 1000, 1) for name, us in top_level[:options.top]}
+
+    print("\nSlowest top-level imports (lazy mode, cumulative ms):")
+    for name, ms in report['lazy']['slowest'].items():
+        print(f"  {name:<28}{ms:>8.1f}")
+
+    if options.json:
+        with open(options.json, 'w', encoding='utf-8') as handle:
+            json.dump(report, handle, indent=2)
+
+if __name__ == '__main__':
+    main()
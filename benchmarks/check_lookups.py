@@ -0,0 +1,105 @@
+"""Check the sync and async lookups against the local stand-ins.
+
+    python benchmarks/check_lookups.py
+
+Starts benchmarks/fake_providers.py in-process on free ports, runs every
+search through the sync lookups and the asyncio lookups, and checks that
+both return the same platforms with the same statuses, including the
+provider entries each search must have. A username with a soft 404 (a
+200 page saying the user was not found) must come back not found on every
+platform whose rule reads the page. Exits with status 1 on any
+difference, so CI can run it as a gate.
+"""
+import os
+import sys
+import asyncio
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_providers import Faults, serve, serve_dns, serve_whois
+
+# Provider entries a search against the stand-ins must return
+EXPECTED = {
+    'ip': {'IP-API Geolocation', 'IPWhois Registry'},
+    'email': {'Have I Been Pwned'},
+    'phone': {'NumVerify API'},
+    'domain': {'WHOIS Registry', 'DNS Records'}
+}
+
+SEARCHES = [
+    ('ip', '8.8.8.8'),
+    ('email', 'someone@example.com'),
+    ('phone', '+14155552671'),
+    ('domain', 'example.com'),
+    ('username', 'octocat'),
+    ('username', 'missinguser'),
+    ('username', 'goneuser')
+]
+
+def start_stand_ins(latency_ms):
+    """Serve the stand-ins on free ports and point the upstream clients at them"""
+    faults = Faults(latency_ms)
+    servers = [serve(0, latency_ms, faults), serve_dns(0, faults), serve_whois(0, faults)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    http, dns, whois = (server.server_address[1] for server in servers)
+    os.environ['UPSTREAM_OVERRIDE'] = f"http://127.0.0.1:{http}"
+    os.environ['UPSTREAM_DNS_OVERRIDE'] = f"127.0.0.1:{dns}"
+    os.environ['UPSTREAM_WHOIS_OVERRIDE'] = f"127.0.0.1:{whois}"
+
+def outline(results):
+    return [(result['platform'], result['status']) for result in results]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=5, help='stand-in milliseconds per reply')
+    options = parser.parse_args()
+
+    # The upstream clients read the overrides when first imported
+    start_stand_ins(options.latency)
+    from api_modules.quota_manager import quota_manager
+    from api_modules.async_upstream import async_upstream
+    from api_modules.platform_rules import platform_rules
+    from bench_lookups import make_lookups
+
+    quota_manager.quotas.clear()
+    sync_lookups = make_lookups(use_async=False)
+    async_lookups = make_lookups(use_async=True)
+
+    async def run_async():
+        results = [await async_lookups[search_type](query) for search_type, query in SEARCHES]
+        await async_upstream.close()
+        return results
+
+    failures = []
+    sync_results = [sync_lookups[search_type](query) for search_type, query in SEARCHES]
+    for (search_type, query), sync_result, async_result in zip(SEARCHES, sync_results, asyncio.run(run_async())):
+        sync_outline, async_outline = outline(sync_result), outline(async_result)
+        if sorted(sync_outline) != sorted(async_outline):
+            failures.append(f"{search_type} {query}: sync {sync_outline} != async {async_outline}")
+
+        for name, results in (('sync', sync_outline), ('async', async_outline)):
+            missing = EXPECTED.get(search_type, set()) - {platform for platform, _ in results}
+            if missing:
+                failures.append(f"{search_type} {query}: {name} lookup is missing {', '.join(sorted(missing))}")
+
+        if search_type == 'username' and query.startswith('gone'):
+            for name, results in (('sync', sync_outline), ('async', async_outline)):
+                wrong = [
+                    platform for platform, status in results
+                    if platform in platform_rules and not platform_rules[platform].status_only and status != 'not_found'
+                ]
+                if wrong:
+                    failures.append(f"soft 404 {query}: {name} lookup does not report {', '.join(wrong)} as not_found")
+
+        print(f"{search_type:>10} {query:<22} {len(sync_outline)} sync / {len(async_outline)} async results")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
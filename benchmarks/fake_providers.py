@@ -0,0 +1,334 @@
+"""Local stand-ins for the upstream providers, for benchmarks and load tests.
+
+    python benchmarks/fake_providers.py [--port 8900] [--dns-port 8953] [--whois-port 8943]
+                                        [--latency 50] [--jitter 0] [--page-kb 64]
+                                        [--error-rate 0] [--throttle-rate 0] [--reset-rate 0]
+
+Point the app at them with
+
+    UPSTREAM_OVERRIDE=http://127.0.0.1:8900
+    UPSTREAM_DNS_OVERRIDE=127.0.0.1:8953
+    UPSTREAM_WHOIS_OVERRIDE=127.0.0.1:8943
+
+The upstream client then sends https://<host>/<path> to /<host>/<path> on
+the HTTP stand-in, which answers in the shapes the lookups parse: ip-api.com,
+ipwhois.app, the HIBP breachedaccount API, NumVerify and the social profile
+pages. DNS queries for A, MX and NS records and WHOIS queries go to the
+other two ports.
+
+Every reply waits --latency milliseconds (plus or minus --jitter) to stand
+in for a real provider's round trip. The fault rates inject failures: a 503
+(or SERVFAIL / an empty WHOIS reply), a 429, or a connection closed without
+any reply. Names starting with "missing" (usernames, domains, emails) come
+back as not found, every other name as found. Usernames starting with
+"gone" get a soft 404 from the social hosts: a 200 page that links to the
+profile URL in its head and says the user was not found near the end.
+"""
+import sys
+import time
+import zlib
+import random
+import argparse
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+
+try:
+    import orjson
+
+    def dumps(payload):
+        return orjson.dumps(payload)
+except ImportError:
+    import json
+
+    def dumps(payload):
+        return json.dumps(payload).encode('utf-8')
+
+SOCIAL_HOSTS = (
+    'github.com', 'gitlab.com', 'twitter.com', 'instagram.com', 'linkedin.com', 'reddit.com',
+    'tiktok.com', 'youtube.com', 'facebook.com', 'pinterest.com', 't.me'
+)
+
+class Faults:
+    """Latency and failure injection shared by the stand-ins"""
+
+    def __init__(self, latency_ms=0, jitter_ms=0, error_rate=0.0, throttle_rate=0.0, reset_rate=0.0, seed=None):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.reset_rate = reset_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, delay))
+
+    def pick(self):
+        """'reset', 'error', 'throttle' or None for a normal reply"""
+        with self.lock:
+            roll = self.random.random()
+        for fault, rate in (('reset', self.reset_rate), ('error', self.error_rate), ('throttle', self.throttle_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+def missing(name):
+    return name.lower().lstrip('@').startswith('missing')
+
+def gone(name):
+    return name.lower().lstrip('@').startswith('gone')
+
+def ip_api(path, query):
+    ip = path.rsplit('/', 1)[-1]
+    return 200, {
+        'status': 'success', 'query': ip, 'country': 'United States', 'countryCode': 'US',
+        'region': 'CA', 'regionName': 'California', 'city': 'Mountain View', 'zip': '94043',
+        'lat': 37.4056, 'lon': -122.0775, 'timezone': 'America/Los_Angeles',
+        'isp': 'Example ISP', 'org': 'Example Org', 'as': 'AS15169 Example LLC'
+    }
+
+def ipwhois(path, query):
+    ip = path.rsplit('/', 1)[-1]
+    return 200, {
+        'ip': ip, 'success': True, 'type': 'IPv4', 'continent': 'North America',
+        'country': 'United States', 'region': 'California', 'city': 'Mountain View',
+        'latitude': 37.4056, 'longitude': -122.0775, 'asn': 'AS15169', 'org': 'Example Org',
+        'isp': 'Example ISP', 'timezone': 'America/Los_Angeles'
+    }
+
+def hibp(path, query):
+    email = unquote(path.rsplit('/', 1)[-1])
+    # HIBP answers 404 for an account in no breach
+    if missing(email) or zlib.crc32(email.encode()) % 2:
+        return 404, b''
+    return 200, [
+        {'Name': 'ExampleForum', 'BreachDate': '2019-03-02', 'DataClasses': ['Email addresses', 'Passwords']},
+        {'Name': 'ExampleShop', 'BreachDate': '2021-11-20', 'DataClasses': ['Email addresses', 'Names', 'Phone numbers']}
+    ]
+
+def numverify(path, query):
+    number = query.get('number', [''])[0]
+    return 200, {
+        'valid': True, 'number': number.lstrip('+'), 'local_format': number[-10:],
+        'international_format': number, 'country_prefix': '+1', 'country_code': 'US',
+        'country_name': 'United States of America', 'location': 'California',
+        'carrier': 'Example Wireless', 'line_type': 'mobile'
+    }
+
+def profile_page(path, query, page_kb=64):
+    username = path.rstrip('/').rsplit('/', 1)[-1].lstrip('@')
+    # As on the real sites, the title names the user and the profile
+    # markers in the body sit after the page chrome
+    padding = '<div class="chrome">' + 'x' * 1000 + '</div>\n'
+    chrome = padding * max(0, page_kb - 1)
+    # Pages link to their own URL, so /username is in the head whether or not the user exists
+    canonical = f'<link rel="canonical" href="https://example.com/{username}">'
+    if missing(username):
+        return 404, f"<html><head><title>Page not found</title></head><body>{chrome}<h1>Page not found</h1></body></html>"
+    if gone(username):
+        return 200, (
+            f"<html><head><title>Profile</title>{canonical}</head><body>{chrome}"
+            f"<h1>Sorry, user not found</h1></body></html>"
+        )
+    return 200, (
+        f"<html><head><title>{username} (@{username})</title>{canonical}</head><body>{chrome}"
+        f"<h1>@{username}</h1><p>1,024 followers, 128 following</p></body></html>"
+    )
+
+PROVIDERS = {
+    'ip-api.com': ip_api,
+    'ipwhois.app': ipwhois,
+    'haveibeenpwned.com': hibp,
+    'apilayer.net': numverify
+}
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; without TCP_NODELAY each
+    # reply waits on the client's delayed ACK
+    disable_nagle_algorithm = True
+    faults = Faults()
+    page_kb = 64
+
+    def do_GET(self):
+        self.faults.wait()
+
+        fault = self.faults.pick()
+        if fault == 'reset':
+            self.close_connection = True
+            return
+        if fault == 'error':
+            self._reply(503, {'error': 'injected server error'})
+            return
+        if fault == 'throttle':
+            self._reply(429, {'error': 'injected rate limit'})
+            return
+
+        parts = urlsplit(self.path)
+        host, _, path = parts.path.lstrip('/').partition('/')
+        query = parse_qs(parts.query)
+
+        if host in PROVIDERS:
+            status, payload = PROVIDERS[host](path, query)
+        elif host in SOCIAL_HOSTS:
+            status, payload = profile_page(path, query, self.page_kb)
+        else:
+            status, payload = 404, {'error': f"no stand-in for {host}"}
+        self._reply(status, payload)
+
+    # Same answers as GET, without the body (see _reply)
+    do_HEAD = do_GET
+
+    def _reply(self, status, payload):
+        if isinstance(payload, str):
+            body, content_type = payload.encode('utf-8'), 'text/html; charset=utf-8'
+        elif isinstance(payload, bytes):
+            body, content_type = payload, 'application/json'
+        else:
+            body, content_type = dumps(payload), 'application/json'
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def dns_records(name, record_type):
+    """Answer records (as zone-file text) for a query, or [] for none"""
+    if missing(name):
+        return []
+    if record_type == 'A':
+        return ['93.184.216.34']
+    if record_type == 'MX':
+        return [f"10 mail.{name}.", f"20 mail2.{name}."]
+    if record_type == 'NS':
+        return [f"ns1.{name}.", f"ns2.{name}."]
+    return []
+
+class FakeDNSHandler(socketserver.BaseRequestHandler):
+    faults = Faults()
+
+    def handle(self):
+        import dns.message
+        import dns.rcode
+        import dns.rdatatype
+        import dns.rrset
+
+        data, sock = self.request
+        query = dns.message.from_wire(data)
+        response = dns.message.make_response(query)
+
+        self.faults.wait()
+        fault = self.faults.pick()
+        if fault == 'reset':
+            return
+        if fault is not None:
+            response.set_rcode(dns.rcode.SERVFAIL)
+        else:
+            for question in query.question:
+                record_type = dns.rdatatype.to_text(question.rdtype)
+                records = dns_records(question.name.to_text(omit_final_dot=True), record_type)
+                if records:
+                    response.answer.append(dns.rrset.from_text_list(question.name, 300, 'IN', record_type, records))
+
+        sock.sendto(response.to_wire(), self.client_address)
+
+def whois_text(domain):
+    if missing(domain):
+        return f'No match for "{domain.upper()}".\r\n'
+    return (
+        f"   Domain Name: {domain.upper()}\r\n"
+        f"   Registry Domain ID: {zlib.crc32(domain.encode())}_DOMAIN_COM-VRSN\r\n"
+        "   Registrar WHOIS Server: whois.example-registrar.com\r\n"
+        "   Registrar URL: http://www.example-registrar.com\r\n"
+        "   Updated Date: 2024-08-14T07:01:34Z\r\n"
+        "   Creation Date: 1995-08-14T04:00:00Z\r\n"
+        "   Registry Expiry Date: 2030-08-13T04:00:00Z\r\n"
+        "   Registrar: Example Registrar, Inc.\r\n"
+        "   Registrar IANA ID: 9999\r\n"
+        "   Domain Status: clientTransferProhibited https://icann.org/epp#clientTransferProhibited\r\n"
+        "   Domain Status: clientUpdateProhibited https://icann.org/epp#clientUpdateProhibited\r\n"
+        f"   Name Server: NS1.{domain.upper()}\r\n"
+        f"   Name Server: NS2.{domain.upper()}\r\n"
+        "   DNSSEC: unsigned\r\n"
+    )
+
+class FakeWhoisHandler(socketserver.StreamRequestHandler):
+    faults = Faults()
+
+    def handle(self):
+        domain = self.rfile.readline().decode('utf-8', errors='replace').strip()
+
+        self.faults.wait()
+        if self.faults.pick() is not None:
+            return
+        self.wfile.write(whois_text(domain).encode('utf-8'))
+
+class ThreadingUDPServer(socketserver.ThreadingUDPServer):
+    daemon_threads = True
+
+class ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Profile probes drop the connection once they have read enough
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+def serve(port, latency_ms, faults=None, page_kb=64):
+    """HTTP stand-in (not yet serving; call serve_forever)"""
+    faults = faults or Faults(latency_ms)
+    handler = type('Handler', (FakeProviderHandler,), {'faults': faults, 'page_kb': page_kb})
+    server = QuietHTTPServer(('127.0.0.1', port), handler)
+    server.daemon_threads = True
+    return server
+
+def serve_dns(port, faults):
+    handler = type('Handler', (FakeDNSHandler,), {'faults': faults})
+    return ThreadingUDPServer(('127.0.0.1', port), handler)
+
+def serve_whois(port, faults):
+    handler = type('Handler', (FakeWhoisHandler,), {'faults': faults})
+    return ThreadingTCPServer(('127.0.0.1', port), handler)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--dns-port', type=int, default=8953)
+    parser.add_argument('--whois-port', type=int, default=8943)
+    parser.add_argument('--latency', type=float, default=50, help='milliseconds per reply')
+    parser.add_argument('--jitter', type=float, default=0, help='random +/- milliseconds per reply')
+    parser.add_argument('--page-kb', type=int, default=64, help='size of social profile pages')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of 503 / SERVFAIL replies')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='fraction of 429 replies')
+    parser.add_argument('--reset-rate', type=float, default=0, help='fraction of connections closed unanswered')
+    parser.add_argument('--seed', type=int, help='make the injected faults repeatable')
+    options = parser.parse_args()
+
+    faults = Faults(options.latency, options.jitter, options.error_rate,
+                    options.throttle_rate, options.reset_rate, options.seed)
+    servers = [
+        serve(options.port, options.latency, faults, options.page_kb),
+        serve_dns(options.dns_port, faults),
+        serve_whois(options.whois_port, faults)
+    ]
+    for server in servers[1:]:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    print(f"Fake providers: HTTP on :{options.port}, DNS on :{options.dns_port}, "
+          f"WHOIS on :{options.whois_port} ({options.latency:.0f}ms latency)")
+    servers[0].serve_forever()
+
+if __name__ == '__main__':
+    main()
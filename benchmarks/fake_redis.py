@@ -0,0 +1,135 @@
+"""Minimal Redis-protocol stand-in for exercising RedisBackend locally.
+
+Implements just enough of RESP (PING, AUTH, SELECT, GET, DEL, INCR,
+INCRBY, DECRBY, PEXPIRE, MULTI, EXEC) for the rate limiter. Run it directly:
+
+    python benchmarks/fake_redis.py --port 6390
+"""
+import argparse
+import socketserver
+import threading
+import time
+
+class FakeRedisStore:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+
+    def _alive(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def run(self, command, args):
+        with self.lock:
+            if command == 'PING':
+                return 'PONG'
+            if command in ('AUTH', 'SELECT'):
+                return 'OK'
+            if command == 'GET':
+                return self.data.get(args[0]) if self._alive(args[0]) else None
+            if command == 'DEL':
+                removed = sum(1 for key in args if self._alive(key))
+                for key in args:
+                    self.data.pop(key, None)
+                    self.expires.pop(key, None)
+                return removed
+            if command in ('INCR', 'INCRBY', 'DECRBY'):
+                step = int(args[1]) if command != 'INCR' else 1
+                if command == 'DECRBY':
+                    step = -step
+                value = int(self.data[args[0]]) + step if self._alive(args[0]) else step
+                self.data[args[0]] = str(value).encode()
+                return value
+            if command == 'PEXPIRE':
+                if not self._alive(args[0]):
+                    return 0
+                self.expires[args[0]] = time.time() + int(args[1]) / 1000
+                return 1
+        raise ValueError(f"unknown command '{command}'")
+
+def encode(reply):
+    if isinstance(reply, Exception):
+        return f"-ERR {reply}\r\n".encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, int):
+        return f":{reply}\r\n".encode()
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    if isinstance(reply, list):
+        return f"*{len(reply)}\r\n".encode() + b''.join(encode(item) for item in reply)
+    return f"+{reply}\r\n".encode()
+
+class RESPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        store = self.server.store
+        queued = None
+
+        while True:
+            args = self.read_command()
+            if args is None:
+                return
+
+            command = args[0].decode().upper()
+            if command == 'MULTI':
+                queued = []
+                reply = 'OK'
+            elif command == 'EXEC':
+                reply = []
+                for name, params in queued or []:
+                    try:
+                        reply.append(store.run(name, params))
+                    except Exception as e:
+                        reply.append(e)
+                queued = None
+            elif queued is not None:
+                queued.append((command, args[1:]))
+                reply = 'QUEUED'
+            else:
+                try:
+                    reply = store.run(command, args[1:])
+                except Exception as e:
+                    reply = e
+
+            self.wfile.write(encode(reply))
+            self.wfile.flush()
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 0)):
+        super().__init__(address, RESPHandler)
+        self.store = FakeRedisStore()
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self.server_address
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    options = parser.parse_args()
+
+    server = FakeRedisServer((options.host, options.port))
+    print(f"Fake Redis listening on {options.host}:{options.port}")
+    server.serve_forever()
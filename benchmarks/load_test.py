@@ -0,0 +1,273 @@
+"""Closed-loop load generator for the search and export APIs.
+
+    python benchmarks/load_test.py --url http://127.0.0.1:5000 [--scenario search-ip ...]
+                                   [--concurrency 32] [--duration 20] [--results-dir benchmarks/results]
+
+Scenarios (several can be given; they run one after the other):
+
+    search-ip           POST /api/search with IP searches
+    search-mixed        POST /api/search cycling through ip, email, domain, username and phone
+    search-ip-async     search-ip against POST /api/search/async (uvicorn asgi:application)
+    search-mixed-async  search-mixed against POST /api/search/async
+    export-csv          GET /api/export/csv/<search_id>
+    export-pdf          GET /api/export/pdf/<search_id>
+    export-combined     POST /api/export/combined with five stored searches per request
+    batch               POST /api/search/batch with ten mixed queries and type auto
+
+Export scenarios first store --seed-searches IP searches and then export
+those in turn. Each client thread keeps one keep-alive connection and sends
+requests back to back. Every request carries a different X-Forwarded-For
+address so the per-client rate limits do not cap the run. For that the app
+must trust one proxy hop: start it with PROXY_HOPS=1. Reports throughput and latency percentiles of successful
+requests.
+
+Run against benchmarks/fake_providers.py so no real provider is called.
+Each run is saved as JSON under --results-dir together with its settings
+and the git commit, and compared with the previous saved run of the same
+scenario and concurrency. A throughput drop or p95 rise beyond --threshold
+percent is reported as a regression and makes the exit status 1.
+"""
+import os
+import sys
+import json
+import glob
+import time
+import argparse
+import itertools
+import threading
+import subprocess
+import http.client
+from datetime import datetime
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SEARCH_MIX = ('ip', 'email', 'domain', 'username', 'phone')
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))]
+
+def search_query(search_type, n):
+    if search_type == 'ip':
+        return f"8.8.{(n >> 8) % 256}.{n % 256}"
+    if search_type == 'email':
+        return f"user{n}@example.com"
+    if search_type == 'domain':
+        return f"example{n % 1000}.com"
+    if search_type == 'username':
+        return f"user{n}"
+    return f"+1415555{n % 10000:04d}"
+
+def search(path, mixed):
+    def build(n, search_ids):
+        search_type = SEARCH_MIX[n % len(SEARCH_MIX)] if mixed else 'ip'
+        return 'POST', path, {'type': search_type, 'query': search_query(search_type, n)}
+    return build
+
+def stored_export(fmt):
+    def build(n, search_ids):
+        return 'GET', f"/api/export/{fmt}/{search_ids[n % len(search_ids)]}", None
+    return build
+
+def combined_export(n, search_ids):
+    chosen = [search_ids[(n + i) % len(search_ids)] for i in range(min(5, len(search_ids)))]
+    return 'POST', '/api/export/combined', {'search_ids': chosen}
+
+def batch_search(n, search_ids):
+    queries = [search_query(SEARCH_MIX[i % len(SEARCH_MIX)], n * 10 + i) for i in range(10)]
+    return 'POST', '/api/search/batch', {'type': 'auto', 'queries': queries}
+
+# Scenario -> (request builder taking (n, search_ids), needs stored searches)
+SCENARIOS = {
+    'search-ip': (search('/api/search', mixed=False), False),
+    'search-mixed': (search('/api/search', mixed=True), False),
+    'search-ip-async': (search('/api/search/async', mixed=False), False),
+    'search-mixed-async': (search('/api/search/async', mixed=True), False),
+    'export-csv': (stored_export('csv'), True),
+    'export-pdf': (stored_export('pdf'), True),
+    'export-combined': (combined_export, True),
+    'batch': (batch_search, False)
+}
+
+def forwarded_for(n):
+    return f"10.{(n >> 16) % 256}.{(n >> 8) % 256}.{n % 256}"
+
+def seed_searches(base_url, count):
+    """Store `count` IP searches and return their IDs"""
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=60)
+    search_ids = []
+    for n in range(count):
+        body = json.dumps({'type': 'ip', 'query': search_query('ip', 100000 + n)})
+        connection.request('POST', '/api/search', body, {
+            'Content-Type': 'application/json',
+            'X-Forwarded-For': forwarded_for(200000 + n)
+        })
+        response = connection.getresponse()
+        payload = json.loads(response.read())
+        if response.status == 200 and payload.get('search_id'):
+            search_ids.append(payload['search_id'])
+    connection.close()
+    if not search_ids:
+        raise SystemExit('Could not store any searches to export')
+    return search_ids
+
+def client(base_url, build, search_ids, deadline, counter, latencies, statuses, received, lock):
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+
+    while time.time() < deadline:
+        n = next(counter)
+        method, path, payload = build(n, search_ids)
+        headers = {'X-Forwarded-For': forwarded_for(n)}
+        body = None
+        if payload is not None:
+            body = json.dumps(payload)
+            headers['Content-Type'] = 'application/json'
+
+        start = time.perf_counter()
+        status = None
+        size = 0
+        for attempt in range(2):
+            try:
+                connection.request(method, path, body, headers)
+                response = connection.getresponse()
+                size = len(response.read())
+                status = response.status
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # A recycled worker closed our idle keep-alive connection;
+                # like a browser, retry once on a new one
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+                status = 'reconnect_failed' if attempt else None
+                with lock:
+                    statuses['reconnects'] = statuses.get('reconnects', 0) + 1
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=120)
+                status = 'error'
+                break
+        elapsed = time.perf_counter() - start
+
+        with lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 200:
+                latencies.append(elapsed)
+                received[0] += size
+
+def run(base_url, scenario, concurrency, duration, search_ids=None):
+    build, _ = SCENARIOS[scenario]
+    counter = itertools.count()
+    latencies = []
+    statuses = {}
+    received = [0]
+    lock = threading.Lock()
+    deadline = time.time() + duration
+
+    threads = [
+        threading.Thread(target=client, args=(
+            base_url, build, search_ids, deadline, counter, latencies, statuses, received, lock
+        ))
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'duration_s': round(elapsed, 2),
+        'requests': sum(count for status, count in statuses.items() if status != 'reconnects'),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+        'received_mb_s': round(received[0] / elapsed / (1024 * 1024), 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1)
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save(results_dir, result):
+    os.makedirs(results_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = os.path.join(results_dir, f"{result['scenario']}-c{result['concurrency']}-{stamp}.json")
+    with open(path, 'w', encoding='utf-8') as handle:
+        json.dump(result, handle, indent=2)
+    return path
+
+def previous_run(results_dir, result, exclude):
+    pattern = os.path.join(results_dir, f"{result['scenario']}-c{result['concurrency']}-*.json")
+    paths = sorted(path for path in glob.glob(pattern) if path != exclude)
+    if not paths:
+        return None
+    with open(paths[-1], encoding='utf-8') as handle:
+        return json.load(handle)
+
+def compare(previous, result, threshold):
+    """Print the change since the previous run; returns True on a regression"""
+    regressed = False
+    for key in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+        before, after = previous.get(key) or 0, result[key]
+        change = (after - before) / before * 100 if before else 0.0
+
+        flag = ''
+        worse = -change if key == 'throughput_rps' else change
+        if key in ('throughput_rps', 'p95_ms') and worse > threshold:
+            flag = '  REGRESSION'
+            regressed = True
+        print(f"  {key:<16}{before:>10}{after:>10}{change:>+9.1f}%{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='http://127.0.0.1:5000')
+    parser.add_argument('--scenario', nargs='+', choices=list(SCENARIOS), default=['search-ip'])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--seed-searches', type=int, default=50, help='stored searches for export scenarios')
+    parser.add_argument('--results-dir', default=os.path.join(ROOT, 'benchmarks', 'results'))
+    parser.add_argument('--threshold', type=float, default=10, help='percent change flagged as a regression')
+    parser.add_argument('--no-save', action='store_true', help='do not store or compare this run')
+    options = parser.parse_args()
+
+    search_ids = None
+    if any(SCENARIOS[scenario][1] for scenario in options.scenario):
+        search_ids = seed_searches(options.url, options.seed_searches)
+
+    regressed = False
+    for scenario in options.scenario:
+        result = run(options.url, scenario, options.concurrency, options.duration, search_ids)
+        result.update({
+            'url': options.url,
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat()
+        })
+        print(json.dumps(result, indent=2))
+
+        if options.no_save:
+            continue
+        path = save(options.results_dir, result)
+        previous = previous_run(options.results_dir, result, path)
+        if previous:
+            print(f"Compared with {previous.get('commit')} at {previous.get('timestamp')}:")
+            regressed = compare(previous, result, options.threshold) or regressed
+
+    sys.exit(1 if regressed else 0)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Gunicorn settings for production
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Every setting can be overridden with the environment variables below or on
+the command line.
+"""
+import os
+import multiprocessing
+
+# Serve a reverse proxy on this host (with PROXY_HOPS=1), not clients directly
+bind = os.environ.get('BIND', '127.0.0.1:5000')
+
+# Searches spend most of their time waiting on upstream providers, so each
+# process runs many threads; extra processes mainly add CPU for exports.
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, multiprocessing.cpu_count())))
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Import the app (and its lookup/export modules) once in the master; forked
+# workers share those pages and recycled workers start without the import cost
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+if preload_app:
+    os.environ.setdefault('PRELOAD_MODULES', '1')
+
+# Recycle workers to bound memory growth; the jitter keeps them from all
+# restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 200))
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+# Provider latency windows survive worker recycling through this file, so a
+# fresh worker keeps the adaptive timeouts and provider ordering
+provider_stats_path = os.environ.get('PROVIDER_STATS_PATH', os.path.join('exports', 'provider_stats.json'))
+
+def post_fork(server, worker):
+    from api_modules.provider_stats import provider_stats
+    provider_stats.load(provider_stats_path)
+
+def worker_exit(server, worker):
+    from api_modules.provider_stats import provider_stats
+    os.makedirs(os.path.dirname(os.path.abspath(provider_stats_path)), exist_ok=True)
+    provider_stats.save(provider_stats_path)
@@ -1,5 +1,7 @@
 // Global variables
 let currentSearchData = [];
+let currentSearchId = null;
+let currentSearchType = null;
 const API_BASE_URL = 'http://localhost:5000';
 
 // DOM elements
@@ -48,6 +50,7 @@ document.addEventListener('DOMContentLoaded', function() {
 function updatePlaceholder() {
     const type = searchType.value;
     const placeholders = {
+        auto: 'Paste an email, phone number, IP address, domain, username or name',
         email: 'Enter an email (example@gmail.com)',
         phone: 'Enter a phone number (+1 202 555 0147)',
         ip: 'Enter an IP address (192.168.1.1 or 8.8.8.8)',
@@ -77,7 +80,7 @@ async function handleSearch(e) {
     
     try {
         const results = await performSearch(type, query);
-        displayResults(results, type, query);
+        displayResults(results, currentSearchType || type, query);
         currentSearchData = results;
         showNotification('Search completed successfully!', 'success');
     } catch (error) {
@@ -109,6 +112,8 @@ async function performSearch(type, query) {
         const data = await response.json();
         
         if (data.status === 'success') {
+            currentSearchId = data.search_id;
+            currentSearchType = data.search_type;
             return data.results;
         } else {
             throw new Error(data.error || 'Search failed');
@@ -273,6 +278,7 @@ function getStatusClass(status) {
         'info': 'status-info',
         'summary': 'status-info',
         'api_key_required': 'status-warning',
+        'quota_exceeded': 'status-warning',
         'unknown': 'status-warning'
     };
     
@@ -292,6 +298,7 @@ function getStatusIcon(status) {
         'info': 'fas fa-info-circle',
         'summary': 'fas fa-list',
         'api_key_required': 'fas fa-key',
+        'quota_exceeded': 'fas fa-hourglass-half',
         'unknown': 'fas fa-question-circle'
     };
     
@@ -327,16 +334,19 @@ async function exportResults(format) {
     try {
         const query = searchInput.value.trim();
         
-        const response = await fetch(`${API_BASE_URL}/api/export/${format}`, {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-            body: JSON.stringify({
-                results: currentSearchData,
-                query: query
-            })
-        });
+        // Stored searches are exported by ID so the results aren't uploaded again
+        const response = currentSearchId
+            ? await fetch(`${API_BASE_URL}/api/export/${format}/${currentSearchId}`)
+            : await fetch(`${API_BASE_URL}/api/export/${format}`, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({
+                    results: currentSearchData,
+                    query: query
+                })
+            });
         
         if (!response.ok) {
             throw new Error(`Export failed: ${response.statusText}`);